@@ -0,0 +1,418 @@
+"""Headless UI benchmarks for eide+lspv2.py and eide-lite.py.
+
+Runs both editors under Qt's offscreen platform and times the paths that
+decide how the editor feels:
+
+  keystroke      Editor.keyPressEvent per typed character in a large file
+  open_file      MainWindow.open_specific_file for files of growing size
+  completions    Editor.populate_completions with large completion lists
+  diagnostics    Editor.display_error with 1k / 10k diagnostics (eide+lspv2 only)
+  replace_all    FindReplaceDialog.replace_all on a large file
+  lsp            completion round trips and diagnostic bursts against
+                 benchmarks/fake_lsp_server.py (eide+lspv2 only)
+
+Results are written as JSON so runs from different commits can be compared:
+
+  python benchmarks/bench_editors.py --output before.json
+  python benchmarks/bench_editors.py --output after.json --compare before.json
+
+Real LSP servers are never started, so numbers do not depend on which
+language servers happen to be installed.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import statistics
+import subprocess
+import contextlib
+import importlib.util
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QT_VERSION_STR
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_LSP_SERVER = os.path.join(REPO_ROOT, "benchmarks", "fake_lsp_server.py")
+TARGETS = {
+    "eide+lspv2": "eide+lspv2.py",
+    "eide-lite": "eide-lite.py",
+}
+
+
+def load_target(name):
+    """Import one of the editor scripts as a module (their file names are not importable)."""
+    path = os.path.join(REPO_ROOT, TARGETS[name])
+    spec = importlib.util.spec_from_file_location(name.replace("+", "_").replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def summarize(samples):
+    """Summary of timings given in seconds, reported in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def python_source(lines):
+    """A plausible Python file of roughly `lines` lines."""
+    block = [
+        "class Widget{0}(object):",
+        "    def compute(self, value):",
+        "        result = [item * 2 for item in range(value) if item % 3]",
+        "        return sum(result) + len('widget{0}')",
+        "",
+    ]
+    out = []
+    i = 0
+    while len(out) < lines:
+        out.extend(line.format(i) for line in block)
+        i += 1
+    return "\n".join(out[:lines]) + "\n"
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the editors' debug prints and modal message boxes while timing."""
+    information = QMessageBox.information
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        QMessageBox.information = information
+
+
+def drain(app):
+    app.processEvents()
+    app.processEvents()
+
+
+def wait_for(app, predicate, timeout=30.0):
+    """Run the event loop until predicate() holds; False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.0005)
+    return True
+
+
+def new_window(module):
+    if hasattr(module, "LSP_SERVER_COMMANDS"):
+        module.LSP_SERVER_COMMANDS = {}
+    window = module.MainWindow()
+    window.resize(1200, 800)
+    window.show()
+    return window
+
+
+def open_file(app, window, path):
+    window.open_specific_file(path)
+    drain(app)
+    return window.current_editor_tab().editor
+
+
+def close_current_tab(app, window):
+    index = window.tabs.currentIndex()
+    widget = window.tabs.widget(index)
+    window.tabs.removeTab(index)
+    widget.deleteLater()
+    drain(app)
+
+
+def bench_keystroke(app, module, window, workdir, scale):
+    path = os.path.join(workdir, "bench_typing.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(python_source(5000 * scale))
+    editor = open_file(app, window, path)
+    editor.setFocus()
+    editor.setCursorPosition(2500 * scale, 0)
+    typed = "value = widget.compute(42)\n" * 8
+    handler, with_events = [], []
+    for char in typed:
+        if char == "\n":
+            event = QKeyEvent(QKeyEvent.KeyPress, Qt.Key_Return, Qt.NoModifier, "\r")
+        else:
+            event = QKeyEvent(QKeyEvent.KeyPress, 0, Qt.NoModifier, char)
+        start = time.perf_counter()
+        editor.keyPressEvent(event)
+        handled = time.perf_counter()
+        app.processEvents()
+        done = time.perf_counter()
+        handler.append(handled - start)
+        with_events.append(done - start)
+    if hasattr(editor, "hide_completions"):
+        editor.hide_completions()
+    close_current_tab(app, window)
+    return {"keyPressEvent": summarize(handler), "with_event_loop": summarize(with_events)}
+
+
+def bench_open_file(app, module, window, workdir, scale):
+    results = {}
+    for lines in (1000 * scale, 10000 * scale, 100000 * scale):
+        path = os.path.join(workdir, f"bench_open_{lines}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(python_source(lines))
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            open_file(app, window, path)
+            samples.append(time.perf_counter() - start)
+            close_current_tab(app, window)
+        results[f"{lines}_lines"] = summarize(samples)
+    return results
+
+
+def bench_completions(app, module, window, workdir, scale):
+    window.create_new_tab()
+    editor = window.current_editor_tab().editor
+    editor.setText("import os\nos.")
+    editor.setCursorPosition(1, 3)
+    lsp_items = hasattr(module, "LSP_SERVER_COMMANDS")
+    results = {}
+    for count in (100, 1000, 10000 * scale):
+        if lsp_items:
+            items = {"isIncomplete": False,
+                     "items": [{"label": f"completion_{i}", "kind": 3, "detail": "function"} for i in range(count)]}
+        else:
+            items = [f"completion_{i}" for i in range(count)]
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            editor.populate_completions(items)
+            app.processEvents()
+            samples.append(time.perf_counter() - start)
+            editor.hide_completions()
+        results[f"{count}_items"] = summarize(samples)
+    close_current_tab(app, window)
+    return results
+
+
+def bench_diagnostics(app, module, window, workdir, scale):
+    window.create_new_tab()
+    editor = window.current_editor_tab().editor
+    if not hasattr(editor, "display_error"):
+        close_current_tab(app, window)
+        return None
+    lines = 20000 * scale
+    editor.setText(python_source(lines))
+    results = {}
+    for count in (1000, 10000):
+        diagnostics = [{
+            "range": {"start": {"line": (i * 7) % lines, "character": 8},
+                      "end": {"line": (i * 7) % lines, "character": 14}},
+            "severity": 1,
+            "message": f"diagnostic {i}",
+        } for i in range(count)]
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            editor.display_error(diagnostics)
+            app.processEvents()
+            samples.append(time.perf_counter() - start)
+        results[f"{count}_diagnostics"] = summarize(samples)
+    close_current_tab(app, window)
+    return results
+
+
+def bench_replace_all(app, module, window, workdir, scale):
+    window.create_new_tab()
+    editor = window.current_editor_tab().editor
+    lines = 5000 * scale
+    text = "".join(f"value_{i} = foo(value_{i - 1})\n" for i in range(lines))
+    samples = []
+    for _ in range(2):
+        editor.setText(text)
+        dialog = module.FindReplaceDialog(editor, window, replace_mode=True)
+        dialog.find_input.setText("foo")
+        dialog.replace_input.setText("bar")
+        # replace_all passes the case option as findFirst's wrap flag
+        dialog.case_checkbox.setChecked(True)
+        start = time.perf_counter()
+        dialog.replace_all()
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+        dialog.deleteLater()
+    replaced = editor.text().count("bar")
+    close_current_tab(app, window)
+    return {f"{lines}_lines": dict(summarize(samples), replaced=replaced)}
+
+
+def bench_lsp(app, module, window, workdir, scale):
+    if not hasattr(module, "LSP_SERVER_COMMANDS"):
+        return None
+    path = os.path.join(workdir, "bench_lsp.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(python_source(2000 * scale))
+    scenarios = {
+        "small_completions": ["--completions", "100"],
+        "large_completions": ["--completions", str(10000 * scale)],
+        "large_completions_split": ["--completions", str(10000 * scale), "--split", "64"],
+        "latency_50ms": ["--completions", "100", "--latency", "50"],
+    }
+    results = {}
+    try:
+        for scenario, server_args in scenarios.items():
+            module.LSP_SERVER_COMMANDS = {
+                ".py": [sys.executable, FAKE_LSP_SERVER, "--diagnostics", "1000", "--bursts", "5"] + server_args
+            }
+            opened = time.perf_counter()
+            editor = open_file(app, window, path)
+            events = {"diagnostics": [], "completions": 0}
+            display_error = editor.display_error
+            populate_completions = editor.populate_completions
+
+            def on_diagnostics(diagnostics):
+                display_error(diagnostics)
+                events["diagnostics"].append(time.perf_counter())
+
+            def on_completions(items):
+                populate_completions(items)
+                events["completions"] += 1
+
+            editor.display_error = on_diagnostics
+            editor.populate_completions = on_completions
+            if not wait_for(app, lambda: len(events["diagnostics"]) >= 5):
+                results[scenario] = {"error": "no diagnostics from fake server"}
+                close_current_tab(app, window)
+                continue
+            diagnostics_done = events["diagnostics"][-1] - opened
+
+            samples = []
+            for _ in range(10):
+                expected = events["completions"] + 1
+                editor.setCursorPosition(10, 0)
+                start = time.perf_counter()
+                editor.send_lsp_completion_request()
+                if not wait_for(app, lambda: events["completions"] >= expected):
+                    break
+                samples.append(time.perf_counter() - start)
+                editor.hide_completions()
+            results[scenario] = {
+                "open_to_diagnostics_ms": diagnostics_done * 1000,
+                "completion_round_trip": summarize(samples) if samples else None,
+            }
+            editor.lsp_client.stop()
+            close_current_tab(app, window)
+    finally:
+        module.LSP_SERVER_COMMANDS = {}
+    return results
+
+
+BENCHMARKS = [
+    ("keystroke", bench_keystroke),
+    ("open_file", bench_open_file),
+    ("completions", bench_completions),
+    ("diagnostics", bench_diagnostics),
+    ("replace_all", bench_replace_all),
+    ("lsp", bench_lsp),
+]
+
+
+def run_target(app, name, selected, scale):
+    with tempfile.TemporaryDirectory(prefix="eide-bench-") as workdir:
+        cwd = os.getcwd()
+        # The editors write their default config files into the working directory
+        os.chdir(workdir)
+        try:
+            with quiet():
+                module = load_target(name)
+                window = new_window(module)
+                drain(app)
+                results = {}
+                for bench_name, bench in BENCHMARKS:
+                    if selected and bench_name not in selected:
+                        continue
+                    results[bench_name] = bench(app, module, window, workdir, scale)
+                backend = getattr(module, "jedi_backend", None)
+                if backend is not None:
+                    backend.shutdown()
+                window.close()
+                window.deleteLater()
+                drain(app)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """Yield (metric path, p50 in ms) for every summary in a results tree."""
+    for key, value in (results or {}).items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict) and "p50_ms" in value:
+            yield path, value["p50_ms"]
+        elif isinstance(value, dict):
+            yield from flatten(value, path)
+
+
+def compare(current, baseline):
+    old = dict(flatten(baseline["results"]))
+    print(f"\n{'metric':<70} {'base p50':>10} {'new p50':>10} {'change':>8}")
+    for path, value in flatten(current["results"]):
+        if path not in old:
+            print(f"{path:<70} {'-':>10} {value:>10.2f} {'new':>8}")
+            continue
+        change = (value - old[path]) / old[path] * 100 if old[path] else 0.0
+        print(f"{path:<70} {old[path]:>10.2f} {value:>10.2f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--target", choices=["all"] + list(TARGETS), default="all")
+    parser.add_argument("--only", action="append", choices=[name for name, _ in BENCHMARKS],
+                        help="run only this benchmark (repeatable)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply file and list sizes")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    targets = list(TARGETS) if args.target == "all" else [args.target]
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "scale": args.scale,
+        },
+        "results": {name: run_target(app, name, args.only, args.scale) for name in targets},
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
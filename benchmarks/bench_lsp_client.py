@@ -0,0 +1,141 @@
+"""Benchmarks for eide's LSP transport on its own, without an editor or Qt loop.
+
+Drives AsyncLspClient from eide+lspv2.py against benchmarks/fake_lsp_server.py
+so framing, dispatch and future bookkeeping can be measured in isolation:
+
+  sequential     completion round trips one at a time
+  concurrent     batches of completion requests kept in flight together
+  large_reply    one 20k-item completion reply cut into many writes
+  diagnostics    publishDiagnostics bursts after didOpen
+
+  python benchmarks/bench_lsp_client.py --output before.json
+  python benchmarks/bench_lsp_client.py --output after.json --compare before.json
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+
+from bench_editors import FAKE_LSP_SERVER, load_target, summarize, git_revision, compare
+
+DOCUMENT = {"uri": "file:///bench.py", "languageId": "py", "version": 1, "text": "x = 1\n" * 2000}
+COMPLETION = {"textDocument": {"uri": DOCUMENT["uri"]}, "position": {"line": 0, "character": 1}}
+
+
+def server(*args):
+    return [sys.executable, FAKE_LSP_SERVER] + [str(arg) for arg in args]
+
+
+async def bench_sequential(module, scale):
+    async with module.AsyncLspClient(server("--completions", 100)) as client:
+        await client.initialize()
+        samples = []
+        for _ in range(200 * scale):
+            start = time.perf_counter()
+            await client.request("textDocument/completion", COMPLETION)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_concurrent(module, scale):
+    results = {}
+    async with module.AsyncLspClient(server("--completions", 20)) as client:
+        await client.initialize()
+        for in_flight in (10, 100):
+            samples = []
+            start = time.perf_counter()
+            for _ in range(10 * scale):
+                batch = time.perf_counter()
+                await asyncio.gather(*[client.request("textDocument/completion", COMPLETION)
+                                       for _ in range(in_flight)])
+                samples.append(time.perf_counter() - batch)
+            elapsed = time.perf_counter() - start
+            results[f"in_flight_{in_flight}"] = dict(
+                summarize(samples), requests_per_s=in_flight * len(samples) / elapsed)
+    return results
+
+
+async def bench_large_reply(module, scale):
+    async with module.AsyncLspClient(server("--completions", 20000 * scale, "--split", 64)) as client:
+        await client.initialize()
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            await client.request("textDocument/completion", COMPLETION)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_diagnostics(module, scale):
+    bursts = 10
+    async with module.AsyncLspClient(server("--diagnostics", 1000 * scale, "--bursts", bursts)) as client:
+        await client.initialize()
+        received = []
+        done = asyncio.Event()
+
+        def on_notification(method, params):
+            if method == "textDocument/publishDiagnostics":
+                received.append(time.perf_counter())
+                if len(received) == bursts:
+                    done.set()
+
+        client.on_notification = on_notification
+        start = time.perf_counter()
+        client.notify("textDocument/didOpen", {"textDocument": DOCUMENT})
+        await asyncio.wait_for(done.wait(), 60)
+    return {"open_to_last_burst_ms": (received[-1] - start) * 1000,
+            "bursts": summarize([b - a for a, b in zip([start] + received, received)])}
+
+
+BENCHMARKS = [
+    ("sequential", bench_sequential),
+    ("concurrent", bench_concurrent),
+    ("large_reply", bench_large_reply),
+    ("diagnostics", bench_diagnostics),
+]
+
+
+async def run(module, selected, scale):
+    results = {}
+    for name, bench in BENCHMARKS:
+        if not selected or name in selected:
+            results[name] = await bench(module, scale)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--only", action="append", choices=[name for name, _ in BENCHMARKS],
+                        help="run only this benchmark (repeatable)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply request counts and reply sizes")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    module = load_target("eide+lspv2")
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+        },
+        "results": {"lsp_client": asyncio.run(run(module, args.only, args.scale))},
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Headless checks for eide+lspv2.py's Quick Open ranking (WorkspaceIndex.match).
+
+Builds an index over synthetic workspace paths and checks that match()
+returns exactly the top results of an exhaustive ranking of every path,
+both for fresh queries and while a query is typed one char at a time:
+
+  python benchmarks/check_quick_open.py
+  python benchmarks/check_quick_open.py --paths 20000
+
+Exits non-zero and names the failing case if any check fails.
+"""
+import os
+import sys
+import time
+import heapq
+import random
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from bench_editors import load_target
+
+QUERIES = ["widget", "w", "parser_1", "parser_199", "src/par", "ui2/wid", "h", "zzz"]
+
+
+def synthetic_index(module, count, seed=0):
+    """A WorkspaceIndex holding `count` files spread over a few dozen directories."""
+    rng = random.Random(seed)
+    stems = ["widget", "parser", "lexer", "render", "window", "buffer", "io", "util"]
+    dirs = {"": ([], [])}
+    for top in ["src", "ui", "io", "lib", "tests"]:
+        for n in range(4):
+            dirs[f"{top}{n}"] = ([], [])
+    names = list(dirs)[1:]
+    for i in range(count):
+        name = f"{rng.choice(stems)}_{i}.{rng.choice('chp')}"
+        dirs[rng.choice(names)][0].append(name)
+    index = module.WorkspaceIndex()
+    index._dirs = dirs
+    index.paths, index.lower, index.path_bits, index.nbytes = index._build_snapshot()
+    return index
+
+
+def exhaustive(index, query, limit):
+    """Rank every path with match()'s own scoring, with no prefilter or narrowing."""
+    query = query.lower()
+    search = index._pattern_for(query).match
+    index._last_match = ("", None)
+    everything = [i for i, path in enumerate(index.lower) if search(path)]
+    index._last_match = (query, everything)
+    # A query extending itself re-ranks the given set, which is now every match
+    ranked = index.match(query, limit=len(everything) or 1)
+    index._last_match = ("", None)
+    return ranked[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--paths", type=int, default=200000, help="number of synthetic paths")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    module = load_target("eide+lspv2")
+    index = synthetic_index(module, args.paths)
+    failures = 0
+
+    for query in QUERIES:
+        expected = exhaustive(index, query, 50)
+        index._last_match = ("", None)
+        start = time.perf_counter()
+        got = index.match(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        ok = got == expected
+        failures += not ok
+        detail = f"top {got[:1]}" if ok else f"got {got[:3]}, expected {expected[:3]}"
+        print(f"{'ok  ' if ok else 'FAIL'} {query!r} over {len(index.paths)} paths in {elapsed:.1f} ms: {detail}")
+
+    for query in ["parser_199", "ui2/widget"]:
+        index._last_match = ("", None)
+        typed = [index.match(query[:n]) for n in range(1, len(query) + 1)]
+        ok = all(got == exhaustive(index, query[:n + 1], 50) for n, got in enumerate(typed))
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} typing {query!r} agrees with fresh queries")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Headless checks for eide+lspv2.py's run-way step graph (StepGraphRun).
+
+Runs real jobs under Qt's offscreen platform and checks that every graph
+reaches `finished`, including when build-cache hits complete steps that
+are listed after the steps depending on them:
+
+  python benchmarks/check_run_ways.py
+
+Exits non-zero and names the failing case if any check fails.
+"""
+import os
+import sys
+import time
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from bench_editors import load_target
+
+PASS = f'"{sys.executable}" -c "pass"'
+FAIL = f'"{sys.executable}" -c "raise SystemExit(1)"'
+
+
+def run_graph(app, module, steps, workdir, timeout=30.0):
+    """Run a StepGraphRun to completion; returns its final step states, or None if it never finished."""
+    cache = module.BuildCache(os.path.join(workdir, "cache"), 64 * 1024 * 1024)
+    source = os.path.join(workdir, "main.c")
+    for step in steps:
+        # Seed the cache for build steps marked "cached"
+        if step.pop("seed_cache", False):
+            artifact = os.path.join(workdir, "seed.bin")
+            with open(artifact, "w") as f:
+                f.write("artifact")
+            cache.store(cache.key(step["build"], source), artifact)
+    run = module.StepGraphRun("check", steps, source, module.JobManager(), cache)
+    reports = []
+    run.finished.connect(reports.append)
+    run.start()
+    deadline = time.monotonic() + timeout
+    while not reports and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    if not reports:
+        return None
+    return dict(run.state)
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    module = load_target("eide+lspv2")
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "main.c"), "w") as f:
+            f.write("int main(void) { return 0; }\n")
+        output = os.path.join(workdir, "a.out")
+        cases = [
+            ("dependent listed before its cached dependency",
+             [{"name": "link", "command": PASS, "needs": ["a"]},
+              {"name": "a", "build": "cc -c main.c", "output": output, "seed_cache": True}],
+             {"link": "done", "a": "cached"}),
+            ("every step cached",
+             [{"name": "b", "build": "cc -c b.c", "output": output + ".b", "needs": ["a"], "seed_cache": True},
+              {"name": "a", "build": "cc -c a.c", "output": output + ".a", "seed_cache": True}],
+             {"b": "cached", "a": "cached"}),
+            ("failed dependency skips dependents",
+             [{"name": "link", "command": PASS, "needs": ["a"]},
+              {"name": "a", "command": FAIL}],
+             {"link": "skipped", "a": "failed"}),
+        ]
+        for name, steps, expected in cases:
+            state = run_graph(app, module, steps, workdir)
+            ok = state is not None and all(state[step] == value for step, value in expected.items())
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {state if state is not None else 'never finished'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
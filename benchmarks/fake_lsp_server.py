@@ -0,0 +1,284 @@
+"""A scriptable stand-in language server for load-testing eide's LSP client.
+
+Speaks JSON-RPC over stdio like a real server, but what it sends back is set
+on the command line, so the client's framing, completion and diagnostics
+paths can be exercised deterministically without installing any servers:
+
+  python benchmarks/fake_lsp_server.py --completions 20000 --latency 50
+  python benchmarks/fake_lsp_server.py --diagnostics 5000 --bursts 10 --split 7
+
+Point eide at it by mapping an extension to it in LSP_SERVER_COMMANDS, e.g.
+  '.py': [sys.executable, 'benchmarks/fake_lsp_server.py', '--completions', '5000']
+
+Handled requests: initialize, shutdown, textDocument/completion,
+completionItem/resolve and (with --pull-diagnostics) textDocument/diagnostic;
+anything else gets MethodNotFound. didOpen and didChange trigger diagnostic
+bursts, exit ends the process, and $/cancelRequest cancels replies that are
+still waiting out their latency. Like real servers, completion items leave
+out the properties the client said it can resolve lazily, and documents are
+kept in sync incrementally with --sync incremental.
+Nothing is written to stderr, so runs stay quiet with lsp debug logging on.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+
+METHOD_NOT_FOUND = -32601
+REQUEST_CANCELLED = -32800
+
+
+class FakeServer:
+    def __init__(self, options):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.write_lock = threading.Lock()
+        self.cancelled = set()
+        self.texts = {}
+        self.lazy_properties = set()
+        self.log = open(options.log, "a", encoding="utf-8") if options.log else None
+        self.running = True
+
+    # --- wire -------------------------------------------------------------
+
+    def read_message(self, stream):
+        length = None
+        while True:
+            line = stream.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                if length is not None:
+                    break
+                continue
+            name, _, value = line.decode("ascii", errors="replace").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        body = stream.read(length)
+        if len(body) < length:
+            return None
+        return json.loads(body.decode("utf-8"))
+
+    def encode(self, message):
+        body = json.dumps(message).encode("utf-8")
+        return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+    def write(self, messages):
+        """Write messages in one go, or in random chunks when --split is set."""
+        data = b"".join(self.encode(m) for m in messages)
+        out = sys.stdout.buffer
+        with self.write_lock:
+            if self.options.split <= 1:
+                out.write(data)
+                out.flush()
+                return
+            # Cut anywhere, including inside headers and multi-byte characters
+            cuts = sorted(self.random.sample(range(1, len(data)), min(self.options.split - 1, len(data) - 1)))
+            start = 0
+            for end in cuts + [len(data)]:
+                out.write(data[start:end])
+                out.flush()
+                start = end
+                if self.options.split_delay:
+                    time.sleep(self.options.split_delay / 1000.0)
+
+    def record(self, direction, message):
+        if self.log:
+            self.log.write(json.dumps({"t": time.time(), "dir": direction, "method": message.get("method"),
+                                       "id": message.get("id")}) + "\n")
+            self.log.flush()
+
+    # --- replies ------------------------------------------------------------
+
+    def delay(self, method):
+        latency = self.options.latency
+        if method == "textDocument/completion" and self.options.completion_latency is not None:
+            latency = self.options.completion_latency
+        if self.options.jitter:
+            latency += self.random.uniform(0, self.options.jitter)
+        return latency / 1000.0
+
+    def reply(self, request, result=None, error=None):
+        def send():
+            if request["id"] in self.cancelled:
+                self.cancelled.discard(request["id"])
+                message = {"jsonrpc": "2.0", "id": request["id"],
+                           "error": {"code": REQUEST_CANCELLED, "message": "Request cancelled"}}
+            elif error is not None:
+                message = {"jsonrpc": "2.0", "id": request["id"], "error": error}
+            else:
+                message = {"jsonrpc": "2.0", "id": request["id"], "result": result}
+            self.record("out", message)
+            self.write([message])
+
+        delay = self.delay(request.get("method"))
+        if delay > 0:
+            timer = threading.Timer(delay, send)
+            timer.daemon = True
+            timer.start()
+        else:
+            send()
+
+    def completion_items(self, prefix="item"):
+        detail = "x" * self.options.item_size
+        items = [{
+            "label": f"{prefix}_{i}",
+            "kind": 1 + i % 25,
+            "detail": detail,
+            "sortText": f"{i:08d}",
+            "data": {"index": i},
+        } for i in range(self.options.completions)]
+        if "detail" in self.lazy_properties:
+            for item in items:
+                del item["detail"]
+        return items
+
+    def apply_change(self, uri, change):
+        """Apply one contentChanges entry; positions are UTF-16 like the protocol's default."""
+        if "range" not in change:
+            self.texts[uri] = change["text"]
+            return
+        text = self.texts.get(uri, "")
+        lines = text.split("\n")
+
+        def offset(position):
+            line = position["line"]
+            if line >= len(lines):
+                return len(text)
+            start = sum(len(l) + 1 for l in lines[:line])
+            units = position["character"]
+            column = 0
+            for ch in lines[line]:
+                if units <= 0:
+                    break
+                units -= 2 if ord(ch) > 0xFFFF else 1
+                column += 1
+            return start + column
+
+        start, end = offset(change["range"]["start"]), offset(change["range"]["end"])
+        self.texts[uri] = text[:start] + change["text"] + text[end:]
+
+    def diagnostic_items(self, uri, burst=0):
+        lines = self.texts.get(uri, "").count("\n") + 1
+        message = "m" * self.options.message_size
+        items = []
+        for i in range(self.options.diagnostics):
+            line = self.random.randrange(lines)
+            items.append({
+                "range": {"start": {"line": line, "character": 0},
+                          "end": {"line": line, "character": 4}},
+                "severity": 1 + i % 4,
+                "source": "fake-lsp",
+                "message": f"{message} {burst}:{i}",
+            })
+        return items
+
+    def diagnostics(self, uri, version):
+        if self.options.pull_diagnostics:
+            return
+        bursts = []
+        for burst in range(self.options.bursts):
+            bursts.append({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics",
+                           "params": {"uri": uri, "version": version,
+                                      "diagnostics": self.diagnostic_items(uri, burst)}})
+        if not bursts:
+            return
+        if self.options.burst_interval:
+            for message in bursts:
+                self.write([message])
+                time.sleep(self.options.burst_interval / 1000.0)
+        else:
+            # Several messages in one write, the way a busy server flushes them
+            self.write(bursts)
+
+    # --- dispatch -------------------------------------------------------------
+
+    def handle(self, message):
+        self.record("in", message)
+        method = message.get("method")
+        params = message.get("params") or {}
+        if "id" not in message:
+            if method == "exit":
+                self.running = False
+            elif method == "$/cancelRequest":
+                self.cancelled.add(params.get("id"))
+            elif method == "textDocument/didOpen":
+                document = params["textDocument"]
+                self.texts[document["uri"]] = document.get("text", "")
+                self.diagnostics(document["uri"], document.get("version"))
+            elif method == "textDocument/didChange":
+                document = params["textDocument"]
+                for change in params.get("contentChanges") or []:
+                    self.apply_change(document["uri"], change)
+                if self.options.diagnostics_on_change:
+                    self.diagnostics(document["uri"], document.get("version"))
+            return
+
+        if method == "initialize":
+            completion = params.get("capabilities", {}).get("textDocument", {}).get("completion", {})
+            self.lazy_properties = set(completion.get("completionItem", {}).get("resolveSupport", {})
+                                       .get("properties", []))
+            capabilities = {
+                "textDocumentSync": 2 if self.options.sync == "incremental" else 1,
+                "completionProvider": {"resolveProvider": True, "triggerCharacters": ["."]},
+            }
+            if self.options.pull_diagnostics:
+                capabilities["diagnosticProvider"] = {"interFileDependencies": False,
+                                                      "workspaceDiagnostics": False}
+            self.reply(message, {
+                "capabilities": capabilities,
+                "serverInfo": {"name": "fake-lsp", "version": "1"},
+            })
+        elif method == "shutdown":
+            self.reply(message, None)
+        elif method == "textDocument/completion":
+            self.reply(message, {"isIncomplete": False, "items": self.completion_items()})
+        elif method == "completionItem/resolve":
+            item = dict(params)
+            item["detail"] = "x" * self.options.item_size
+            item["documentation"] = {"kind": "markdown", "value": "d" * self.options.item_size * 4}
+            self.reply(message, item)
+        elif method == "textDocument/diagnostic" and self.options.pull_diagnostics:
+            uri = params["textDocument"]["uri"]
+            self.reply(message, {"kind": "full", "resultId": str(len(self.texts.get(uri, ""))),
+                                 "items": self.diagnostic_items(uri)})
+        else:
+            self.reply(message, error={"code": METHOD_NOT_FOUND, "message": f"Unhandled method {method}"})
+
+    def serve(self):
+        stream = sys.stdin.buffer
+        while self.running:
+            message = self.read_message(stream)
+            if message is None:
+                break
+            self.handle(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake stdio language server for load tests")
+    parser.add_argument("--completions", type=int, default=100, help="items per completion reply")
+    parser.add_argument("--item-size", type=int, default=16, help="bytes of detail text per completion item")
+    parser.add_argument("--diagnostics", type=int, default=0, help="diagnostics per publishDiagnostics message")
+    parser.add_argument("--bursts", type=int, default=1, help="publishDiagnostics messages sent per document event")
+    parser.add_argument("--burst-interval", type=float, default=0, help="ms between burst messages (0 = one write)")
+    parser.add_argument("--message-size", type=int, default=24, help="bytes per diagnostic message")
+    parser.add_argument("--diagnostics-on-change", action="store_true", help="also publish on didChange")
+    parser.add_argument("--pull-diagnostics", action="store_true",
+                        help="offer textDocument/diagnostic instead of publishing")
+    parser.add_argument("--sync", choices=["full", "incremental"], default="full",
+                        help="textDocumentSync kind to ask the client for")
+    parser.add_argument("--latency", type=float, default=0, help="ms before replying to any request")
+    parser.add_argument("--completion-latency", type=float, default=None, help="ms before completion replies")
+    parser.add_argument("--jitter", type=float, default=0, help="extra random ms added to each latency")
+    parser.add_argument("--split", type=int, default=1, help="cut each write into this many pieces")
+    parser.add_argument("--split-delay", type=float, default=0, help="ms to wait between pieces")
+    parser.add_argument("--seed", type=int, default=0, help="seed for cuts, jitter and diagnostic lines")
+    parser.add_argument("--log", help="append a line per message received/sent to this file")
+    FakeServer(parser.parse_args()).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,46 @@ import os
 import sys
 import json
 import copy  # Added for deep copying
+import re
+import heapq
+import itertools
+import tempfile
+import codecs
+import struct
+import signal
+import atexit
+import subprocess
+import shutil
+import time
+import hashlib
+import statistics
+import collections
+import threading
+import traceback
+import cProfile
+import pstats
+import logging
+import logging.handlers
+import asyncio
 import concurrent.futures
+import contextlib
+import functools
+import argparse
+import urllib.parse
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QFileDialog, QTabWidget, QDialog,
     QDialogButtonBox, QFormLayout, QLineEdit, QHBoxLayout, QPushButton,
     QListWidget, QMessageBox, QDockWidget, QTreeView, QInputDialog, QWidget,
     QMenuBar, QVBoxLayout, QAbstractItemView, QComboBox, QLabel, QTabBar,
     QSpacerItem, QSizePolicy, QPlainTextEdit, QCheckBox, QTextEdit, QSplitter,
-    QListWidgetItem, QToolTip
+    QListWidgetItem, QToolTip, QTableWidget, QTableWidgetItem, QStackedWidget,
+    QHeaderView, QSpinBox, QDoubleSpinBox
+)
+from PyQt5.QtGui import QFont, QIcon, QTextCursor, QTextCharFormat, QColor, QDesktopServices
+from PyQt5.QtCore import (
+    Qt, QDir, QModelIndex, QProcess, pyqtSignal, QPoint, QEvent, QObject,
+    QTimer, QFileSystemWatcher, QSocketNotifier, QProcessEnvironment, QUrl
 )
-from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import Qt, QDir, QModelIndex, QProcess, pyqtSignal, QPoint, QEvent
 from PyQt5.Qsci import (
     QsciScintillaBase,
     QsciScintilla,
@@ -34,6 +63,26 @@ from PyQt5.Qsci import (
 )
 from PyQt5.QtWidgets import QFileSystemModel
 
+try:
+    import termios
+    import fcntl
+except ImportError:  # Windows: no pseudo-terminals
+    termios = None
+    fcntl = None
+
+# The terminal dock runs typed commands in a persistent PTY shell where supported
+SHELL_SESSION_SUPPORTED = sys.platform.startswith('linux') and termios is not None
+# Runs in the new session (setsid happens in Popen) to make the PTY its
+# controlling terminal, so job control and ^C work, then becomes the shell.
+# Doing this in preexec_fn is unsafe once the LSP and watchdog threads exist.
+SHELL_CTTY_LAUNCHER = r'''
+import fcntl, os, sys, termios
+fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+os.execvp(sys.argv[1], sys.argv[1:])
+'''
+# Seconds a closing shell gets after each of EOF and SIGHUP before it is killed
+SHELL_EXIT_GRACE = 1.0
+
 # LSP server commands by file extension
 owner_dbg_temp = True
 if owner_dbg_temp: # turn this off if ur an end user / not a dev!!!
@@ -55,6 +104,31 @@ else:
 
 CONFIG_FILE = "run_ways.json"
 KEYBINDINGS_FILE = "keybindings.json"
+SETTINGS_FILE = "settings.json"
+
+# Per-subsystem loggers, quiet below WARNING unless enabled through the
+# "log_levels" setting or EIDE_LOG (e.g. EIDE_LOG=lsp.wire=debug,completion=debug)
+log = logging.getLogger("eide")
+lsp_log = logging.getLogger("eide.lsp")
+wire_log = logging.getLogger("eide.lsp.wire")
+completion_log = logging.getLogger("eide.completion")
+run_log = logging.getLogger("eide.run")
+
+DEFAULT_SETTINGS = {
+    "terminal_scrollback_lines": 10000,
+    "terminal_flush_interval_ms": 50,
+    "terminal_spill_to_file": False,
+    "build_cache_dir": ".eide/build-cache",
+    "build_cache_max_mb": 512,
+    "run_history_file": ".eide/run-history.json",
+    "run_history_per_file": 50,
+    "benchmark_baseline_file": ".eide/benchmarks.json",
+    "run_way_limits": {},
+    "python_kernel_interpreter": "",
+    "log_levels": {},
+    "lsp_wire_log_file": ".eide/lsp-wire.log",
+    "lsp_wire_log_max_mb": 5
+}
 
 DEFAULT_KEYBINDINGS = {
     "New": "Ctrl+N",
@@ -66,11 +140,206 @@ DEFAULT_KEYBINDINGS = {
     "Go to Line": "Ctrl+G",
     "Find": "Ctrl+F",
     "Replace": "Ctrl+H",
-    "Edit Keybinds": None
+    "Edit Keybinds": None,
+    "Quick Open": "Ctrl+P",
+    "Benchmark": "Ctrl+F5",
+    "Run in Python Kernel": "Shift+F5",
+    "Run Cell in Python Kernel": "Ctrl+Return",
+    "Restart Python Kernel": None
+}
+
+# Directories and build outputs the quick-open index and --check never descend into or list
+INDEX_IGNORED_DIRS = {
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox',
+    'build', 'dist', 'out', 'target', '.eide'
+}
+INDEX_IGNORED_SUFFIXES = ('.exe', '.o', '.obj', '.pyc', '.pyo', '.so', '.dll', '.class')
+# Upper bound on watched directories so huge trees don't exhaust inotify watches
+INDEX_MAX_WATCHED_DIRS = 4096
+NONZERO_BYTE_RE = re.compile(b'[^\\x00]')
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+try:
+    # Possessive quantifiers (Python 3.11+) skip pointless backtracking in fuzzy matching
+    re.compile('a*+')
+    POSSESSIVE = '+'
+except re.error:
+    POSSESSIVE = ''
+
+# Local headers pulled into a build step's cache key
+LOCAL_INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.MULTILINE)
+
+# Escape sequences in program output: CSI (incl. SGR), OSC and two-byte escapes
+ANSI_ESCAPE_RE = re.compile(r'\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\^_])')
+ANSI_COLORS = [
+    '#000000', '#cd3131', '#0dbc79', '#e5e510', '#2472c8', '#bc3fbc', '#11a8cd', '#e5e5e5',
+    '#666666', '#f14c4c', '#23d18b', '#f5f543', '#3b8eea', '#d670d6', '#29b8db', '#ffffff'
+]
+
+# Spans kept for Export Trace (oldest dropped first)
+TRACE_BUFFER_EVENTS = 200000
+
+# Replies per LSP method kept for latency percentiles, and histogram buckets (seconds)
+LSP_METRICS_SAMPLES = 2048
+LSP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+# Seconds before an unanswered LSP request fails with LspRequestTimeout
+LSP_DEFAULT_TIMEOUT = 10.0
+LSP_REQUEST_TIMEOUTS = {
+    "initialize": 60.0,
+    "shutdown": 5.0,
+    "textDocument/completion": 5.0,
+    "completionItem/resolve": 3.0,
+    "textDocument/diagnostic": 10.0,
+}
+# What the editor actually handles; documentation and detail are fetched with
+# completionItem/resolve for the highlighted item only, so servers may leave
+# them out of completion lists
+LSP_CLIENT_CAPABILITIES = {
+    "general": {"positionEncodings": ["utf-16"]},
+    "textDocument": {
+        "synchronization": {"dynamicRegistration": False, "willSave": False,
+                            "willSaveWaitUntil": False, "didSave": False},
+        "completion": {
+            "dynamicRegistration": False,
+            "contextSupport": False,
+            "completionItem": {
+                "snippetSupport": True,
+                "labelDetailsSupport": True,
+                "deprecatedSupport": True,
+                "insertReplaceSupport": False,
+                "documentationFormat": ["plaintext", "markdown"],
+                "resolveSupport": {"properties": ["documentation", "detail"]},
+            },
+        },
+        "publishDiagnostics": {"relatedInformation": False, "versionSupport": True},
+        "diagnostic": {"dynamicRegistration": False, "relatedDocumentSupport": False},
+    },
+    "workspace": {"configuration": True},
+    "window": {"workDoneProgress": True},
+}
+# Names for LSP diagnostic severities, and languageId values sent by --check
+DIAGNOSTIC_SEVERITIES = {1: "error", 2: "warning", 3: "information", 4: "hint"}
+LSP_LANGUAGE_IDS = {
+    '.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.cpp': 'cpp', '.hpp': 'cpp',
+    '.c': 'c', '.h': 'c', '.html': 'html', '.htm': 'html', '.css': 'css', '.json': 'json',
+}
+
+# Run stats (wall/CPU time, peak RSS) come from wait4 in a small launcher process
+RUN_STATS_SUPPORTED = os.name == 'posix'
+RUN_LAUNCHER = r'''
+import json, os, signal, sys, time
+stats_path, argv = sys.argv[1], sys.argv[2:]
+affinity = os.environ.pop("EIDE_CPU_AFFINITY", "")
+limits = json.loads(os.environ.pop("EIDE_RLIMITS", "") or "{}")
+try:
+    os.setsid()
+except OSError:
+    pass
+start = time.monotonic()
+pid = os.fork()
+if pid == 0:
+    try:
+        if affinity and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {int(cpu) for cpu in affinity.split(",")})
+        if limits:
+            import resource
+            for name, value in limits.items():
+                which = getattr(resource, name)
+                hard = resource.getrlimit(which)[1]
+                # One extra CPU second so SIGXCPU arrives before the hard limit's SIGKILL
+                soft, new_hard = value, value + 1 if name == "RLIMIT_CPU" else value
+                if hard != resource.RLIM_INFINITY:
+                    soft, new_hard = min(soft, hard), min(new_hard, hard)
+                resource.setrlimit(which, (soft, new_hard))
+        os.execvp(argv[0], argv)
+    except OSError as e:
+        os.write(2, f"{argv[0]}: {e}\n".encode())
+    os._exit(127)
+while True:
+    try:
+        _, status, usage = os.wait4(pid, 0)
+        break
+    except InterruptedError:
+        continue
+rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+stats = {"wall": time.monotonic() - start, "user": usage.ru_utime, "sys": usage.ru_stime, "max_rss_kb": rss}
+if os.WIFSIGNALED(status):
+    stats["signal"] = os.WTERMSIG(status)
+with open(stats_path, "w") as f:
+    json.dump(stats, f)
+sys.stdout.flush()
+if os.WIFSIGNALED(status):
+    try:
+        signal.signal(os.WTERMSIG(status), signal.SIG_DFL)
+    except (OSError, ValueError):
+        pass
+    os.kill(os.getpid(), os.WTERMSIG(status))
+sys.exit(os.WEXITSTATUS(status))
+'''
+
+# Warm Python worker used by "Run in Python Kernel". Requests arrive as JSON
+# lines on a private copy of stdin; user code sees an empty stdin. Status
+# messages travel in-band on stdout as a private OSC sequence, which the
+# terminal's ANSI parser would drop anyway.
+KERNEL_MESSAGE_START = b'\x1b]7777;'
+KERNEL_MESSAGE_END = b'\x07'
+PYTHON_KERNEL = r'''
+import json, linecache, os, sys, time, traceback
+requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+control = os.fdopen(os.dup(1), "w", encoding="utf-8")
+devnull = open(os.devnull, "r")
+os.dup2(devnull.fileno(), 0)
+sys.stdin = devnull
+namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+
+def send(message):
+    sys.stdout.flush()
+    sys.stderr.flush()
+    control.write("\x1b]7777;" + json.dumps(message) + "\x07")
+    control.flush()
+
+send({"ready": os.getpid(), "python": sys.version.split()[0]})
+while True:
+    try:
+        line = requests.readline()
+        if not line:
+            break
+        request = json.loads(line)
+    except KeyboardInterrupt:
+        continue
+    filename = request["filename"]
+    lines = request["source"].splitlines(True)
+    linecache.cache[filename] = (len(request["source"]), None, lines, filename)
+    code = "\n" * request.get("first_line", 0) + "".join(lines[request.get("first_line", 0):request.get("last_line", len(lines))])
+    namespace["__file__"] = filename
+    sys.argv = [filename]
+    directory = os.path.dirname(os.path.abspath(filename))
+    if sys.path[0] != directory:
+        sys.path.insert(0, directory)
+    start = time.perf_counter()
+    ok = True
+    try:
+        exec(compile(code, filename, "exec"), namespace)
+    except SystemExit as e:
+        ok = e.code in (None, 0)
+    except BaseException:
+        ok = False
+        kind, value, tb = sys.exc_info()
+        traceback.print_exception(kind, value, tb.tb_next)
+    send({"done": request["id"], "ok": ok, "elapsed": time.perf_counter() - start})
+'''
+
+# Per-run-way limits (see RunLimitsDialog) and the rlimit each one maps to
+RUN_LIMIT_RESOURCES = {
+    "cpu_seconds": "RLIMIT_CPU",
+    "memory_mb": "RLIMIT_AS",
+    "open_files": "RLIMIT_NOFILE",
+    "processes": "RLIMIT_NPROC"
 }
 
 # Create a custom event type
 COMPLETIONS_EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
+INDEX_EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
 
 
 def load_run_ways():
@@ -89,7 +358,11 @@ def save_run_ways(data):
 def load_keybindings():
     if os.path.exists(KEYBINDINGS_FILE):
         with open(KEYBINDINGS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            bindings = json.load(f)
+        # Actions added after the file was written keep their default shortcut
+        for name, shortcut in DEFAULT_KEYBINDINGS.items():
+            bindings.setdefault(name, shortcut)
+        return bindings
     else:
         # Save defaults if not exist
         save_keybindings(DEFAULT_KEYBINDINGS)
@@ -101,14 +374,174 @@ def save_keybindings(data):
         json.dump(data, f, indent=4)
 
 
+def load_settings():
+    if os.path.exists(SETTINGS_FILE):
+        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        for name, value in DEFAULT_SETTINGS.items():
+            settings.setdefault(name, value)
+        return settings
+    else:
+        save_settings(DEFAULT_SETTINGS)
+        return DEFAULT_SETTINGS.copy()
+
+
+def save_settings(data):
+    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+
+def configure_logging(settings):
+    """Apply subsystem log levels and send the LSP wire trace to a rotating file.
+
+    Levels come from settings["log_levels"] ({"lsp": "info", ...}) with
+    EIDE_LOG ("lsp.wire=debug,run") taking precedence; a bare name means debug.
+    """
+    levels = dict(settings.get("log_levels") or {})
+    for part in os.environ.get("EIDE_LOG", "").split(","):
+        name, _, level = part.partition("=")
+        if name.strip():
+            levels[name.strip()] = level.strip() or "debug"
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s: %(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(logging.WARNING)
+    for name, level in levels.items():
+        logger = log if name == "eide" else logging.getLogger("eide." + name)
+        logger.setLevel(getattr(logging, str(level).upper(), logging.DEBUG))
+
+    if wire_log.isEnabledFor(logging.DEBUG) and not wire_log.handlers:
+        path = settings["lsp_wire_log_file"]
+        try:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=int(settings["lsp_wire_log_max_mb"] * 1024 * 1024), backupCount=3, encoding='utf-8')
+        except OSError as e:
+            log.warning("Could not open LSP wire log %s: %s", path, e)
+            return
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        wire_log.addHandler(handler)
+        wire_log.propagate = False
+
+
+def tail_lines(text, count):
+    """Return the last `count` lines of text (keeping a trailing partial line)."""
+    if count <= 0:
+        return text[text.rfind('\n') + 1:]
+    pos = len(text)
+    for _ in range(count):
+        pos = text.rfind('\n', 0, pos)
+        if pos == -1:
+            return text
+    return text[pos + 1:]
+
+
+class TraceRecorder:
+    """Ring buffer of timed spans, exported as Chrome trace_event JSON.
+
+    Recording appends one tuple to a bounded deque, so it stays on all the
+    time; events are only formatted on export. Each event remembers the
+    thread that recorded it (the GUI or the LSP event loop). The file opens
+    in Perfetto (ui.perfetto.dev) or chrome://tracing.
+    """
+
+    def __init__(self, capacity=TRACE_BUFFER_EVENTS):
+        self.events = collections.deque(maxlen=capacity)
+        self.open_spans = {}
+        self.origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name, category, args=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append(("X", name, category, start, time.perf_counter() - start, None, args,
+                                threading.get_ident()))
+
+    def complete(self, name, category, start, args=None):
+        """Record a span that started at `start` (a perf_counter value) and ends now."""
+        self.events.append(("X", name, category, start, time.perf_counter() - start, None, args,
+                            threading.get_ident()))
+
+    def begin(self, name, category, key, args=None):
+        """Start a span that may overlap others, e.g. an LSP request; end() closes it."""
+        self.open_spans[(category, key)] = name
+        self.events.append(("b", name, category, time.perf_counter(), None, key, args, threading.get_ident()))
+
+    def end(self, category, key, args=None):
+        name = self.open_spans.pop((category, key), None)
+        if name is not None:
+            self.events.append(("e", name, category, time.perf_counter(), None, key, args,
+                                threading.get_ident()))
+
+    def instant(self, name, category, args=None):
+        self.events.append(("i", name, category, time.perf_counter(), None, None, args, threading.get_ident()))
+
+    def export(self, path):
+        """Write the buffer to `path`; returns the number of events written."""
+        pid = os.getpid()
+        events = list(self.events)
+        # Small stable tids, the GUI thread first
+        main = threading.main_thread().ident
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        names[main] = "GUI"
+        tids = {main: 0}
+        for event in events:
+            tids.setdefault(event[-1], len(tids))
+        trace = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "eide"}}]
+        for ident, tid in tids.items():
+            trace.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                          "args": {"name": names.get(ident, f"thread {ident}")}})
+        metadata = len(trace)
+        for phase, name, category, start, duration, key, args, ident in events:
+            event = {"ph": phase, "name": name, "cat": category, "pid": pid, "tid": tids[ident],
+                     "ts": round((start - self.origin) * 1e6, 3)}
+            if duration is not None:
+                event["dur"] = round(duration * 1e6, 3)
+            if key is not None:
+                event["id"] = str(key)
+            if phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace.append(event)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(trace) - metadata
+
+
+tracer = TraceRecorder()
+
+
+def traced(category):
+    """Decorator recording each call of a method as a trace span."""
+    def decorate(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(name, category, start)
+        return wrapper
+    return decorate
+
+
 class RunWaysDialog(QDialog):
     """Dialog to manage run ways configuration."""
-    def __init__(self, ways, parent=None):
+    def __init__(self, ways, parent=None, limits=None):
         super().__init__(parent)
         self.setWindowTitle("Run Ways Configuration")
         self.setMinimumSize(600, 400)
         self.original_ways = ways
         self.ways = copy.deepcopy(ways)
+        self.limits = copy.deepcopy(limits or {})
 
         main_layout = QHBoxLayout(self)
 
@@ -142,9 +575,13 @@ class RunWaysDialog(QDialog):
         # Buttons
         cmd_btn_layout = QHBoxLayout()
         self.add_command_btn = QPushButton("Add Command")
+        self.add_build_btn = QPushButton("Add Build Step")
         self.remove_command_btn = QPushButton("Remove Command")
+        self.limits_btn = QPushButton("Limits...")
         cmd_btn_layout.addWidget(self.add_command_btn)
+        cmd_btn_layout.addWidget(self.add_build_btn)
         cmd_btn_layout.addWidget(self.remove_command_btn)
+        cmd_btn_layout.addWidget(self.limits_btn)
         right_layout.addLayout(cmd_btn_layout)
 
         # Spacer
@@ -159,7 +596,9 @@ class RunWaysDialog(QDialog):
         self.add_way_btn.clicked.connect(self.add_run_way)
         self.remove_way_btn.clicked.connect(self.remove_run_way)
         self.add_command_btn.clicked.connect(self.add_command)
+        self.add_build_btn.clicked.connect(self.add_build_step)
         self.remove_command_btn.clicked.connect(self.remove_command)
+        self.limits_btn.clicked.connect(self.edit_limits)
         buttons.accepted.connect(self.accept)
         buttons.rejected.connect(self.reject)
 
@@ -190,6 +629,7 @@ class RunWaysDialog(QDialog):
             )
             if reply == QMessageBox.Yes:
                 self.ways.pop(way_name, None)
+                self.limits.pop(way_name, None)
                 self.list_ways.takeItem(self.list_ways.row(current_item))
                 self.commands_list.clear()
         else:
@@ -203,7 +643,7 @@ class RunWaysDialog(QDialog):
         way_name = item.text()
         self.commands_list.clear()
         for cmd in self.ways.get(way_name, []):
-            self.commands_list.addItem(cmd)
+            self.commands_list.addItem(describe_step(cmd))
 
     def add_command(self):
         current_item = self.list_ways.currentItem()
@@ -220,6 +660,26 @@ class RunWaysDialog(QDialog):
             self.ways[way_name].append(cmd)
             self.commands_list.addItem(cmd)
 
+    def add_build_step(self):
+        current_item = self.list_ways.currentItem()
+        if current_item is None:
+            QMessageBox.information(self, "No Run Way Selected", "Please select a run way to add commands.")
+            return
+        way_name = current_item.text()
+        cmd, ok = QInputDialog.getText(self, "Add Build Step", "Enter the build command (use {{file}} for file):")
+        if not ok or not cmd.strip():
+            return
+        output, ok = QInputDialog.getText(
+            self, "Add Build Step",
+            "Enter the artifact the command produces (cached by source hash):",
+            text="{{file}}.exe"
+        )
+        if not ok or not output.strip():
+            return
+        step = {"build": cmd.strip(), "output": output.strip()}
+        self.ways[way_name].append(step)
+        self.commands_list.addItem(describe_step(step))
+
     def remove_command(self):
         current_item = self.list_ways.currentItem()
         if current_item is None:
@@ -230,10 +690,24 @@ class RunWaysDialog(QDialog):
             QMessageBox.information(self, "No Selection", "Please select a command to remove.")
             return
         way_name = current_item.text()
-        for item in selected_commands:
-            cmd = item.text()
-            self.ways[way_name].remove(cmd)
-            self.commands_list.takeItem(self.commands_list.row(item))
+        rows = sorted((self.commands_list.row(item) for item in selected_commands), reverse=True)
+        for row in rows:
+            del self.ways[way_name][row]
+            self.commands_list.takeItem(row)
+
+    def edit_limits(self):
+        current_item = self.list_ways.currentItem()
+        if current_item is None:
+            QMessageBox.information(self, "No Run Way Selected", "Please select a run way to limit.")
+            return
+        way_name = current_item.text()
+        dialog = RunLimitsDialog(way_name, self.limits.get(way_name, {}), self)
+        if dialog.exec_() == QDialog.Accepted:
+            limits = dialog.limits()
+            if limits:
+                self.limits[way_name] = limits
+            else:
+                self.limits.pop(way_name, None)
 
     def accept(self):
         save_run_ways(self.ways)
@@ -242,6 +716,42 @@ class RunWaysDialog(QDialog):
         super().accept()
 
 
+class RunLimitsDialog(QDialog):
+    """Resource limits for the commands of one run way; 0 means unlimited."""
+    FIELDS = [
+        ("cpu_seconds", "CPU time:", " s", 100000),
+        ("memory_mb", "Address space:", " MB", 1024 * 1024),
+        ("open_files", "Open files:", "", 1000000),
+        ("processes", "New processes:", "", 100000),
+        ("timeout_seconds", "Wall-clock timeout:", " s", 1000000)
+    ]
+
+    def __init__(self, way_name, limits, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Limits for {way_name}")
+        layout = QFormLayout(self)
+        layout.addRow(QLabel("Applied to command steps; build steps are not limited."))
+        self.spins = {}
+        for key, label, suffix, maximum in self.FIELDS:
+            spin = QSpinBox()
+            spin.setRange(0, maximum)
+            spin.setSuffix(suffix)
+            spin.setSpecialValueText("Unlimited")
+            spin.setValue(int(limits.get(key, 0)))
+            layout.addRow(label, spin)
+            self.spins[key] = spin
+        if not RUN_STATS_SUPPORTED:
+            for key in RUN_LIMIT_RESOURCES:
+                self.spins[key].setEnabled(False)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        layout.addRow(buttons)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+    def limits(self):
+        return {key: spin.value() for key, spin in self.spins.items() if spin.value()}
+
+
 class RunDialog(QDialog):
     """Dialog to select a run way for execution."""
     def __init__(self, ways, parent=None):
@@ -264,6 +774,95 @@ class RunDialog(QDialog):
         return self.combo.currentText()
 
 
+class BenchmarkDialog(QDialog):
+    """Options for benchmarking the final command of a run way."""
+    def __init__(self, ways, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Benchmark")
+        self.setMinimumSize(300, 150)
+        layout = QFormLayout(self)
+
+        self.combo = QComboBox()
+        self.combo.addItems(ways)
+        layout.addRow("Run way:", self.combo)
+        self.runs_spin = QSpinBox()
+        self.runs_spin.setRange(1, 10000)
+        self.runs_spin.setValue(10)
+        layout.addRow("Runs:", self.runs_spin)
+        self.warmup_spin = QSpinBox()
+        self.warmup_spin.setRange(0, 1000)
+        self.warmup_spin.setValue(2)
+        layout.addRow("Warmup runs:", self.warmup_spin)
+        self.cpu_combo = QComboBox()
+        self.cpu_combo.addItem("Any")
+        if hasattr(os, "sched_setaffinity"):
+            self.cpu_combo.addItems([str(cpu) for cpu in sorted(os.sched_getaffinity(0))])
+        layout.addRow("Pin to CPU:", self.cpu_combo)
+        self.baseline_check = QCheckBox("Save result as baseline")
+        layout.addRow(self.baseline_check)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        layout.addRow(buttons)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+    def selected_way(self):
+        return self.combo.currentText()
+
+    def selected_cpu(self):
+        if self.cpu_combo.currentIndex() == 0:
+            return None
+        return int(self.cpu_combo.currentText())
+
+
+class TestRunDialog(QDialog):
+    """Options for running a run way's final command against *.in/*.out test pairs."""
+    def __init__(self, ways, folder="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Run Tests")
+        self.setMinimumSize(450, 180)
+        layout = QFormLayout(self)
+
+        self.combo = QComboBox()
+        self.combo.addItems(ways)
+        layout.addRow("Run way:", self.combo)
+        folder_layout = QHBoxLayout()
+        self.folder_edit = QLineEdit(folder)
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.browse)
+        folder_layout.addWidget(self.folder_edit)
+        folder_layout.addWidget(browse_btn)
+        layout.addRow("Test folder:", folder_layout)
+        self.time_spin = QDoubleSpinBox()
+        self.time_spin.setRange(0.1, 3600)
+        self.time_spin.setValue(2.0)
+        self.time_spin.setSuffix(" s")
+        layout.addRow("Time limit:", self.time_spin)
+        self.memory_spin = QSpinBox()
+        self.memory_spin.setRange(0, 1024 * 1024)
+        self.memory_spin.setValue(256)
+        self.memory_spin.setSuffix(" MB")
+        self.memory_spin.setSpecialValueText("No limit")
+        layout.addRow("Memory limit:", self.memory_spin)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 256)
+        self.workers_spin.setValue(os.cpu_count() or 1)
+        layout.addRow("Parallel tests:", self.workers_spin)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        layout.addRow(buttons)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+    def browse(self):
+        folder = QFileDialog.getExistingDirectory(self, "Test Folder", self.folder_edit.text() or QDir.currentPath())
+        if folder:
+            self.folder_edit.setText(folder)
+
+    def selected_way(self):
+        return self.combo.currentText()
+
+
 class FindReplaceDialog(QDialog):
     """Dialog for finding and replacing text in the editor."""
     def __init__(self, editor, parent=None, replace_mode=False):
@@ -317,131 +916,3054 @@ class FindReplaceDialog(QDialog):
         elif text == self.last_search:
             found = self.editor.findNext()
         else:
-            wrap = True
-            case_sensitive = self.case_checkbox.isChecked()
-            use_regex = self.regex_checkbox.isChecked()
+            wrap = True
+            case_sensitive = self.case_checkbox.isChecked()
+            use_regex = self.regex_checkbox.isChecked()
+
+            found = self.editor.findFirst(
+                text,
+                use_regex,       # re
+                case_sensitive,  # cs
+                False,           # wo
+                wrap,            # wrap
+                True,            # forward
+                False,           # line
+                False            # column
+            )
+
+            self.last_search = text
+
+        if not found:
+            QMessageBox.information(self, "Not Found", "No more occurrences found.")
+
+    def replace(self):
+        if self.editor.hasSelectedText():
+            self.editor.replaceSelectedText(self.replace_input.text())
+        self.find_next()
+
+    def replace_all(self):
+        count = 0
+        pattern = self.find_input.text()
+        replace_text = self.replace_input.text()
+        case = self.case_checkbox.isChecked()
+        regex = self.regex_checkbox.isChecked()
+
+        if not pattern:
+            QMessageBox.information(self, "Empty Search", "Please enter text to find.")
+            return
+
+        # Move cursor to start
+        self.editor.setCursorPosition(0, 0)
+        while self.editor.findFirst(pattern, False, False, False, case, regex):
+            self.editor.replaceSelectedText(replace_text)
+            count += 1
+        QMessageBox.information(self, "Replace All", f"Replaced {count} occurrences.")
+
+
+class KeybindingsDialog(QDialog):
+    """Dialog to edit keybindings."""
+    def __init__(self, bindings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Edit Keybinds")
+        self.bindings = dict(bindings)  # copy
+        layout = QVBoxLayout(self)
+
+        self.list_widget = QListWidget()
+        for action_name, shortcut in self.bindings.items():
+            sc = shortcut if shortcut else ""
+            self.list_widget.addItem(f"{action_name}: {sc}")
+        layout.addWidget(self.list_widget)
+
+        self.edit_btn = QPushButton("Edit Selected")
+        self.edit_btn.clicked.connect(self.edit_selected)
+        layout.addWidget(self.edit_btn)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.setLayout(layout)
+
+    def edit_selected(self):
+        item = self.list_widget.currentItem()
+        if not item:
+            return
+        text = item.text()
+        if ":" not in text:
+            return
+        action_name, current_shortcut = text.split(":", 1)
+        action_name = action_name.strip()
+        current_shortcut = current_shortcut.strip()
+        new_shortcut, ok = QInputDialog.getText(
+            self, "Edit Shortcut",
+            f"Enter new shortcut for '{action_name}':",
+            text=current_shortcut
+        )
+        if ok:
+            self.bindings[action_name] = new_shortcut.strip() if new_shortcut.strip() else None
+            sc = new_shortcut.strip() if new_shortcut.strip() else ""
+            item.setText(f"{action_name}: {sc}")
+
+    def accept(self):
+        super().accept()
+
+
+def list_workspace_dir(root, rel_dir):
+    """List one workspace directory, returning (files, subdirs) or None if it is gone."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as it:
+            for entry in it:
+                name = entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in INDEX_IGNORED_DIRS:
+                            subdirs.append(rel_dir + '/' + name if rel_dir else name)
+                    elif not name.endswith(INDEX_IGNORED_SUFFIXES):
+                        files.append(name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return files, subdirs
+
+
+class IndexReadyEvent(QEvent):
+    def __init__(self, generation, snapshot, new_dirs):
+        super().__init__(INDEX_EVENT_TYPE)
+        self.generation = generation
+        self.snapshot = snapshot
+        self.new_dirs = new_dirs
+
+
+class WorkspaceIndex(QObject):
+    """In-memory index of workspace file paths with fast fuzzy matching.
+
+    Directory listings are owned by a single background worker; the GUI thread
+    only ever sees immutable snapshots, swapped in when a scan completes.
+    """
+    updated = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.generation = 0
+        self.ready = False
+        # Snapshot read by the GUI thread
+        self.paths = []
+        self.lower = []
+        self.path_bits = {}
+        self.nbytes = 0
+        self._pattern_cache = {}
+        self._last_match = ("", None)
+
+        # Worker-owned state: rel_dir -> (files, subdirs)
+        self._dirs = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self._dirty_dirs = set()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(300)
+        self.refresh_timer.timeout.connect(self.flush_dirty_dirs)
+
+    def set_root(self, root):
+        root = os.path.abspath(root)
+        if root == self.root:
+            return
+        self.root = root
+        self.generation += 1
+        self.ready = False
+        self._dirty_dirs.clear()
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.executor.submit(self._scan, self.generation, root, None)
+
+    def on_directory_changed(self, path):
+        if not self.root:
+            return
+        rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+        self._dirty_dirs.add('' if rel == '.' else rel)
+        self.refresh_timer.start()
+
+    def flush_dirty_dirs(self):
+        if self._dirty_dirs:
+            dirty = self._dirty_dirs
+            self._dirty_dirs = set()
+            self.executor.submit(self._scan, self.generation, self.root, dirty)
+
+    def _scan(self, generation, root, dirty):
+        # Runs on the worker thread; dirty=None means a full rebuild
+        try:
+            if dirty is None:
+                self._dirs = {}
+                pending = ['']
+            else:
+                pending = list(dirty)
+            new_dirs = []
+            while pending:
+                rel_dir = pending.pop()
+                listing = list_workspace_dir(root, rel_dir)
+                old = self._dirs.get(rel_dir)
+                if listing is None:
+                    self._drop_tree(rel_dir)
+                    continue
+                if old is None:
+                    new_dirs.append(rel_dir)
+                files, subdirs = listing
+                self._dirs[rel_dir] = listing
+                for sub in subdirs:
+                    if sub not in self._dirs:
+                        pending.append(sub)
+                if old is not None:
+                    for gone in set(old[1]) - set(subdirs):
+                        self._drop_tree(gone)
+            snapshot = self._build_snapshot()
+            QApplication.instance().postEvent(self, IndexReadyEvent(generation, snapshot, new_dirs))
+        except Exception as e:
+            log.warning("Workspace indexing failed: %s", e)
+
+    def _drop_tree(self, rel_dir):
+        prefix = rel_dir + '/'
+        for key in [k for k in self._dirs if k == rel_dir or k.startswith(prefix)]:
+            del self._dirs[key]
+
+    def _build_snapshot(self):
+        paths = []
+        for rel_dir, (files, _) in self._dirs.items():
+            if rel_dir:
+                prefix = rel_dir + '/'
+                paths.extend(prefix + name for name in files)
+            else:
+                paths.extend(files)
+        paths.sort()
+        lower = [path.lower() for path in paths]
+
+        # One bit per path for every character: "path contains c"
+        nbytes = (len(paths) + 7) // 8
+        path_chars = {}
+        for i, path in enumerate(lower):
+            byte = i >> 3
+            bit = 1 << (i & 7)
+            for ch in set(path):
+                arr = path_chars.get(ch)
+                if arr is None:
+                    arr = path_chars[ch] = bytearray(nbytes)
+                arr[byte] |= bit
+        path_bits = {ch: int.from_bytes(arr, 'little') for ch, arr in path_chars.items()}
+        return paths, lower, path_bits, nbytes
+
+    def customEvent(self, event):
+        if event.type() == INDEX_EVENT_TYPE:
+            if event.generation != self.generation:
+                return
+            self.paths, self.lower, self.path_bits, self.nbytes = event.snapshot
+            self._last_match = ("", None)
+            self.ready = True
+            self.watch_dirs(event.new_dirs)
+            self.updated.emit()
+        else:
+            super().customEvent(event)
+
+    def watch_dirs(self, rel_dirs):
+        budget = INDEX_MAX_WATCHED_DIRS - len(self.watcher.directories())
+        if budget <= 0 or not rel_dirs:
+            return
+        # Shallow directories first; they change most often when files are added
+        rel_dirs = sorted(rel_dirs, key=lambda d: d.count('/') if d else -1)[:budget]
+        self.watcher.addPaths([os.path.join(self.root, d) if d else self.root for d in rel_dirs])
+
+    def _pattern_for(self, query):
+        pattern = self._pattern_cache.get(query)
+        if pattern is None:
+            # Anchored greedy-earliest subsequence match; negated classes let each
+            # char jump straight to its next occurrence, so no backtracking is needed
+            parts = []
+            for ch in query:
+                esc = re.escape(ch)
+                parts.append('[^' + esc + ']*' + POSSESSIVE + esc)
+            pattern = re.compile(''.join(parts))
+            if len(self._pattern_cache) > 256:
+                self._pattern_cache.clear()
+            self._pattern_cache[query] = pattern
+        return pattern
+
+    def _index_chunks(self, mask, chunk_bytes=256):
+        # Decode set bits a slice at a time to keep the index lists short
+        data = mask.to_bytes(self.nbytes, 'little')
+        for offset in range(0, len(data), chunk_bytes):
+            chunk = data[offset:offset + chunk_bytes]
+            base = offset * 8
+            indices = [base + m.start() * 8 + bit
+                       for m in NONZERO_BYTE_RE.finditer(chunk)
+                       for bit in BYTE_BITS[chunk[m.start()]]]
+            if indices:
+                yield indices
+
+    def match(self, query, limit=50):
+        """Return up to `limit` relative paths fuzzily matching `query`, best first."""
+        query = ''.join(query.lower().replace('\\', '/').split())
+        if not query:
+            return self.paths[:limit]
+        search = self._pattern_for(query).match
+        lower = self.lower
+        last_query, last_candidates = self._last_match
+        if last_candidates is not None and query.startswith(last_query):
+            # Typing extends the previous query, so only its complete match set can match
+            candidates = [i for i in last_candidates if search(lower[i])]
+        else:
+            candidates = self._collect_candidates(query, search)
+        self._last_match = (query, candidates)
+
+        def score(i):
+            path = lower[i]
+            base = path[path.rfind('/') + 1:]
+            value = -len(path)
+            if base.startswith(query):
+                value += 3000
+            elif query in base:
+                value += 2000
+            elif query in path:
+                value += 1000
+            elif search(base):
+                # Fuzzy match entirely inside the file name
+                value += 500
+            # Ties go to the path that sorts first, whatever order candidates came in
+            return value, -i
+
+        # Every verified match is ranked; the bounded heap keeps this O(n log limit)
+        best = heapq.nlargest(limit, candidates, key=score)
+        return [self.paths[i] for i in best]
+
+    def _collect_candidates(self, query, search):
+        mask = -1
+        for ch in set(query):
+            mask &= self.path_bits.get(ch, 0)
+        if not mask:
+            return []
+
+        # The bitsets rule out paths missing any query char; the order check on
+        # the rest runs through compress/map to keep the loop out of the interpreter
+        lower = self.lower
+        candidates = []
+        for indices in self._index_chunks(mask):
+            candidates.extend(itertools.compress(indices, map(search, map(lower.__getitem__, indices))))
+        return candidates
+
+
+class QuickOpenDialog(QDialog):
+    """Ctrl+P dialog ranking workspace files as you type."""
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.setWindowTitle("Quick Open")
+        self.setMinimumSize(500, 350)
+        layout = QVBoxLayout(self)
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Type to search files by name")
+        self.query_input.textChanged.connect(self.update_results)
+        self.query_input.installEventFilter(self)
+        layout.addWidget(self.query_input)
+
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda item: self.accept())
+        layout.addWidget(self.results)
+
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        self.query_input.returnPressed.connect(self.accept)
+        self.index.updated.connect(self.update_results)
+        self.update_results()
+
+    def eventFilter(self, obj, event):
+        if obj is self.query_input and event.type() == QEvent.KeyPress:
+            if event.key() in (Qt.Key_Down, Qt.Key_Up):
+                count = self.results.count()
+                if count > 0:
+                    step = 1 if event.key() == Qt.Key_Down else -1
+                    self.results.setCurrentRow((self.results.currentRow() + step) % count)
+                return True
+        return super().eventFilter(obj, event)
+
+    def update_results(self):
+        matches = self.index.match(self.query_input.text())
+        self.results.clear()
+        self.results.addItems(matches)
+        if matches:
+            self.results.setCurrentRow(0)
+        if self.index.ready:
+            self.status.setText(f"{len(self.index.paths)} files indexed")
+        else:
+            self.status.setText("Indexing workspace...")
+
+    def selected_path(self):
+        item = self.results.currentItem()
+        if item is None or not self.index.root:
+            return None
+        return os.path.join(self.index.root, item.text())
+
+    def done(self, result):
+        self.index.updated.disconnect(self.update_results)
+        super().done(result)
+
+
+def ansi_256_color(n):
+    if n < 16:
+        return ANSI_COLORS[n]
+    if n < 232:
+        n -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return '#%02x%02x%02x' % (levels[n // 36], levels[n // 6 % 6], levels[n % 6])
+    gray = 8 + (n - 232) * 10
+    return '#%02x%02x%02x' % (gray, gray, gray)
+
+
+class AnsiParser:
+    """Splits terminal output into (text, style) runs, tracking SGR state across chunks.
+
+    A style is a hashable tuple (fg, bg, bold, italic, underline), or None for
+    the default look. Non-SGR escapes are dropped. SGR transitions are memoized
+    per (style, params), so colored output costs one dict lookup per escape.
+    """
+    transitions = {}
+
+    def __init__(self):
+        self.style = None
+        self.carry = ""
+
+    def feed(self, text):
+        if self.carry:
+            text = self.carry + text
+            self.carry = ""
+        if "\x1b" not in text:
+            return [(text, self.style)] if text else []
+
+        # An escape split across reads is held back until the rest arrives
+        tail = text.rfind("\x1b")
+        if len(text) - tail < 256 and not ANSI_ESCAPE_RE.match(text, tail):
+            self.carry = text[tail:]
+            text = text[:tail]
+
+        segments = []
+        pos = 0
+        style = self.style
+        transitions = self.transitions
+        for m in ANSI_ESCAPE_RE.finditer(text):
+            start = m.start()
+            if start > pos:
+                segments.append((text[pos:start], style))
+            if m.group(2) == 'm':
+                key = (style, m.group(1))
+                new_style = transitions.get(key, key)
+                if new_style is key:
+                    new_style = apply_sgr(style, m.group(1))
+                    if len(transitions) > 4096:
+                        transitions.clear()
+                    transitions[key] = new_style
+                style = new_style
+            pos = m.end()
+        if pos < len(text):
+            segments.append((text[pos:], style))
+        self.style = style
+        return segments
+
+
+def apply_sgr(style, params):
+    """Return the style that results from applying SGR `params` to `style`."""
+    fg, bg, bold, italic, underline = style or (None, None, False, False, False)
+    codes = [int(p) if p.isdigit() else 0 for p in params.replace(':', ';').split(';')] if params else [0]
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code == 0:
+            fg = bg = None
+            bold = italic = underline = False
+        elif code == 1:
+            bold = True
+        elif code == 3:
+            italic = True
+        elif code == 4:
+            underline = True
+        elif code == 22:
+            bold = False
+        elif code == 23:
+            italic = False
+        elif code == 24:
+            underline = False
+        elif 30 <= code <= 37:
+            fg = ANSI_COLORS[code - 30]
+        elif 90 <= code <= 97:
+            fg = ANSI_COLORS[code - 90 + 8]
+        elif code == 39:
+            fg = None
+        elif 40 <= code <= 47:
+            bg = ANSI_COLORS[code - 40]
+        elif 100 <= code <= 107:
+            bg = ANSI_COLORS[code - 100 + 8]
+        elif code == 49:
+            bg = None
+        elif code in (38, 48):
+            color = None
+            if i + 2 < len(codes) and codes[i + 1] == 5:
+                color = ansi_256_color(codes[i + 2] & 0xFF)
+                i += 2
+            elif i + 4 < len(codes) and codes[i + 1] == 2:
+                color = '#%02x%02x%02x' % tuple(c & 0xFF for c in codes[i + 2:i + 5])
+                i += 4
+            if code == 38:
+                fg = color
+            else:
+                bg = color
+        i += 1
+    if fg is None and bg is None and not (bold or italic or underline):
+        return None
+    return (fg, bg, bold, italic, underline)
+
+
+class StreamDecoder:
+    """Incremental UTF-8 decoding plus ANSI parsing for one process output stream."""
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.ansi = AnsiParser()
+        self.pending_cr = False
+
+    def feed(self, data, final=False):
+        text = self.decoder.decode(data, final)
+        if self.pending_cr:
+            text = "\r" + text
+            self.pending_cr = False
+        if "\r" in text:
+            # Keep a trailing CR until we know whether it starts a CRLF
+            if text.endswith("\r") and not final:
+                text = text[:-1]
+                self.pending_cr = True
+            text = text.replace("\r\n", "\n")
+        return self.ansi.feed(text)
+
+    def finish(self):
+        segments = self.feed(b"", final=True)
+        if self.ansi.carry:
+            segments.append((self.ansi.carry, self.ansi.style))
+            self.ansi.carry = ""
+        return segments
+
+
+class OutputView(QPlainTextEdit):
+    """Read-only view for process output with bounded scrollback.
+
+    Output is queued and flushed to the view in batches on a timer, and the view
+    keeps at most `scrollback` lines so heavy output cannot grow memory without
+    bound. With spilling enabled the full transcript is also written to a temp file.
+    """
+    spilled = pyqtSignal(str)
+
+    def __init__(self, parent=None, scrollback=10000, flush_interval=50, spill_to_file=False):
+        super().__init__(parent)
+        self.scrollback = scrollback
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setMaximumBlockCount(scrollback)
+        self.setFont(QFont("Courier New", 10))
+
+        self.pending = []
+        self.formats = {}
+        self.at_line_start = True
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush_output)
+
+        self.spill_to_file = spill_to_file
+        self.spill_file = None
+        self.spill_notice_shown = False
+        self.lines_written = 0
+
+    def append_output(self, text):
+        """Queue a message on a line of its own."""
+        if not self.at_line_start:
+            text = "\n" + text
+        self.write_output(text + "\n")
+
+    def write_output(self, text, style=None):
+        """Queue raw stream output; nothing is added between chunks."""
+        if not text:
+            return
+        self.pending.append((text, style))
+        self.at_line_start = text.endswith("\n")
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def write_segments(self, segments):
+        if not segments:
+            return
+        self.pending.extend(segments)
+        self.at_line_start = segments[-1][0].endswith("\n")
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def char_format(self, style):
+        fmt = self.formats.get(style)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            if style is not None:
+                fg, bg, bold, italic, underline = style
+                if fg:
+                    fmt.setForeground(QColor(fg))
+                if bg:
+                    fmt.setBackground(QColor(bg))
+                if bold:
+                    fmt.setFontWeight(QFont.Bold)
+                fmt.setFontItalic(italic)
+                fmt.setFontUnderline(underline)
+            self.formats[style] = fmt
+        return fmt
+
+    def flush_output(self):
+        if not self.pending:
+            return
+        pending = self.pending
+        self.pending = []
+        if self.spill_to_file:
+            self.spill("".join(text for text, _ in pending))
+
+        # Merge adjacent runs sharing a style so each becomes a single insertion
+        runs = []
+        for text, style in pending:
+            if runs and runs[-1][1] == style:
+                runs[-1][0].append(text)
+            else:
+                runs.append(([text], style))
+        runs = [("".join(parts), style) for parts, style in runs]
+
+        # Lines that would be trimmed straight away are never laid out
+        new_lines = sum(text.count("\n") for text, _ in runs)
+        self.lines_written += new_lines
+        if self.scrollback and new_lines >= self.scrollback:
+            budget = self.scrollback - 1
+            kept = []
+            for text, style in reversed(runs):
+                count = text.count("\n")
+                if count >= budget:
+                    kept.append((tail_lines(text, budget), style))
+                    break
+                kept.append((text, style))
+                budget -= count
+            runs = kept[::-1]
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for text, style in runs:
+            cursor.insertText(text, self.char_format(style))
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+        if (self.spill_file and self.scrollback and not self.spill_notice_shown
+                and self.lines_written >= self.scrollback):
+            self.spill_notice_shown = True
+            self.spilled.emit(self.spill_file.name)
+
+    def spill(self, text):
+        if self.spill_file is None:
+            try:
+                self.spill_file = SpillFile()
+            except OSError as e:
+                log.warning("Could not create terminal spill file: %s", e)
+                self.spill_to_file = False
+                return
+            # The view may be deleted from C++, so the hook must not need it
+            self.destroyed.connect(self.spill_file.discard)
+        self.spill_file.write(text)
+
+    def clear(self):
+        super().clear()
+        self.pending = []
+        self.at_line_start = True
+        self.lines_written = 0
+        self.spill_notice_shown = False
+        if self.spill_file is not None:
+            self.spill_file.discard()
+            self.spill_file = None
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        if self.spill_file is not None:
+            menu.addSeparator()
+            menu.addAction("Open Full Output", self.spill_file.open)
+        menu.exec_(event.globalPos())
+        menu.deleteLater()
+
+
+class SpillFile:
+    """Temp file with an OutputView's full transcript.
+
+    Removed when discarded (view cleared or deleted, or the IDE exiting)
+    unless the user opened it, in which case it is left for them.
+    """
+
+    def __init__(self):
+        self.file = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', prefix='eide-terminal-', suffix='.log', delete=False
+        )
+        self.name = self.file.name
+        self.kept = False
+        atexit.register(self.discard)
+
+    def write(self, text):
+        if not self.file.closed:
+            self.file.write(text)
+            self.file.flush()
+
+    def open(self):
+        self.kept = True
+        QDesktopServices.openUrl(QUrl.fromLocalFile(self.name))
+
+    def discard(self, *args):
+        if not self.file.closed:
+            self.file.close()
+        atexit.unregister(self.discard)
+        if not self.kept:
+            with contextlib.suppress(OSError):
+                os.remove(self.name)
+
+
+class TerminalDock(QDockWidget):
+    """A dockable terminal allowing user input and displaying output."""
+    send_command = pyqtSignal(str)
+    send_control = pyqtSignal(str)
+
+    def __init__(self, parent=None, scrollback=10000, flush_interval=50, spill_to_file=False):
+        super().__init__("Terminal", parent)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+
+        main_widget = QWidget()
+        self.setWidget(main_widget)
+        layout = QVBoxLayout(main_widget)
+
+        self.output = OutputView(scrollback=scrollback, flush_interval=flush_interval,
+                                 spill_to_file=spill_to_file)
+        # Shown in the title so the notice itself never scrolls out of view
+        self.output.spilled.connect(lambda path: self.setWindowTitle(f"Terminal (older output in {path})"))
+        layout.addWidget(self.output)
+
+        self.input = QLineEdit()
+        self.input.returnPressed.connect(self.handle_input)
+        self.input.installEventFilter(self)
+        layout.addWidget(self.input)
+
+        # In shell mode the PTY shell prints its own prompt, so input is echoed inline
+        self.shell_mode = False
+
+    def handle_input(self):
+        cmd = self.input.text()
+        if self.shell_mode:
+            # Empty lines matter to interactive programs reading stdin
+            self.write_output(cmd + "\n")
+            self.send_command.emit(cmd)
+            self.input.clear()
+            return
+        if cmd.strip() == "":
+            return
+        self.append_output(f"> {cmd}")
+        self.send_command.emit(cmd)
+        self.input.clear()
+
+    def eventFilter(self, obj, event):
+        if obj is self.input and event.type() == QEvent.KeyPress and self.shell_mode:
+            if event.modifiers() & Qt.ControlModifier and event.key() in (Qt.Key_C, Qt.Key_D):
+                if event.key() == Qt.Key_C and self.input.hasSelectedText():
+                    return super().eventFilter(obj, event)
+                self.send_control.emit("\x03" if event.key() == Qt.Key_C else "\x04")
+                return True
+        return super().eventFilter(obj, event)
+
+    def append_output(self, text):
+        self.output.append_output(text)
+
+    def write_output(self, text, style=None):
+        self.output.write_output(text, style)
+
+    def write_segments(self, segments):
+        self.output.write_segments(segments)
+
+
+def descendant_pids(pid):
+    """Return the pids of all live descendants of `pid` (Linux, via /proc)."""
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields resume after the last ')'
+        fields = stat[stat.rfind(b')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    result = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+
+def kill_process_tree(pid):
+    """Kill a process together with everything it started."""
+    if sys.platform.startswith('win'):
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    # Collect descendants first: once the parent dies they get reparented
+    descendants = descendant_pids(pid) if os.path.isdir('/proc') else []
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    for child in [pid] + descendants:
+        try:
+            os.kill(child, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def shell_program(cmd, stats_path=None):
+    """Program and arguments that run `cmd` through the platform shell.
+
+    On POSIX the shell is started through setsid when available, so it leads
+    its own process group and the whole tree can be signalled at once. With
+    `stats_path` it runs under RUN_LAUNCHER instead, which also starts a new
+    session and writes the shell's resource usage there as JSON on exit.
+    """
+    if sys.platform.startswith('win'):
+        return "cmd.exe", ["/c", cmd]
+    if stats_path and RUN_STATS_SUPPORTED:
+        return sys.executable, ["-c", RUN_LAUNCHER, stats_path, "bash", "-c", cmd]
+    if shutil.which("setsid"):
+        return "setsid", ["bash", "-c", cmd]
+    return "bash", ["-c", cmd]
+
+
+def new_stats_path():
+    """Temporary file the run launcher writes resource usage to, or None where unsupported."""
+    if not RUN_STATS_SUPPORTED:
+        return None
+    fd, path = tempfile.mkstemp(prefix="eide-run-", suffix=".json")
+    os.close(fd)
+    return path
+
+
+def read_run_stats(path):
+    """Load and delete a launcher stats file; None if the run never got that far."""
+    if not path:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = f.read()
+        return json.loads(data) if data else None
+    except (OSError, ValueError):
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def format_run_stats(stats):
+    return (f"wall {stats['wall']:.3f}s  user {stats['user']:.3f}s  sys {stats['sys']:.3f}s  "
+            f"max RSS {stats['max_rss_kb'] / 1024:.1f} MB")
+
+
+def compare_run_stats(stats, previous):
+    """Relative change of the headline numbers against an earlier run of the same command."""
+    parts = []
+    for key, label in (("wall", "wall"), ("user", "user"), ("max_rss_kb", "max RSS")):
+        if previous.get(key):
+            parts.append(f"{label} {(stats[key] - previous[key]) / previous[key] * 100:+.1f}%")
+    return "vs previous run: " + ", ".join(parts) if parts else ""
+
+
+def launcher_environment(cpu=None, limits=None):
+    """Process environment telling RUN_LAUNCHER to pin the child and/or apply rlimits."""
+    env = QProcessEnvironment.systemEnvironment()
+    if cpu is not None:
+        env.insert("EIDE_CPU_AFFINITY", str(cpu))
+    if limits:
+        env.insert("EIDE_RLIMITS", json.dumps(limits))
+    return env
+
+
+def user_process_count():
+    """Number of processes owned by the current user (Linux, via /proc)."""
+    uid = os.getuid()
+    count = 0
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0
+    for entry in entries:
+        if entry.isdigit():
+            try:
+                if os.stat(f'/proc/{entry}').st_uid == uid:
+                    count += 1
+            except OSError:
+                pass
+    return count
+
+
+def launcher_rlimits(limits):
+    """Translate a run way's limits into the rlimits RUN_LAUNCHER applies to the child."""
+    if not limits or not RUN_STATS_SUPPORTED:
+        return {}
+    rlimits = {}
+    for key, name in RUN_LIMIT_RESOURCES.items():
+        value = limits.get(key)
+        if not value:
+            continue
+        if key == "memory_mb":
+            value *= 1024 * 1024
+        elif key == "open_files":
+            # The shell itself needs a handful of descriptors
+            value = max(value, 16)
+        elif key == "processes":
+            # RLIMIT_NPROC counts all of the user's processes, so the budget goes on top of those
+            value += user_process_count()
+        rlimits[name] = int(value)
+    return rlimits
+
+
+def describe_limit_hit(stats, limits):
+    """Explain a run that died on one of its limits, or return None."""
+    if not stats or not limits:
+        return None
+    if stats.get("signal") == getattr(signal, "SIGXCPU", None):
+        return f"CPU time limit of {limits.get('cpu_seconds')}s exceeded."
+    return None
+
+
+def split_kernel_messages(data):
+    """Separate in-band kernel messages from program output.
+
+    Returns (output, messages, carry); `carry` is a trailing partial message
+    (or partial start marker) to prepend to the next read.
+    """
+    output = []
+    messages = []
+    pos = 0
+    while True:
+        start = data.find(KERNEL_MESSAGE_START, pos)
+        if start == -1:
+            break
+        end = data.find(KERNEL_MESSAGE_END, start)
+        if end == -1:
+            output.append(data[pos:start])
+            return b"".join(output), messages, data[start:]
+        output.append(data[pos:start])
+        try:
+            messages.append(json.loads(data[start + len(KERNEL_MESSAGE_START):end]))
+        except ValueError:
+            pass
+        pos = end + 1
+    tail = data[pos:]
+    # Keep a possible prefix of the start marker for the next read
+    for size in range(min(len(KERNEL_MESSAGE_START) - 1, len(tail)), 0, -1):
+        if KERNEL_MESSAGE_START.startswith(tail[-size:]):
+            output.append(tail[:-size])
+            return b"".join(output), messages, tail[-size:]
+    output.append(tail)
+    return b"".join(output), messages, b""
+
+
+def python_cells(text):
+    """Line ranges [start, end) of the `# %%` cells in a Python source."""
+    bounds = [i for i, line in enumerate(text.split('\n')) if line.lstrip().startswith('# %%')]
+    line_count = text.count('\n') + 1
+    if not bounds or bounds[0] != 0:
+        bounds.insert(0, 0)
+    bounds.append(line_count)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def split_final_step(steps):
+    """Split substituted run-way steps into the setup steps and the final command.
+
+    For dependency graphs only the steps the final step needs are kept.
+    Returns (None, None) if the last step is not a plain command.
+    """
+    final = steps[-1] if steps else None
+    if isinstance(final, dict):
+        final = final.get("command")
+    if not isinstance(final, str):
+        return None, None
+    if not is_step_graph(steps):
+        return steps[:-1], final
+    by_name = {step["name"]: step for step in steps if isinstance(step, dict) and "name" in step}
+    needed = set()
+    pending = list(steps[-1].get("needs", []) if isinstance(steps[-1], dict) else [])
+    while pending:
+        name = pending.pop()
+        if name not in needed and name in by_name:
+            needed.add(name)
+            pending.extend(by_name[name].get("needs", []))
+    return [step for step in steps[:-1] if isinstance(step, dict) and step.get("name") in needed], final
+
+
+def find_test_cases(folder):
+    """Pairs of (name, input path, expected output path) for every *.in with a *.out (or *.ans) beside it."""
+    def natural_key(name):
+        return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+    cases = []
+    for name in sorted(os.listdir(folder), key=natural_key):
+        if not name.endswith('.in'):
+            continue
+        stem = os.path.join(folder, name[:-3])
+        for suffix in ('.out', '.ans'):
+            if os.path.isfile(stem + suffix):
+                cases.append((name[:-3], stem + '.in', stem + suffix))
+                break
+    return cases
+
+
+def summarize_timings(samples):
+    return {
+        "runs": len(samples),
+        "mean": statistics.mean(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+        "max": max(samples)
+    }
+
+
+def format_timing_summary(summary):
+    return (f"mean {summary['mean']:.4f}s  median {summary['median']:.4f}s  "
+            f"stddev {summary['stdev']:.4f}s  min {summary['min']:.4f}s  max {summary['max']:.4f}s  "
+            f"({summary['runs']} runs)")
+
+
+def compare_to_baseline(summary, baseline):
+    """Describe the change in mean against a baseline; differences inside two stddevs count as noise."""
+    if baseline["mean"] > 0:
+        change = f"{(summary['mean'] - baseline['mean']) / baseline['mean'] * 100:+.1f}%"
+    else:
+        # A baseline too fast to time gives no meaningful ratio
+        change = f"{summary['mean'] - baseline['mean']:+.4f}s"
+    noise = 2 * max(summary["stdev"], baseline["stdev"])
+    verdict = "within noise" if abs(summary["mean"] - baseline["mean"]) <= noise else (
+        "slower" if summary["mean"] > baseline["mean"] else "faster")
+    return (f"vs baseline ({baseline['mean']:.4f}s ± {baseline['stdev']:.4f}s, "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(baseline['time']))}): "
+            f"mean {change}, {verdict}")
+
+
+def substitute_file(step, file_path):
+    """Replace {{file}} and {{dir}} in a run-way step (a command string or a step dict)."""
+    if isinstance(step, dict):
+        return {key: substitute_file(value, file_path) for key, value in step.items()}
+    if isinstance(step, list):
+        return [substitute_file(value, file_path) for value in step]
+    if isinstance(step, str):
+        return step.replace("{{file}}", file_path).replace("{{dir}}", os.path.dirname(file_path))
+    return step
+
+
+def describe_step(step):
+    """One-line label for a run-way step as shown in the run ways dialog."""
+    if not isinstance(step, dict):
+        return step
+    prefix = ""
+    if "name" in step:
+        needs = step.get("needs") or []
+        prefix = f"{step['name']}" + (f" <- {', '.join(needs)}" if needs else "") + ": "
+    if "build" in step:
+        return f"{prefix}[build -> {step.get('output', '?')}] {step['build']}"
+    if "command" in step:
+        return f"{prefix}{step['command']}"
+    return json.dumps(step)
+
+
+def is_step_graph(steps):
+    """Run-ways whose steps are named or declare dependencies run as a graph."""
+    return any(isinstance(step, dict) and ("needs" in step or "name" in step) for step in steps)
+
+
+class BuildCache:
+    """Content-addressed store of build artifacts with size-based LRU eviction.
+
+    A build step's key hashes its command, the compiler binary, the source file
+    and every local header it includes (transitively), so any change that could
+    alter the artifact produces a new key. Entry mtimes record last use.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, command, source_path):
+        digest = hashlib.sha256()
+        digest.update(command.encode('utf-8'))
+        parts = command.split()
+        compiler = shutil.which(parts[0]) if parts else None
+        if compiler:
+            st = os.stat(compiler)
+            digest.update(f"\0{compiler}\0{st.st_size}\0{st.st_mtime_ns}".encode('utf-8'))
+        seen = set()
+        pending = [os.path.abspath(source_path)]
+        while pending:
+            path = pending.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                digest.update(b"\0missing\0" + path.encode('utf-8'))
+                continue
+            digest.update(b"\0" + path.encode('utf-8') + b"\0")
+            digest.update(hashlib.sha256(data).digest())
+            base = os.path.dirname(path)
+            for name in LOCAL_INCLUDE_RE.findall(data):
+                pending.append(os.path.normpath(os.path.join(base, name.decode('utf-8', 'replace'))))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def restore(self, key, output_path):
+        """Copy a cached artifact to output_path; returns False on a miss."""
+        entry = self.entry_path(key)
+        if not os.path.isfile(entry):
+            return False
+        try:
+            shutil.copy2(entry, output_path)
+            os.utime(entry)
+        except OSError as e:
+            run_log.warning("Build cache restore failed: %s", e)
+            return False
+        return True
+
+    def store(self, key, output_path):
+        entry = self.entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            tmp = f"{entry}.{os.getpid()}.tmp"
+            shutil.copy2(output_path, tmp)
+            os.replace(tmp, entry)
+            os.utime(entry)
+        except OSError as e:
+            run_log.warning("Build cache store failed: %s", e)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class RunHistory:
+    """Per-file history of run stats, kept in a JSON file so it survives restarts."""
+
+    def __init__(self, path, per_file=50):
+        self.path = path
+        # At least the latest run is kept; 0 would make del entries[:-0] a no-op
+        self.per_file = max(1, per_file)
+        self.data = None
+
+    def load(self):
+        if self.data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                self.data = {}
+        return self.data
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            run_log.warning("Could not save run history: %s", e)
+
+    def entries(self, source_path):
+        return self.load().get(os.path.abspath(source_path), [])
+
+    def record(self, source_path, command, exit_code, stats):
+        """Add a run; returns the previous run of the same command, if any."""
+        entries = self.load().setdefault(os.path.abspath(source_path), [])
+        previous = next((e for e in reversed(entries) if e["command"] == command and e["exit_code"] == 0), None)
+        entries.append(dict(stats, time=time.time(), command=command, exit_code=exit_code))
+        del entries[:-self.per_file]
+        self.save()
+        return previous
+
+
+class RunHistoryDialog(QDialog):
+    """Table of recorded runs for one file, newest first."""
+    COLUMNS = ["When", "Command", "Exit", "Wall (s)", "User (s)", "Sys (s)", "Max RSS (MB)"]
+
+    def __init__(self, source_path, entries, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Run History - {os.path.basename(source_path)}")
+        self.setMinimumSize(800, 400)
+        layout = QVBoxLayout(self)
+        table = QTableWidget(len(entries), len(self.COLUMNS))
+        table.setHorizontalHeaderLabels(self.COLUMNS)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        for row, entry in enumerate(reversed(entries)):
+            values = [
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"])),
+                entry["command"],
+                str(entry["exit_code"]),
+                f"{entry['wall']:.3f}",
+                f"{entry['user']:.3f}",
+                f"{entry['sys']:.3f}",
+                f"{entry['max_rss_kb'] / 1024:.1f}"
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 1:
+                    item.setToolTip(value)
+                table.setItem(row, col, item)
+        layout.addWidget(table)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+
+class RunJob(QObject):
+    """One running (or finished) command with its own output buffer and status."""
+    finished = pyqtSignal(object)
+
+    def __init__(self, job_id, name, command, cwd=None, settings=None, limits=None, parent=None):
+        super().__init__(parent)
+        settings = settings or DEFAULT_SETTINGS
+        self.limits = limits or {}
+        self.timed_out = False
+        self.job_id = job_id
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.status = "pending"
+        self.exit_code = None
+        self.started = None
+        self.ended = None
+        self.killed = False
+        self.output = OutputView(
+            scrollback=settings["terminal_scrollback_lines"],
+            flush_interval=settings["terminal_flush_interval_ms"],
+            spill_to_file=settings["terminal_spill_to_file"]
+        )
+        self.decoder = StreamDecoder()
+        self.process = None
+        self.source_path = None
+        self.stats_path = None
+        self.stats = None
+
+    def start(self):
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        self.stats_path = new_stats_path()
+        program, args = shell_program(self.command, self.stats_path)
+        self.process.setProgram(program)
+        self.process.setArguments(args)
+        rlimits = launcher_rlimits(self.limits)
+        if rlimits:
+            self.process.setProcessEnvironment(launcher_environment(limits=rlimits))
+        if self.limits.get("timeout_seconds"):
+            timer = QTimer(self.process)
+            timer.setSingleShot(True)
+            timer.timeout.connect(self.time_out)
+            timer.start(int(self.limits["timeout_seconds"] * 1000))
+        if self.cwd:
+            self.process.setWorkingDirectory(self.cwd)
+        self.process.readyReadStandardOutput.connect(self.handle_output)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+
+        self.output.append_output(f"$ {self.command}")
+        self.started = time.monotonic()
+        self.status = "running"
+        tracer.begin(self.name, "run", f"job{self.job_id}", {"command": self.command})
+        self.process.start()
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    def is_running(self):
+        return self.status == "running"
+
+    def time_out(self):
+        if self.is_running():
+            self.timed_out = True
+            kill_process_tree(int(self.process.processId()))
+
+    def handle_output(self):
+        data = self.process.readAllStandardOutput().data()
+        self.output.write_segments(self.decoder.feed(data))
+
+    def process_finished(self, exitCode, exitStatus):
+        self.output.write_segments(self.decoder.finish())
+        self.ended = time.monotonic()
+        self.exit_code = exitCode
+        self.stats = read_run_stats(self.stats_path)
+        if self.timed_out:
+            self.status = "timed out"
+        elif self.killed:
+            self.status = "killed"
+        elif exitStatus == QProcess.CrashExit:
+            self.status = "crashed"
+        else:
+            self.status = "finished" if exitCode == 0 else "failed"
+        self.output.append_output(f"\nProcess finished with exit code {exitCode} ({self.elapsed():.2f}s).")
+        if self.stats:
+            self.output.append_output(format_run_stats(self.stats))
+        if self.timed_out:
+            self.output.append_output(f"Killed after the wall-clock timeout of {self.limits['timeout_seconds']}s.")
+        limit_hit = describe_limit_hit(self.stats, self.limits)
+        if limit_hit:
+            self.output.append_output(limit_hit)
+        tracer.end("run", f"job{self.job_id}", {"status": self.status, "exit_code": exitCode})
+        self.finished.emit(self)
+
+    def process_error(self, error):
+        if error == QProcess.FailedToStart:
+            self.ended = time.monotonic()
+            self.status = "failed"
+            read_run_stats(self.stats_path)
+            self.output.append_output("Failed to start the process.")
+            tracer.end("run", f"job{self.job_id}", {"status": self.status})
+            self.finished.emit(self)
+
+    def kill(self):
+        if self.process is not None and self.is_running():
+            self.killed = True
+            kill_process_tree(int(self.process.processId()))
+
+
+class JobManager(QObject):
+    """Runs any number of jobs concurrently and tracks them until cleared."""
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+    job_removed = pyqtSignal(object)
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.jobs = {}
+        self.next_id = 1
+
+    def start_job(self, name, command, cwd=None, source_path=None, limits=None):
+        job = RunJob(self.next_id, name, command, cwd=cwd, settings=self.settings, limits=limits, parent=self)
+        job.source_path = source_path
+        self.next_id += 1
+        self.jobs[job.job_id] = job
+        job.finished.connect(self.job_changed.emit)
+        self.job_added.emit(job)
+        job.start()
+        return job
+
+    def kill_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            job.kill()
+
+    def kill_all(self):
+        for job in self.jobs.values():
+            job.kill()
+
+    def running_jobs(self):
+        return [job for job in self.jobs.values() if job.is_running()]
+
+    def clear_finished(self):
+        for job_id in [j for j, job in self.jobs.items() if not job.is_running()]:
+            job = self.jobs.pop(job_id)
+            self.job_removed.emit(job)
+            job.output.deleteLater()
+            job.deleteLater()
+
+
+class JobsDock(QDockWidget):
+    """Lists run jobs with their status; the selected job's output is shown beside it."""
+    COLUMNS = ["#", "Job", "Status", "Exit", "Elapsed"]
+
+    def __init__(self, manager, parent=None):
+        super().__init__("Jobs", parent)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+        self.manager = manager
+        self.rows = {}
+
+        splitter = QSplitter(Qt.Horizontal)
+        left = QWidget()
+        left_layout = QVBoxLayout(left)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.currentCellChanged.connect(self.on_current_changed)
+        left_layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.kill_btn = QPushButton("Kill")
+        self.kill_btn.clicked.connect(self.kill_selected)
+        self.clear_btn = QPushButton("Clear Finished")
+        self.clear_btn.clicked.connect(self.manager.clear_finished)
+        btn_layout.addWidget(self.kill_btn)
+        btn_layout.addWidget(self.clear_btn)
+        left_layout.addLayout(btn_layout)
+        splitter.addWidget(left)
+
+        self.outputs = QStackedWidget()
+        self.outputs.addWidget(QLabel("No job selected."))
+        splitter.addWidget(self.outputs)
+        splitter.setStretchFactor(1, 3)
+        self.setWidget(splitter)
+
+        manager.job_added.connect(self.add_job)
+        manager.job_changed.connect(self.update_job)
+        manager.job_removed.connect(self.remove_job)
+
+        # Elapsed time of running jobs ticks while any are active
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setInterval(500)
+        self.tick_timer.timeout.connect(self.refresh_running)
+
+    def add_job(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col in range(len(self.COLUMNS)):
+            self.table.setItem(row, col, QTableWidgetItem())
+        self.table.item(row, 0).setData(Qt.UserRole, job.job_id)
+        self.table.item(row, 1).setToolTip(job.command)
+        self.outputs.addWidget(job.output)
+        self.rows[job.job_id] = job
+        self.update_job(job)
+        self.table.setCurrentCell(row, 1)
+        if not self.tick_timer.isActive():
+            self.tick_timer.start()
+
+    def row_of(self, job):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == job.job_id:
+                return row
+        return -1
+
+    def update_job(self, job):
+        row = self.row_of(job)
+        if row == -1:
+            return
+        values = [
+            str(job.job_id), job.name, job.status,
+            "" if job.exit_code is None else str(job.exit_code),
+            f"{job.elapsed():.1f}s"
+        ]
+        for col, value in enumerate(values):
+            self.table.item(row, col).setText(value)
+
+    def refresh_running(self):
+        running = self.manager.running_jobs()
+        for job in running:
+            self.update_job(job)
+        if not running:
+            self.tick_timer.stop()
+
+    def remove_job(self, job):
+        row = self.row_of(job)
+        if row != -1:
+            self.table.removeRow(row)
+        self.outputs.removeWidget(job.output)
+        self.rows.pop(job.job_id, None)
+
+    def selected_job(self):
+        row = self.table.currentRow()
+        if row < 0:
+            return None
+        return self.rows.get(self.table.item(row, 0).data(Qt.UserRole))
+
+    def on_current_changed(self, row, col, prev_row, prev_col):
+        job = self.selected_job()
+        if job is not None:
+            self.outputs.setCurrentWidget(job.output)
+        else:
+            self.outputs.setCurrentIndex(0)
+
+    def kill_selected(self):
+        job = self.selected_job()
+        if job is not None:
+            self.manager.kill_job(job.job_id)
+
+
+class StepGraphRun(QObject):
+    """Runs named run-way steps as a dependency graph.
+
+    Each step is {"name", "command" | "build"/"output", "needs": [names]};
+    plain strings are unnamed steps with no dependencies. Ready steps start as
+    jobs, at most `max_parallel` at a time. A failed step marks everything that
+    depends on it as skipped. `finished` carries a per-step timing report.
+    """
+    finished = pyqtSignal(str)
+
+    def __init__(self, name, steps, source_path, job_manager, build_cache, max_parallel=None, limits=None,
+                 parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.limits = limits
+        self.source_path = source_path
+        self.job_manager = job_manager
+        self.build_cache = build_cache
+        self.max_parallel = max_parallel or os.cpu_count() or 1
+        self.steps = {}
+        self.order = []
+        for i, step in enumerate(steps):
+            if isinstance(step, str):
+                step = {"command": step}
+            step_name = step.get("name") or f"step{i + 1}"
+            if step_name in self.steps:
+                raise ValueError(f"Duplicate step name '{step_name}'")
+            if "command" not in step and "build" not in step:
+                raise ValueError(f"Step '{step_name}' has no command or build")
+            self.steps[step_name] = step
+            self.order.append(step_name)
+        for step_name, step in self.steps.items():
+            for dep in step.get("needs") or []:
+                if dep not in self.steps:
+                    raise ValueError(f"Step '{step_name}' needs unknown step '{dep}'")
+        self.check_acyclic()
+
+        self.state = {step_name: "pending" for step_name in self.order}
+        self.durations = {}
+        self.cache_keys = {}
+        self.running = 0
+        self.started = None
+
+    def check_acyclic(self):
+        indegree = {n: len(self.steps[n].get("needs") or []) for n in self.order}
+        dependents = {n: [] for n in self.order}
+        for n in self.order:
+            for dep in self.steps[n].get("needs") or []:
+                dependents[dep].append(n)
+        ready = [n for n in self.order if indegree[n] == 0]
+        seen = 0
+        while ready:
+            n = ready.pop()
+            seen += 1
+            for d in dependents[n]:
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    ready.append(d)
+        if seen != len(self.order):
+            cycle = [n for n in self.order if indegree[n] > 0]
+            raise ValueError(f"Run-way steps form a cycle: {', '.join(cycle)}")
+
+    def start(self):
+        self.started = time.monotonic()
+        self.schedule()
+
+    def schedule(self):
+        # A cache hit completes a step on the spot, which can make steps listed
+        # before it ready, so keep passing over the order until none hits
+        progressed = True
+        while progressed:
+            progressed = False
+            for step_name in self.order:
+                if self.running >= self.max_parallel:
+                    break
+                if self.state[step_name] != "pending":
+                    continue
+                needs = self.steps[step_name].get("needs") or []
+                if all(self.state[dep] in ("done", "cached") for dep in needs):
+                    self.start_step(step_name)
+                    progressed = progressed or self.state[step_name] == "cached"
+        if self.running == 0 and "pending" not in self.state.values():
+            self.finished.emit(self.report())
+
+    def start_step(self, step_name):
+        step = self.steps[step_name]
+        if "build" in step:
+            key = self.build_cache.key(step["build"], step.get("source", self.source_path))
+            self.cache_keys[step_name] = key
+            if step.get("output") and self.build_cache.restore(key, step["output"]):
+                self.state[step_name] = "cached"
+                self.durations[step_name] = 0.0
+                return
+            command = step["build"]
+            limits = None
+        else:
+            command = step["command"]
+            limits = self.limits
+        self.state[step_name] = "running"
+        self.running += 1
+        job = self.job_manager.start_job(f"{self.name} [{step_name}]", command, source_path=self.source_path,
+                                         limits=limits)
+        job.finished.connect(lambda job, step_name=step_name: self.on_step_finished(step_name, job))
+
+    def on_step_finished(self, step_name, job):
+        self.running -= 1
+        self.durations[step_name] = job.elapsed()
+        step = self.steps[step_name]
+        if job.status == "finished":
+            self.state[step_name] = "done"
+            if step_name in self.cache_keys and os.path.isfile(step.get("output", "")):
+                self.build_cache.store(self.cache_keys[step_name], step["output"])
+        else:
+            self.state[step_name] = job.status
+            self.skip_dependents(step_name)
+        self.schedule()
+
+    def skip_dependents(self, failed):
+        blocked = {failed}
+        changed = True
+        while changed:
+            changed = False
+            for step_name in self.order:
+                if self.state[step_name] != "pending":
+                    continue
+                if any(dep in blocked for dep in self.steps[step_name].get("needs") or []):
+                    self.state[step_name] = "skipped"
+                    blocked.add(step_name)
+                    changed = True
+
+    def succeeded(self):
+        return all(state in ("done", "cached") for state in self.state.values())
+
+    def report(self):
+        total = time.monotonic() - self.started
+        width = max(len(n) for n in self.order)
+        lines = [f"{self.name}: finished in {total:.2f}s"]
+        for step_name in self.order:
+            duration = self.durations.get(step_name)
+            timing = f"{duration:8.2f}s" if duration is not None else "        -"
+            lines.append(f"  {step_name.ljust(width)}  {self.state[step_name]:<8} {timing}")
+        return "\n".join(lines)
+
+
+class BenchmarkRun(QObject):
+    """Runs one command repeatedly, warmups first, and collects wall times.
+
+    Output of the program is discarded. Timings come from the run launcher
+    where available, so interpreter and shell start-up of the IDE side are not
+    counted; elsewhere they are measured around the QProcess.
+    """
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(object)
+
+    def __init__(self, command, runs, warmups=0, cpu=None, limits=None, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.limits = limits or {}
+        self.runs = runs
+        self.warmups = warmups
+        self.cpu = cpu
+        self.samples = []
+        self.cpu_samples = []
+        self.max_rss_kb = 0
+        self.iteration = 0
+        self.process = None
+        self.stats_path = None
+        self.started = None
+        self.cancelled = False
+
+    def start(self):
+        self.next_iteration()
+
+    def next_iteration(self):
+        if self.cancelled:
+            self.finished.emit(None)
+            return
+        if self.iteration >= self.warmups + self.runs:
+            self.finished.emit(summarize_timings(self.samples))
+            return
+        self.process = QProcess(self)
+        self.process.setStandardOutputFile(QProcess.nullDevice())
+        self.process.setStandardErrorFile(QProcess.nullDevice())
+        rlimits = launcher_rlimits(self.limits)
+        if self.cpu is not None or rlimits:
+            self.process.setProcessEnvironment(launcher_environment(cpu=self.cpu, limits=rlimits))
+        if self.limits.get("timeout_seconds"):
+            timer = QTimer(self.process)
+            timer.setSingleShot(True)
+            timer.timeout.connect(self.time_out)
+            timer.start(int(self.limits["timeout_seconds"] * 1000))
+        self.stats_path = new_stats_path()
+        program, args = shell_program(self.command, self.stats_path)
+        self.process.setProgram(program)
+        self.process.setArguments(args)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        self.started = time.monotonic()
+        self.process.start()
+
+    def on_finished(self, exitCode, exitStatus):
+        elapsed = time.monotonic() - self.started
+        stats = read_run_stats(self.stats_path)
+        self.process.deleteLater()
+        self.process = None
+        if exitStatus == QProcess.CrashExit or exitCode != 0:
+            self.progress.emit(f"Benchmark stopped: run {self.iteration + 1} exited with code {exitCode}.")
+            self.finished.emit(None)
+            return
+        wall = stats["wall"] if stats else elapsed
+        warmup = self.iteration < self.warmups
+        if warmup:
+            self.progress.emit(f"  warmup {self.iteration + 1}/{self.warmups}: {wall:.4f}s")
+        else:
+            self.samples.append(wall)
+            if stats:
+                self.cpu_samples.append(stats["user"] + stats["sys"])
+                self.max_rss_kb = max(self.max_rss_kb, stats["max_rss_kb"])
+            self.progress.emit(f"  run {self.iteration - self.warmups + 1}/{self.runs}: {wall:.4f}s")
+        self.iteration += 1
+        self.next_iteration()
+
+    def time_out(self):
+        if self.process is not None:
+            self.progress.emit(f"Run {self.iteration + 1} hit the wall-clock timeout of {self.limits['timeout_seconds']}s.")
+            kill_process_tree(int(self.process.processId()))
+
+    def on_error(self, error):
+        if error == QProcess.FailedToStart:
+            read_run_stats(self.stats_path)
+            self.progress.emit("Benchmark stopped: failed to start the process.")
+            self.finished.emit(None)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process is not None:
+            kill_process_tree(int(self.process.processId()))
+
+
+class OutputComparer:
+    """Checks program output against an expected-output file while it streams in.
+
+    Lines are compared as they complete, ignoring trailing whitespace and
+    trailing blank lines, so a wrong answer is known at the first bad line.
+    """
+
+    def __init__(self, expected_path):
+        self.expected = open(expected_path, 'rb')
+        self.partial = b""
+        self.line_no = 0
+        self.mismatch = None
+
+    def feed(self, data):
+        """Consume output; returns False once the output is known to be wrong."""
+        if self.mismatch:
+            return False
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            if not self.compare_line(line):
+                return False
+        return True
+
+    def compare_line(self, line):
+        self.line_no += 1
+        expected = self.expected.readline()
+        if expected.rstrip() == line.rstrip():
+            return True
+        if not expected and not line.strip():
+            # Extra blank lines after the expected output are tolerated
+            return True
+        got = line.rstrip()[:80].decode('utf-8', 'replace')
+        want = expected.rstrip()[:80].decode('utf-8', 'replace')
+        self.mismatch = f"line {self.line_no}: expected {want!r}, got {got!r}" if expected else \
+            f"line {self.line_no}: unexpected extra output {got!r}"
+        return False
+
+    def finish(self):
+        """Compare whatever is left; returns True if the whole output matched."""
+        try:
+            if self.mismatch:
+                return False
+            if self.partial and not self.compare_line(self.partial):
+                return False
+            for rest in self.expected:
+                if rest.strip():
+                    self.line_no += 1
+                    self.mismatch = f"line {self.line_no}: output ended, expected {rest.rstrip()[:80].decode('utf-8', 'replace')!r}"
+                    return False
+            return True
+        finally:
+            self.expected.close()
+
+
+class TestSuiteRun(QObject):
+    """Runs a command against many input files in parallel and judges each output.
+
+    Verdicts are PASS, FAIL (wrong answer), TLE (wall-clock limit), MLE
+    (memory limit, applied as RLIMIT_AS by the launcher) and RE (crash or
+    non-zero exit).
+    """
+    result = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, command, cases, time_limit, memory_limit_mb=0, workers=None, parent=None):
+        super().__init__(parent)
+        self.command = command
+        self.pending = list(cases)
+        self.time_limit = time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.workers = workers or os.cpu_count() or 1
+        self.running = {}
+        self.results = []
+        self.started = None
+        self.cancelled = False
+
+    def start(self):
+        self.started = time.monotonic()
+        self.fill()
+
+    def fill(self):
+        while self.pending and len(self.running) < self.workers and not self.cancelled:
+            self.start_case(*self.pending.pop(0))
+        if not self.running:
+            self.finished.emit(self.summary())
+
+    def start_case(self, name, input_path, expected_path):
+        process = QProcess(self)
+        process.setStandardInputFile(input_path)
+        limits = {}
+        if self.memory_limit_mb:
+            limits["RLIMIT_AS"] = self.memory_limit_mb * 1024 * 1024
+        process.setProcessEnvironment(launcher_environment(limits=limits))
+        case = {
+            "name": name, "input": input_path, "verdict": "running", "time": None,
+            "memory_kb": None, "detail": "", "stderr": b"",
+            "comparer": OutputComparer(expected_path), "stats_path": new_stats_path(),
+            "timed_out": False, "wrong": False, "started": time.monotonic()
+        }
+        timer = QTimer(process)
+        timer.setSingleShot(True)
+        timer.timeout.connect(lambda: self.time_out(process))
+        case["timer"] = timer
+        self.running[process] = case
+        program, args = shell_program(self.command, case["stats_path"])
+        process.setProgram(program)
+        process.setArguments(args)
+        process.readyReadStandardOutput.connect(lambda: self.on_stdout(process))
+        process.readyReadStandardError.connect(lambda: self.on_stderr(process))
+        process.finished.connect(lambda code, status: self.on_finished(process, code, status))
+        process.errorOccurred.connect(lambda error: self.on_error(process, error))
+        process.start()
+        timer.start(int(self.time_limit * 1000))
+        self.result.emit(case)
+
+    def on_stdout(self, process):
+        case = self.running.get(process)
+        if case is None:
+            return
+        if not case["comparer"].feed(process.readAllStandardOutput().data()) and not case["wrong"]:
+            # The answer is already wrong; no need to wait for the rest
+            case["wrong"] = True
+            kill_process_tree(int(process.processId()))
+
+    def on_stderr(self, process):
+        case = self.running.get(process)
+        if case is not None:
+            case["stderr"] = (case["stderr"] + process.readAllStandardError().data())[-4096:]
+
+    def time_out(self, process):
+        case = self.running.get(process)
+        if case is not None and process.state() != QProcess.NotRunning:
+            case["timed_out"] = True
+            kill_process_tree(int(process.processId()))
+
+    def on_finished(self, process, exitCode, exitStatus):
+        case = self.running.pop(process, None)
+        if case is None:
+            return
+        case["timer"].stop()
+        if not case["wrong"]:
+            case["comparer"].feed(process.readAllStandardOutput().data())
+        matched = case["comparer"].finish()
+        stats = read_run_stats(case["stats_path"])
+        case["time"] = stats["wall"] if stats else time.monotonic() - case["started"]
+        case["memory_kb"] = stats["max_rss_kb"] if stats else None
+        stderr = case["stderr"].decode('utf-8', 'replace')
+        memory_hit = self.memory_limit_mb and (
+            (case["memory_kb"] or 0) > self.memory_limit_mb * 1024 or
+            "bad_alloc" in stderr or "MemoryError" in stderr)
+        if case["timed_out"]:
+            case["verdict"] = "TLE"
+            case["detail"] = f"killed after {self.time_limit:g}s"
+        elif case["wrong"]:
+            case["verdict"] = "FAIL"
+            case["detail"] = case["comparer"].mismatch
+        elif exitStatus == QProcess.CrashExit or exitCode != 0:
+            case["verdict"] = "MLE" if memory_hit else "RE"
+            signal_no = stats.get("signal") if stats else None
+            case["detail"] = f"killed by signal {signal_no}" if signal_no else f"exit code {exitCode}"
+        elif not matched:
+            case["verdict"] = "FAIL"
+            case["detail"] = case["comparer"].mismatch
+        else:
+            case["verdict"] = "PASS"
+        if stderr.strip() and case["verdict"] != "PASS":
+            case["detail"] += "\n" + tail_lines(stderr.rstrip(), 20)
+        del case["comparer"], case["timer"]
+        self.results.append(case)
+        self.result.emit(case)
+        process.deleteLater()
+        self.fill()
+
+    def on_error(self, process, error):
+        if error == QProcess.FailedToStart:
+            self.on_finished(process, -1, QProcess.CrashExit)
+
+    def cancel(self):
+        self.cancelled = True
+        self.pending = []
+        for process in list(self.running):
+            kill_process_tree(int(process.processId()))
+
+    def summary(self):
+        counts = {}
+        for case in self.results:
+            counts[case["verdict"]] = counts.get(case["verdict"], 0) + 1
+        return {"total": len(self.results), "counts": counts, "elapsed": time.monotonic() - self.started}
+
+
+class TestsDock(QDockWidget):
+    """Per-test verdicts of the last test run with a summary line."""
+    COLUMNS = ["Test", "Verdict", "Time (s)", "Memory (MB)", "Details"]
+    VERDICT_COLORS = {"PASS": "#0dbc79", "FAIL": "#cd3131", "TLE": "#e5a50a", "MLE": "#e5a50a", "RE": "#bc3fbc"}
+
+    def __init__(self, parent=None):
+        super().__init__("Tests", parent)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.summary_label = QLabel("No tests run yet.")
+        layout.addWidget(self.summary_label)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        self.table.cellDoubleClicked.connect(self.show_details)
+        layout.addWidget(self.table)
+        self.setWidget(widget)
+        self.rows = {}
+
+    def reset(self, cases, command):
+        self.table.setRowCount(len(cases))
+        self.rows = {}
+        for row, (name, input_path, _) in enumerate(cases):
+            self.rows[name] = row
+            for col, value in enumerate([name, "queued", "", "", ""]):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+            self.table.item(row, 0).setToolTip(input_path)
+        self.summary_label.setText(f"Running {len(cases)} tests: {command}")
+
+    def update_case(self, case):
+        row = self.rows.get(case["name"])
+        if row is None:
+            return
+        values = [
+            case["name"], case["verdict"],
+            "" if case["time"] is None else f"{case['time']:.3f}",
+            "" if case["memory_kb"] is None else f"{case['memory_kb'] / 1024:.1f}",
+            case["detail"].split("\n", 1)[0]
+        ]
+        for col, value in enumerate(values):
+            self.table.item(row, col).setText(value)
+        self.table.item(row, 4).setToolTip(case["detail"])
+        color = self.VERDICT_COLORS.get(case["verdict"])
+        if color:
+            self.table.item(row, 1).setForeground(QColor(color))
+
+    def show_summary(self, summary):
+        counts = summary["counts"]
+        parts = [f"{counts[v]} {v}" for v in ("PASS", "FAIL", "TLE", "MLE", "RE") if counts.get(v)]
+        self.summary_label.setText(
+            f"{', '.join(parts) or 'No results'} of {summary['total']} tests in {summary['elapsed']:.2f}s")
+
+    def show_details(self, row, col):
+        details = self.table.item(row, 4).toolTip()
+        if details:
+            QMessageBox.information(self, self.table.item(row, 0).text(), details)
+
+
+class LspMetricsDock(QDockWidget):
+    """Live view of lsp_metrics: request latency and traffic per server and method."""
+    COLUMNS = ["Server", "Method", "Kind", "Count", "Failed", "p50 (ms)", "p95 (ms)", "p99 (ms)",
+               "Avg bytes", "Max bytes", "Rate (/s)"]
+
+    def __init__(self, metrics, parent=None):
+        super().__init__("LSP Metrics", parent)
+        self.metrics = metrics
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        buttons = QHBoxLayout()
+        self.summary_label = QLabel()
+        buttons.addWidget(self.summary_label)
+        buttons.addStretch()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        buttons.addWidget(reset_btn)
+        dump_btn = QPushButton("Dump...")
+        dump_btn.clicked.connect(self.dump)
+        buttons.addWidget(dump_btn)
+        layout.addLayout(buttons)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        self.setWidget(widget)
+
+        # Only refresh while the panel is on screen
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        rows = []
+        snapshot = self.metrics.snapshot()
+        for server, data in snapshot["servers"].items():
+            for method, stats in data["requests"].items():
+                latency = stats.get("latency_ms", {})
+                answered = max(stats["count"], 1)
+                failed = stats["errors"] + stats["timeouts"] + stats["unanswered"]
+                rows.append([server, method, "request", stats["count"], failed,
+                             latency.get("p50"), latency.get("p95"), latency.get("p99"),
+                             stats["response_bytes"] // answered, stats["response_bytes_max"], None])
+            for stats in data["notifications"].values():
+                rows.append([server, stats["method"], stats["direction"], stats["count"], None, None, None, None,
+                             stats["bytes"] // max(stats["count"], 1), stats["bytes_max"], stats["rate_10s_per_s"]])
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                if value is None:
+                    text = ""
+                elif isinstance(value, float):
+                    text = f"{value:.1f}"
+                else:
+                    text = str(value)
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+        in_flight = len(self.metrics.in_flight)
+        self.summary_label.setText(f"{len(snapshot['servers'])} servers, {in_flight} requests in flight")
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def dump(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Dump LSP Metrics", "lsp-metrics.json",
+                                               "JSON (*.json);;Prometheus text (*.prom)")
+        if not fname:
+            return
+        try:
+            self.metrics.dump(fname)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write metrics:\n{e}")
+
+
+class PythonKernel(QObject):
+    """A long-lived Python process that runs buffers and cells in one namespace.
+
+    Modules imported by earlier runs stay loaded, so re-running a script only
+    costs the script itself. Output is streamed as decoded segments.
+    """
+    output = pyqtSignal(list)
+    message = pyqtSignal(str)
+    started = pyqtSignal(str)
+    finished_request = pyqtSignal(int, bool, float)
+    exited = pyqtSignal(int)
+
+    def __init__(self, interpreter=None, cwd=None, parent=None):
+        super().__init__(parent)
+        self.interpreter = interpreter or sys.executable
+        self.cwd = cwd
+        self.process = None
+        self.decoder = StreamDecoder()
+        self.carry = b""
+        self.next_id = 1
+        self.pending = {}
+
+    def start(self):
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        if self.cwd:
+            self.process.setWorkingDirectory(self.cwd)
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("PYTHONIOENCODING", "utf-8")
+        self.process.setProcessEnvironment(env)
+        self.process.readyReadStandardOutput.connect(self.on_output)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error)
+        self.process.setProgram(self.interpreter)
+        self.process.setArguments(["-u", "-c", PYTHON_KERNEL])
+        self.process.start()
+
+    def is_running(self):
+        return self.process is not None and self.process.state() != QProcess.NotRunning
+
+    def is_busy(self):
+        return bool(self.pending)
+
+    def execute(self, source, filename, first_line=0, last_line=None, label=""):
+        if self.process is None:
+            return None
+        request_id = self.next_id
+        self.next_id += 1
+        request = {"id": request_id, "source": source, "filename": filename, "first_line": first_line}
+        if last_line is not None:
+            request["last_line"] = last_line
+        self.pending[request_id] = label
+        self.process.write((json.dumps(request) + "\n").encode('utf-8'))
+        return request_id
+
+    def on_output(self):
+        data = self.carry + self.process.readAllStandardOutput().data()
+        output, messages, self.carry = split_kernel_messages(data)
+        if output:
+            self.output.emit(self.decoder.feed(output))
+        for message in messages:
+            if "ready" in message:
+                self.started.emit(message.get("python", ""))
+            elif "done" in message:
+                self.output.emit(self.decoder.finish())
+                self.pending.pop(message["done"], None)
+                self.finished_request.emit(message["done"], message["ok"], message["elapsed"])
+
+    def on_finished(self, exitCode, exitStatus):
+        self.output.emit(self.decoder.feed(self.carry) + self.decoder.finish())
+        self.carry = b""
+        self.pending.clear()
+        self.process = None
+        self.exited.emit(exitCode)
+
+    def on_error(self, error):
+        # A kernel that never started emits no finished signal
+        if error == QProcess.FailedToStart:
+            self.message.emit(f"Could not start {self.interpreter}: {self.process.errorString()}")
+            self.pending.clear()
+            self.process.deleteLater()
+            self.process = None
+            self.exited.emit(-1)
+
+    def interrupt(self):
+        """Raise KeyboardInterrupt in the running code (POSIX only)."""
+        if self.is_running() and not sys.platform.startswith('win'):
+            os.kill(int(self.process.processId()), signal.SIGINT)
+
+    def shutdown(self):
+        if self.is_running():
+            self.process.finished.disconnect(self.on_finished)
+            self.process.kill()
+            self.process.waitForFinished(1000)
+        self.process = None
+        self.pending.clear()
+
+
+class ShellSession(QObject):
+    """A long-lived interactive bash running under a pseudo-terminal (Linux only).
+
+    Commands are written to the PTY master, so `cd`, exported variables and
+    activated virtualenvs persist between commands, and programs that need a
+    TTY behave as they would in a real terminal.
+    """
+    output = pyqtSignal(list)
+    exited = pyqtSignal(int)
+
+    def __init__(self, cwd=None, parent=None):
+        super().__init__(parent)
+        self.cwd = cwd
+        self.proc = None
+        self.master_fd = None
+        self.notifier = None
+        self.decoder = None
+        self.reaper = None
+        self.signals = []
+
+    def is_running(self):
+        return self.master_fd is not None and self.proc is not None and self.proc.poll() is None
+
+    def start(self, columns=120, rows=40):
+        master_fd, slave_fd = os.openpty()
+        try:
+            attrs = termios.tcgetattr(slave_fd)
+            attrs[3] &= ~termios.ECHO  # The dock echoes input itself
+            termios.tcsetattr(slave_fd, termios.TCSANOW, attrs)
+            fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+            env = dict(os.environ, TERM='xterm-256color')
+            self.proc = subprocess.Popen(
+                [sys.executable, '-I', '-c', SHELL_CTTY_LAUNCHER, 'bash', '--noediting', '-i'],
+                stdin=slave_fd, stdout=slave_fd, stderr=slave_fd,
+                cwd=self.cwd or None, env=env, close_fds=True,
+                start_new_session=True
+            )
+        except Exception:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+
+        os.set_blocking(master_fd, False)
+        self.master_fd = master_fd
+        self.decoder = StreamDecoder()
+        self.notifier = QSocketNotifier(master_fd, QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self.on_readable)
+
+    def on_readable(self):
+        chunks = []
+        eof = False
+        while True:
+            try:
+                data = os.read(self.master_fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                # EIO once every slave fd is closed, i.e. the shell is gone
+                eof = True
+                break
+            if not data:
+                eof = True
+                break
+            chunks.append(data)
+        if chunks:
+            self.output.emit(self.decoder.feed(b"".join(chunks)))
+        if eof:
+            self.output.emit(self.decoder.finish())
+            self.close()
+
+    def write(self, text):
+        if self.master_fd is None:
+            return
+        data = text.encode('utf-8')
+        while data:
+            try:
+                written = os.write(self.master_fd, data)
+            except BlockingIOError:
+                # The shell is not draining its input; drop the rest rather than block the UI
+                log.warning("Shell input buffer full, dropped %d bytes", len(data))
+                return
+            except OSError:
+                return
+            data = data[written:]
+
+    def resize(self, columns, rows):
+        if self.master_fd is not None:
+            fcntl.ioctl(self.master_fd, termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.setEnabled(False)
+            self.notifier.deleteLater()
+            self.notifier = None
+        if self.master_fd is not None:
+            os.close(self.master_fd)
+            self.master_fd = None
+        if self.proc is not None and self.reaper is None:
+            # Reap from a timer so a shell slow to exit never blocks the UI;
+            # SIGHUP, then SIGKILL, each after SHELL_EXIT_GRACE seconds
+            now = time.monotonic()
+            self.signals = [(now + SHELL_EXIT_GRACE, signal.SIGHUP),
+                            (now + 2 * SHELL_EXIT_GRACE, signal.SIGKILL)]
+            self.reaper = QTimer(self)
+            self.reaper.setInterval(50)
+            self.reaper.timeout.connect(self.reap)
+            self.reaper.start()
+            self.reap()
+
+    def reap(self):
+        code = self.proc.poll()
+        if code is None:
+            if self.signals and time.monotonic() >= self.signals[0][0]:
+                self.signal_group(self.signals.pop(0)[1])
+            return
+        self.reaper.stop()
+        self.reaper.deleteLater()
+        self.reaper = None
+        self.proc = None
+        self.exited.emit(code)
+
+    def terminate(self):
+        self.signal_group(signal.SIGHUP)
+
+    def signal_group(self, signum):
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, signum)
+            except OSError:
+                self.proc.kill()
+
+
+def split_lsp_messages(data):
+    """Split LSP base-protocol framing (Content-Length headers) off a byte stream.
+
+    Returns (bodies, carry); `carry` is an incomplete header or body to
+    prepend to the next read, since servers may flush a message in pieces.
+    """
+    bodies = []
+    pos = 0
+    while True:
+        header_end = data.find(b"\r\n\r\n", pos)
+        if header_end == -1:
+            break
+        length = None
+        for line in data[pos:header_end].splitlines():
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    pass
+        if length is None:
+            # Not a header block (stray server output); resync after it
+            pos = header_end + 4
+            continue
+        body_start = header_end + 4
+        if len(data) - body_start < length:
+            break
+        bodies.append(data[body_start:body_start + length])
+        pos = body_start + length
+    # Hand a partial message back uncopied; large replies arrive in many reads
+    return bodies, data[pos:] if pos else data
+
+
+def text_change(old, new):
+    """The single edit turning `old` into `new`: (start, end in old, replacement).
+
+    Bisects for the common prefix and suffix, so only slices around the
+    boundary are compared and a keystroke in a large file stays cheap.
+    """
+    lo, hi = 0, min(len(old), len(new))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[lo:mid] == new[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    start = lo
+    lo, hi = 0, min(len(old), len(new)) - start
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:len(old) - lo] == new[len(new) - mid:len(new) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return start, len(old) - lo, new[start:len(new) - lo]
+
+
+def lsp_position(text, offset):
+    """LSP position (line, UTF-16 character) of a str offset into `text`."""
+    line_start = text.rfind('\n', 0, offset) + 1
+    return {"line": text.count('\n', 0, offset),
+            "character": len(text[line_start:offset].encode('utf-16-le')) // 2}
+
+
+def expand_snippet(snippet):
+    """Plain text of an LSP snippet and the offset of its final tab stop ($0), if any.
+
+    Placeholders keep their default text and choices their first option;
+    the editor has no tab-stop navigation beyond placing the cursor.
+    """
+    text = snippet.replace('\\\\', '\x01').replace('\\$', '\x02').replace('\\}', '\x03')
+    text = re.sub(r'\$(?:0(?!\d)|\{0\})', '\x04', text)
+    text = re.sub(r'\$\{0:', '\x04${0:', text)
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r'\$\{\d+:([^{}]*)\}', r'\1', text)
+        text = re.sub(r'\$\{\d+\|([^,|]*)[^|]*\|\}', r'\1', text)
+    text = re.sub(r'\$(?:\d+|\{\d+\})', '', text)
+    text = text.replace('\x01', '\\').replace('\x02', '$').replace('\x03', '}')
+    cursor = text.find('\x04')
+    return text.replace('\x04', ''), (cursor if cursor >= 0 else None)
+
+
+def lsp_server_label(cmd):
+    """Short name for a server command, skipping launchers like npx or python."""
+    names = [os.path.basename(part) for part in cmd if not part.startswith('-')]
+    for name in names:
+        stem = os.path.splitext(name)[0].lower()
+        if stem not in ('npx', 'node', 'python', 'python3', 'py') and not stem.startswith('python3.'):
+            return name
+    return names[0] if names else "lsp"
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, min(len(ordered) - 1, int(len(ordered) * fraction + 0.5) - 1))]
+
+
+def prometheus_labels(**values):
+    parts = []
+    for name, value in values.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class LspMetrics:
+    """Per-server, per-method LSP latency and traffic counters.
+
+    Latency percentiles come from the most recent LSP_METRICS_SAMPLES
+    replies per method; the Prometheus histogram buckets count every reply.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = {}       # (server, method) -> stats dict
+        self.notifications = {}  # (server, direction, method) -> stats dict
+        self.in_flight = {}      # key -> (server, method, sent time)
+        # Connections record from the LSP event loop thread while the panel reads
+        self.lock = threading.Lock()
+
+    def request_stats(self, server, method):
+        stats = self.requests.get((server, method))
+        if stats is None:
+            stats = self.requests[(server, method)] = {
+                "count": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "unanswered": 0,
+                "request_bytes": 0, "request_bytes_max": 0,
+                "response_bytes": 0, "response_bytes_max": 0,
+                "latency_sum": 0.0, "samples": collections.deque(maxlen=LSP_METRICS_SAMPLES),
+                "buckets": [0] * len(LSP_LATENCY_BUCKETS),
+            }
+        return stats
+
+    def request_sent(self, server, method, key, size):
+        with self.lock:
+            stats = self.request_stats(server, method)
+            stats["request_bytes"] += size
+            stats["request_bytes_max"] = max(stats["request_bytes_max"], size)
+            self.in_flight[key] = (server, method, time.perf_counter())
+
+    def response_received(self, key, size, error=False):
+        with self.lock:
+            entry = self.in_flight.pop(key, None)
+            if entry is None:
+                return
+            server, method, sent = entry
+            latency = time.perf_counter() - sent
+            stats = self.request_stats(server, method)
+            stats["count"] += 1
+            stats["errors"] += bool(error)
+            stats["response_bytes"] += size
+            stats["response_bytes_max"] = max(stats["response_bytes_max"], size)
+            stats["latency_sum"] += latency
+            stats["samples"].append(latency)
+            for i, bound in enumerate(LSP_LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats["buckets"][i] += 1
+                    break
+
+    def notification(self, server, direction, method, size):
+        with self.lock:
+            key = (server, direction, method)
+            stats = self.notifications.get(key)
+            if stats is None:
+                stats = self.notifications[key] = {"count": 0, "bytes": 0, "bytes_max": 0,
+                                                   "first": time.time(), "recent": collections.deque(maxlen=1000)}
+            stats["count"] += 1
+            stats["bytes"] += size
+            stats["bytes_max"] = max(stats["bytes_max"], size)
+            stats["recent"].append(time.time())
+
+    def abandon(self, key, reason):
+        """Stop tracking a request that will get no reply; `reason` names the counter to bump."""
+        with self.lock:
+            entry = self.in_flight.pop(key, None)
+            if entry is not None:
+                server, method, _ = entry
+                self.request_stats(server, method)[reason] += 1
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.requests.clear()
+            self.notifications.clear()
+            self.in_flight.clear()
+
+    def snapshot(self):
+        """Plain-dict view of all counters (what the panel shows and the JSON dump holds)."""
+        with self.lock:
+            now = time.time()
+            servers = {}
+            for (server, method), stats in sorted(self.requests.items()):
+                entry = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "timeouts": stats["timeouts"],
+                    "cancelled": stats["cancelled"],
+                    "unanswered": stats["unanswered"],
+                    "request_bytes": stats["request_bytes"],
+                    "request_bytes_max": stats["request_bytes_max"],
+                    "response_bytes": stats["response_bytes"],
+                    "response_bytes_max": stats["response_bytes_max"],
+                }
+                if stats["samples"]:
+                    ordered = sorted(stats["samples"])
+                    entry["latency_ms"] = {
+                        "mean": stats["latency_sum"] / stats["count"] * 1000,
+                        "p50": percentile(ordered, 0.50) * 1000,
+                        "p95": percentile(ordered, 0.95) * 1000,
+                        "p99": percentile(ordered, 0.99) * 1000,
+                        "max": ordered[-1] * 1000,
+                    }
+                servers.setdefault(server, {"requests": {}, "notifications": {}})["requests"][method] = entry
+            for (server, direction, method), stats in sorted(self.notifications.items()):
+                recent = sum(1 for t in stats["recent"] if now - t <= 10)
+                servers.setdefault(server, {"requests": {}, "notifications": {}})["notifications"][
+                    f"{direction} {method}"] = {
+                    "direction": direction,
+                    "method": method,
+                    "count": stats["count"],
+                    "bytes": stats["bytes"],
+                    "bytes_max": stats["bytes_max"],
+                    "rate_per_s": stats["count"] / max(now - stats["first"], 1.0),
+                    "rate_10s_per_s": recent / 10.0,
+                }
+            return {"since": self.started, "time": now, "servers": servers}
+
+    def prometheus(self):
+        """Counters in the Prometheus text exposition format."""
+        with self.lock:
+            lines = [
+                "# HELP eide_lsp_request_duration_seconds LSP request round-trip time.",
+                "# TYPE eide_lsp_request_duration_seconds histogram",
+            ]
+            for (server, method), stats in sorted(self.requests.items()):
+                name = "eide_lsp_request_duration_seconds"
+                cumulative = 0
+                for bound, count in zip(LSP_LATENCY_BUCKETS, stats["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{prometheus_labels(server=server, method=method, le=le)} {cumulative}")
+                tags = prometheus_labels(server=server, method=method)
+                lines.append(f"{name}_sum{tags} {stats['latency_sum']}")
+                lines.append(f"{name}_count{tags} {stats['count']}")
+            for name, field, help_text in (
+                    ("eide_lsp_request_errors_total", "errors", "LSP requests answered with an error."),
+                    ("eide_lsp_request_timeouts_total", "timeouts", "LSP requests that timed out."),
+                    ("eide_lsp_request_cancelled_total", "cancelled", "LSP requests cancelled by the editor."),
+                    ("eide_lsp_request_unanswered_total", "unanswered", "LSP requests whose server exited before replying."),
+                    ("eide_lsp_request_bytes_total", "request_bytes", "Bytes of LSP request bodies sent."),
+                    ("eide_lsp_response_bytes_total", "response_bytes", "Bytes of LSP response bodies received.")):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (server, method), stats in sorted(self.requests.items()):
+                    lines.append(f"{name}{prometheus_labels(server=server, method=method)} {stats[field]}")
+            for name, field, help_text in (
+                    ("eide_lsp_notifications_total", "count", "LSP notifications by direction."),
+                    ("eide_lsp_notification_bytes_total", "bytes", "Bytes of LSP notification bodies by direction.")):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (server, direction, method), stats in sorted(self.notifications.items()):
+                    tags = prometheus_labels(server=server, direction=direction, method=method)
+                    lines.append(f"{name}{tags} {stats[field]}")
+            return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the metrics to `path`: Prometheus text for .prom/.txt, JSON otherwise."""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith(('.prom', '.txt')):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+
+lsp_metrics = LspMetrics()
+
+
+class LspError(Exception):
+    """An error response from a language server."""
+
+    def __init__(self, error):
+        super().__init__(error.get("message", "LSP error"))
+        self.code = error.get("code")
+        self.data = error.get("data")
+
+
+class LspRequestTimeout(Exception):
+    pass
+
+
+class CancellationToken:
+    """Cancels every request it was passed to; cheap enough to make one per keystroke."""
+
+    def __init__(self):
+        self.cancelled = False
+        self.callbacks = []
+
+    def on_cancel(self, callback):
+        if self.cancelled:
+            callback()
+        else:
+            self.callbacks.append(callback)
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+
+
+class LspConnection:
+    """JSON-RPC state for one language server, independent of how bytes move.
+
+    Incoming bytes go to feed(); outgoing messages go to the `write`
+    callable. Every request gets a concurrent.futures.Future that resolves to
+    the result, fails with LspError / LspRequestTimeout / ConnectionError, or
+    is cancelled; pending entries are removed in all of those cases, and
+    expire() must be called periodically to enforce timeouts.
+    """
+
+    def __init__(self, write, name="lsp"):
+        self.write = write
+        self.name = name
+        self.buffer = bytearray()
+        self.next_id = 1
+        self.pending = {}  # id -> (method, future, deadline)
+        self.notification_handler = None
+        # Requests the server sends us; anything else is answered MethodNotFound
+        self.request_handlers = {
+            "workspace/configuration": lambda params: [None] * len(params.get("items", [])),
+            "window/workDoneProgress/create": lambda params: None,
+            "client/registerCapability": lambda params: None,
+        }
+        self.closed = False
+
+    def key(self, req_id):
+        """Identifies one of this connection's requests in the tracer and metrics."""
+        return f"{id(self):x}.{req_id}"
+
+    def send(self, message):
+        body = json.dumps(message, ensure_ascii=False).encode('utf-8')
+        if "id" in message and "method" in message:
+            key = self.key(message["id"])
+            tracer.begin(message["method"], "lsp", key, {"bytes": len(body)})
+            lsp_metrics.request_sent(self.name, message["method"], key, len(body))
+        elif "method" in message:
+            lsp_metrics.notification(self.name, "sent", message["method"], len(body))
+        if wire_log.isEnabledFor(logging.DEBUG):
+            wire_log.debug("%s --> %s", self.name, body.decode('utf-8', errors='replace'))
+        self.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+    def request(self, method, params, timeout=None, token=None):
+        """Send a request and return a Future for its result.
+
+        `timeout` defaults to LSP_REQUEST_TIMEOUTS for the method (or
+        LSP_DEFAULT_TIMEOUT); pass 0 to wait forever. Cancelling the future
+        or the `token` sends $/cancelRequest and forgets the request.
+        """
+        future = concurrent.futures.Future()
+        if self.closed:
+            future.set_exception(ConnectionError(f"{self.name} is not running"))
+            return future
+        req_id = self.next_id
+        self.next_id += 1
+        if timeout is None:
+            timeout = LSP_REQUEST_TIMEOUTS.get(method, LSP_DEFAULT_TIMEOUT)
+        deadline = time.monotonic() + timeout if timeout else None
+        self.pending[req_id] = (method, future, deadline)
+        future.add_done_callback(lambda f: f.cancelled() and self.cancel(req_id))
+        self.send({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params})
+        if token is not None:
+            token.on_cancel(future.cancel)
+        return future
+
+    def notify(self, method, params):
+        if not self.closed:
+            self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def cancel(self, req_id):
+        entry = self.pending.pop(req_id, None)
+        if entry is None:
+            return
+        method, future, _ = entry
+        key = self.key(req_id)
+        tracer.end("lsp", key, {"cancelled": True})
+        lsp_metrics.abandon(key, "cancelled")
+        if not self.closed:
+            self.send({"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": req_id}})
+        future.cancel()
+
+    def expire(self, now=None):
+        """Fail requests past their deadline; returns the number still pending."""
+        now = time.monotonic() if now is None else now
+        for req_id, (method, future, deadline) in list(self.pending.items()):
+            if deadline is not None and now >= deadline:
+                del self.pending[req_id]
+                key = self.key(req_id)
+                tracer.end("lsp", key, {"timed_out": True})
+                lsp_metrics.abandon(key, "timeouts")
+                lsp_log.warning("%s request %s (%s) timed out", self.name, req_id, method)
+                self.send({"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": req_id}})
+                future.set_exception(LspRequestTimeout(f"{method} timed out"))
+        return len(self.pending)
+
+    def close(self):
+        """Fail everything still pending; the server is gone."""
+        self.closed = True
+        pending, self.pending = self.pending, {}
+        for req_id, (method, future, _) in pending.items():
+            key = self.key(req_id)
+            tracer.end("lsp", key, {"closed": True})
+            lsp_metrics.abandon(key, "unanswered")
+            future.set_exception(ConnectionError(f"{self.name} exited before answering {method}"))
+
+    def feed(self, data):
+        self.buffer += data
+        bodies, self.buffer = split_lsp_messages(self.buffer)
+        for body in bodies:
+            self.dispatch(bytes(body).decode('utf-8', errors='replace'), len(body))
+
+    def dispatch(self, data, size):
+        if wire_log.isEnabledFor(logging.DEBUG):
+            wire_log.debug("%s <-- %s", self.name, data)
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError:
+            lsp_log.warning("Could not parse message from %s: %.200s", self.name, data)
+            return
+        method = message.get("method")
+        if method is None:
+            entry = self.pending.pop(message.get("id"), None)
+            if entry is None:
+                # Answer to a cancelled or timed-out request
+                lsp_log.debug("%s sent a late reply to request %s", self.name, message.get("id"))
+                return
+            key = self.key(message["id"])
+            tracer.end("lsp", key, {"bytes": size})
+            lsp_metrics.response_received(key, size, error="error" in message)
+            future = entry[1]
+            if "error" in message:
+                future.set_exception(LspError(message["error"]))
+            else:
+                future.set_result(message.get("result"))
+        elif "id" in message:
+            self.answer(message, size)
+        else:
+            tracer.instant(method, "lsp", {"bytes": size})
+            lsp_metrics.notification(self.name, "received", method, size)
+            if self.notification_handler is not None:
+                try:
+                    self.notification_handler(method, message.get("params") or {})
+                except Exception as e:
+                    lsp_log.warning("Error handling %s from %s: %s", method, self.name, e)
+
+    def answer(self, message, size):
+        method = message["method"]
+        lsp_metrics.notification(self.name, "received", method, size)
+        handler = self.request_handlers.get(method)
+        if handler is None:
+            self.send({"jsonrpc": "2.0", "id": message["id"],
+                       "error": {"code": -32601, "message": f"Unsupported request {method}"}})
+            return
+        self.send({"jsonrpc": "2.0", "id": message["id"], "result": handler(message.get("params") or {})})
 
-            found = self.editor.findFirst(
-                text,
-                use_regex,       # re
-                case_sensitive,  # cs
-                False,           # wo
-                wrap,            # wrap
-                True,            # forward
-                False,           # line
-                False            # column
-            )
 
-            self.last_search = text
+class AsyncLspClient:
+    """Runs a language server with asyncio subprocess streams; needs no Qt.
 
-        if not found:
-            QMessageBox.information(self, "Not Found", "No more occurrences found.")
+    Command-line tools and benchmarks drive it directly:
 
-    def replace(self):
-        if self.editor.hasSelectedText():
-            self.editor.replaceSelectedText(self.replace_input.text())
-        self.find_next()
+        async with AsyncLspClient(cmd) as client:
+            await client.initialize(root)
+            items = await client.request("textDocument/completion", params)
 
-    def replace_all(self):
-        count = 0
-        pattern = self.find_input.text()
-        replace_text = self.replace_input.text()
-        case = self.case_checkbox.isChecked()
-        regex = self.regex_checkbox.isChecked()
+    The editors reach it through LspClient, which runs it on the shared
+    lsp_event_loop() thread. Notifications go to `on_notification(method,
+    params)` and the exit code to `on_exit(code)`, both called on the loop.
+    """
 
-        if not pattern:
-            QMessageBox.information(self, "Empty Search", "Please enter text to find.")
-            return
+    def __init__(self, cmd, name=None):
+        self.cmd = cmd
+        self.name = name or lsp_server_label(cmd)
+        self.process = None
+        self.connection = LspConnection(self.write, self.name)
+        self.connection.notification_handler = self.handle_notification
+        self.on_notification = None
+        self.on_exit = None
+        self.exit_code = None
+        self.exited = None
+        self.tasks = []
+
+    async def start(self):
+        self.exited = asyncio.Event()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.cmd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+        loop = asyncio.get_running_loop()
+        self.tasks = [loop.create_task(self.read_output()), loop.create_task(self.read_errors()),
+                      loop.create_task(self.expire_requests())]
+        return self
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.shutdown()
+
+    def is_running(self):
+        return self.process is not None and not self.connection.closed
+
+    def write(self, data):
+        if self.process is not None and not self.process.stdin.is_closing():
+            self.process.stdin.write(data)
+
+    def handle_notification(self, method, params):
+        if self.on_notification is not None:
+            self.on_notification(method, params)
+
+    def request(self, method, params, timeout=None, token=None):
+        """Awaitable for the result; see LspConnection.request for timeouts and cancelling.
+
+        Cancelling the awaiting task cancels the request on the server too.
+        """
+        return asyncio.wrap_future(self.connection.request(method, params, timeout=timeout, token=token))
+
+    def notify(self, method, params):
+        self.connection.notify(method, params)
+
+    async def initialize(self, root_path=None, capabilities=None, timeout=None):
+        """Send initialize then initialized; returns the server's InitializeResult."""
+        result = await self.request("initialize", {
+            "processId": os.getpid(),
+            "rootUri": "file://" + os.path.abspath(root_path) if root_path else None,
+            "capabilities": capabilities or {},
+        }, timeout=timeout)
+        self.notify("initialized", {})
+        return result
+
+    async def read_output(self):
+        while True:
+            data = await self.process.stdout.read(65536)
+            if not data:
+                break
+            self.connection.feed(data)
+        self.exit_code = await self.process.wait()
+        self.connection.close()
+        for task in self.tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        self.exited.set()
+        lsp_log.debug("LSP server %s exited with code %s", self.name, self.exit_code)
+        if self.on_exit is not None:
+            self.on_exit(self.exit_code)
+
+    async def read_errors(self):
+        async for line in self.process.stderr:
+            lsp_log.debug("%s: %s", self.name, line.decode('utf-8', errors='replace').rstrip())
+
+    async def expire_requests(self):
+        while True:
+            await asyncio.sleep(0.25)
+            self.connection.expire()
+
+    def kill(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+
+    async def wait_closed(self):
+        if self.exited is not None:
+            await self.exited.wait()
+        return self.exit_code
+
+    async def shutdown(self, timeout=5.0):
+        """Ask the server to exit, killing it if it does not within `timeout` seconds."""
+        if not self.is_running():
+            return await self.wait_closed()
+        try:
+            await self.request("shutdown", None, timeout=timeout)
+            self.notify("exit", None)
+            await asyncio.wait_for(self.exited.wait(), timeout)
+        except (LspError, LspRequestTimeout, ConnectionError, asyncio.TimeoutError) as e:
+            lsp_log.info("%s did not shut down cleanly (%s); killing it", self.name, e or type(e).__name__)
+            self.kill()
+        return await self.wait_closed()
 
-        # Move cursor to start
-        self.editor.setCursorPosition(0, 0)
-        while self.editor.findFirst(pattern, False, False, False, case, regex):
-            self.editor.replaceSelectedText(replace_text)
-            count += 1
-        QMessageBox.information(self, "Replace All", f"Replaced {count} occurrences.")
+    async def stop(self):
+        self.kill()
+        return await self.wait_closed()
 
 
-class KeybindingsDialog(QDialog):
-    """Dialog to edit keybindings."""
-    def __init__(self, bindings, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Edit Keybinds")
-        self.bindings = dict(bindings)  # copy
-        layout = QVBoxLayout(self)
+class LspEventLoop:
+    """An asyncio loop on a daemon thread, shared by every editor's LspClient."""
 
-        self.list_widget = QListWidget()
-        for action_name, shortcut in self.bindings.items():
-            sc = shortcut if shortcut else ""
-            self.list_widget.addItem(f"{action_name}: {sc}")
-        layout.addWidget(self.list_widget)
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="eide-lsp", daemon=True)
+        self.thread.start()
 
-        self.edit_btn = QPushButton("Edit Selected")
-        self.edit_btn.clicked.connect(self.edit_selected)
-        layout.addWidget(self.edit_btn)
+    def submit(self, coro):
+        """Run a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
-        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
-        buttons.rejected.connect(self.reject)
-        layout.addWidget(buttons)
+    def call(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
 
-        self.setLayout(layout)
 
-    def edit_selected(self):
-        item = self.list_widget.currentItem()
-        if not item:
-            return
-        text = item.text()
-        if ":" not in text:
-            return
-        action_name, current_shortcut = text.split(":", 1)
-        action_name = action_name.strip()
-        current_shortcut = current_shortcut.strip()
-        new_shortcut, ok = QInputDialog.getText(
-            self, "Edit Shortcut",
-            f"Enter new shortcut for '{action_name}':",
-            text=current_shortcut
-        )
-        if ok:
-            self.bindings[action_name] = new_shortcut.strip() if new_shortcut.strip() else None
-            sc = new_shortcut.strip() if new_shortcut.strip() else ""
-            item.setText(f"{action_name}: {sc}")
+_lsp_event_loop = None
 
-    def accept(self):
-        super().accept()
 
+def lsp_event_loop():
+    global _lsp_event_loop
+    if _lsp_event_loop is None:
+        _lsp_event_loop = LspEventLoop()
+    return _lsp_event_loop
 
-class TerminalDock(QDockWidget):
-    """A dockable terminal allowing user input and displaying output."""
-    send_command = pyqtSignal(str)
 
-    def __init__(self, parent=None):
-        super().__init__("Terminal", parent)
-        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
-        self.setFeatures(QDockWidget.DockWidgetMovable | QDockWidget.DockWidgetFloatable)
+class LspClient(QObject):
+    """Qt-side handle on an AsyncLspClient running on the lsp_event_loop() thread.
 
-        main_widget = QWidget()
-        self.setWidget(main_widget)
-        layout = QVBoxLayout(main_widget)
+    The server's I/O never touches the GUI thread; futures returned by
+    request() are resolved, and the notification/exited signals emitted, on
+    the thread that owns this object, so their callbacks may use widgets.
+    """
+    notification = pyqtSignal(str, object)
+    exited = pyqtSignal(int)
+    resolved = pyqtSignal(object, object)
 
-        self.output = QTextEdit()
-        self.output.setReadOnly(True)
-        self.output.setFont(QFont("Courier New", 10))
-        layout.addWidget(self.output)
+    def __init__(self, cmd, parent=None):
+        super().__init__(parent)
+        self.cmd = cmd
+        self.name = lsp_server_label(cmd)
+        self.events = lsp_event_loop()
+        self.transport = AsyncLspClient(cmd, self.name)
+        self.connection = self.transport.connection
+        # Signals emitted from the loop thread are queued to this object's thread
+        self.transport.on_notification = self.notification.emit
+        self.transport.on_exit = self.exited.emit
+        self.resolved.connect(self.on_resolved)
+        self.exited.connect(self.on_exited)
+        self.running = False
+        # Like the QProcess this replaced, the server dies with its editor
+        self.destroyed.connect(functools.partial(LspClient.release, self.events, self.transport))
+
+    @staticmethod
+    def release(events, transport, *args):
+        transport.on_notification = transport.on_exit = None
+        events.call(transport.kill)
+
+    def start(self):
+        try:
+            self.events.submit(self.transport.start()).result(7.5)
+        except (OSError, concurrent.futures.TimeoutError) as e:
+            lsp_log.warning("Failed to start LSP server %s: %s", " ".join(self.cmd), e)
+            self.events.call(self.transport.kill)
+            return False
+        self.running = True
+        return True
 
-        self.input = QLineEdit()
-        self.input.returnPressed.connect(self.handle_input)
-        layout.addWidget(self.input)
+    def is_running(self):
+        return self.running
 
-    def handle_input(self):
-        cmd = self.input.text()
-        if cmd.strip() == "":
-            return
-        self.output.append(f"> {cmd}")
-        self.send_command.emit(cmd)
-        self.input.clear()
+    def request(self, method, params, timeout=None, token=None):
+        future = concurrent.futures.Future()
+
+        def send():
+            inner = self.connection.request(method, params, timeout=timeout)
+            inner.add_done_callback(lambda f: self.deliver(future, f))
+            future.add_done_callback(lambda f: f.cancelled() and self.events.call(inner.cancel))
+
+        self.events.call(send)
+        if token is not None:
+            token.on_cancel(future.cancel)
+        return future
+
+    def deliver(self, future, inner):
+        try:
+            self.resolved.emit(future, inner)
+        except RuntimeError:
+            pass  # the editor was closed while the request was in flight
+
+    def on_resolved(self, future, inner):
+        if future.done():
+            return  # cancelled on this side first
+        if inner.cancelled():
+            future.cancel()
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+
+    def notify(self, method, params):
+        self.events.call(self.connection.notify, method, params)
+
+    def on_exited(self, exit_code):
+        self.running = False
+
+    def stop(self):
+        """Kill the server; pending requests fail with ConnectionError."""
+        try:
+            self.events.submit(self.transport.stop()).result(2)
+        except concurrent.futures.TimeoutError:
+            lsp_log.warning("%s did not exit after being killed", self.name)
 
-    def append_output(self, text):
-        self.output.append(text)
 
 class Editor(QsciScintilla):
     """Code editor widget with LSP-based autocompletion and hover tooltips for errors."""
@@ -470,6 +3992,9 @@ class Editor(QsciScintilla):
         self.completion_popup = QListWidget()
         self.completion_popup.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint)
         self.completion_popup.hide()
+        self.completion_popup.currentRowChanged.connect(self.on_completion_highlighted)
+        self.completion_items = []  # the LSP items behind the popup rows
+        self.resolve_token = None
 
         self.completion_future = None
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
@@ -486,13 +4011,17 @@ class Editor(QsciScintilla):
         self.setMouseTracking(True)
 
         # LSP attributes
-        self.lsp_process = None
+        self.lsp_client = None
         self.lsp_initialized = False
-        self.lsp_request_id = 0
-        self.pending_requests = {}
+        self.lsp_server_capabilities = {}
+        self.lsp_text = None  # the document as the server last saw it
+        self.completion_token = None
+        self.diagnostics_token = None
+        self.diagnostics_result_id = None
         self.extension = None
         self.lsp_version = 1  # Track file version for LSP
 
+    @traced("lexer")
     def set_lexer_for_extension(self, extension):
         extension = extension.lower()
 
@@ -528,6 +4057,7 @@ class Editor(QsciScintilla):
             self.lexer = None
         self.setLexer(self.lexer)
 
+    @traced("editor")
     def keyPressEvent(self, event):
         if not self.completion_popup.isHidden():
             if event.key() in (Qt.Key_Down, Qt.Key_Up):
@@ -566,14 +4096,25 @@ class Editor(QsciScintilla):
             self.request_completions_async()
 
     def hide_completions(self):
+        if self.resolve_token is not None:
+            self.resolve_token.cancel()
+            self.resolve_token = None
         self.completion_popup.hide()
         self.completion_popup.clear()
+        self.completion_items = []
         self.completions_active = False
+        QToolTip.hideText()
 
     def insert_completion(self, item):
         if not item:
             return
-        completion = item.text()
+        row = self.completion_popup.row(item)
+        data = self.completion_items[row] if 0 <= row < len(self.completion_items) else {}
+        completion = ((data.get('textEdit') or {}).get('newText') or data.get('insertText')
+                      or data.get('label') or item.text())
+        cursor = None
+        if data.get('insertTextFormat') == 2:
+            completion, cursor = expand_snippet(completion)
 
         line, col = self.getCursorPosition()
         current_line = self.text(line)
@@ -583,49 +4124,96 @@ class Editor(QsciScintilla):
 
         self.setSelection(line, start_col, line, col)
         self.replaceSelectedText(completion)
+        if cursor is not None:
+            before = completion[:cursor]
+            if '\n' in before:
+                self.setCursorPosition(line + before.count('\n'), len(before) - before.rfind('\n') - 1)
+            else:
+                self.setCursorPosition(line, start_col + len(before))
+
+    def on_completion_highlighted(self, row):
+        """Fetch documentation for the highlighted item only (completionItem/resolve)."""
+        if self.resolve_token is not None:
+            self.resolve_token.cancel()
+            self.resolve_token = None
+        if not 0 <= row < len(self.completion_items):
+            return
+        item = self.completion_items[row]
+        provider = self.lsp_server_capabilities.get("completionProvider") or {}
+        if item.get("documentation") or not provider.get("resolveProvider") or not self.lsp_client:
+            self.show_completion_documentation(row)
+            return
+        self.resolve_token = CancellationToken()
+        future = self.lsp_client.request("completionItem/resolve", item, token=self.resolve_token)
+        future.add_done_callback(lambda f: self.on_completion_resolved(f, row, item))
+
+    def on_completion_resolved(self, future, row, item):
+        if future.cancelled() or row >= len(self.completion_items) or self.completion_items[row] is not item:
+            return
+        if future.exception() is not None:
+            completion_log.debug("completionItem/resolve failed: %s", future.exception())
+            return
+        self.completion_items[row] = future.result() or item
+        self.show_completion_documentation(row)
+
+    def show_completion_documentation(self, row):
+        item = self.completion_items[row]
+        documentation = item.get("documentation") or ""
+        if isinstance(documentation, dict):
+            documentation = documentation.get("value", "")
+        text = "\n\n".join(part for part in (item.get("detail"), documentation) if part)
+        if not text or self.completion_popup.isHidden():
+            QToolTip.hideText()
+            return
+        if len(text) > 2000:
+            text = text[:2000] + "..."
+        rect = self.completion_popup.visualItemRect(self.completion_popup.item(row))
+        QToolTip.showText(self.completion_popup.mapToGlobal(QPoint(self.completion_popup.width(), rect.top())),
+                          text, self.completion_popup)
 
     def request_completions_async(self):
         self.send_lsp_completion_request()
 
     def send_lsp_initialize(self, file_path):
-        if not self.lsp_process:
-            return
-        self.lsp_request_id += 1
-        req_id = self.lsp_request_id
-        initialize_request = {
-            "jsonrpc": "2.0",
-            "id": req_id,
-            "method": "initialize",
-            "params": {
-                "processId": None,
-                "rootUri": None,
-                "capabilities": {}
-            }
+        if not self.lsp_client:
+            return
+        params = {
+            "processId": os.getpid(),
+            "rootUri": None,
+            "capabilities": LSP_CLIENT_CAPABILITIES
         }
-        self.send_lsp_message(initialize_request)
-        self.pending_requests[req_id] = ("initialize", file_path)
+        future = self.lsp_client.request("initialize", params)
+        future.add_done_callback(lambda f: self.on_lsp_initialized(f, file_path))
+
+    def on_lsp_initialized(self, future, file_path):
+        if future.cancelled() or future.exception() is not None:
+            lsp_log.warning("%s failed to initialize: %s", self.lsp_client.name,
+                            "cancelled" if future.cancelled() else future.exception())
+            return
+        self.lsp_initialized = True
+        self.lsp_server_capabilities = (future.result() or {}).get("capabilities") or {}
+        self.lsp_client.notify("initialized", {})
+        if file_path:
+            self.send_lsp_did_open(file_path)
 
     def send_lsp_did_open(self, file_path):
-        if not self.lsp_process:
+        if not self.lsp_client:
             return
         uri = "file://" + file_path
         text = self.text()
-        did_open = {
-            "jsonrpc": "2.0",
-            "method": "textDocument/didOpen",
-            "params": {
-                "textDocument": {
-                    "uri": uri,
-                    "languageId": self.extension.lstrip('.') if self.extension else '',
-                    "version": self.lsp_version,
-                    "text": text
-                }
+        self.lsp_client.notify("textDocument/didOpen", {
+            "textDocument": {
+                "uri": uri,
+                "languageId": self.extension.lstrip('.') if self.extension else '',
+                "version": self.lsp_version,
+                "text": text
             }
-        }
-        self.send_lsp_message(did_open)
+        })
+        self.lsp_text = text
+        self.request_lsp_diagnostics(uri)
 
     def send_lsp_did_change(self):
-        if not self.lsp_process or not self.lsp_initialized:
+        if not self.lsp_client or not self.lsp_initialized:
             return
         parent_tab_widget = self.parent()
         while parent_tab_widget and not isinstance(parent_tab_widget, QTabWidget):
@@ -642,23 +4230,57 @@ class Editor(QsciScintilla):
         uri = "file://" + file_path
         text = self.text()
         self.lsp_version += 1
-        did_change = {
-            "jsonrpc": "2.0",
-            "method": "textDocument/didChange",
-            "params": {
-                "textDocument": {
-                    "uri": uri,
-                    "version": self.lsp_version
-                },
-                "contentChanges": [
-                    {"text": text}
-                ]
-            }
-        }
-        self.send_lsp_message(did_change)
+        if self.lsp_text is not None and self.lsp_sync_kind() == 2:
+            # Incremental sync: send only the edited range
+            start, end, replacement = text_change(self.lsp_text, text)
+            change = {"range": {"start": lsp_position(self.lsp_text, start),
+                                "end": lsp_position(self.lsp_text, end)},
+                      "text": replacement}
+        else:
+            change = {"text": text}
+        self.lsp_client.notify("textDocument/didChange", {
+            "textDocument": {
+                "uri": uri,
+                "version": self.lsp_version
+            },
+            "contentChanges": [change]
+        })
+        self.lsp_text = text
+        self.request_lsp_diagnostics(uri)
+
+    def lsp_sync_kind(self):
+        """TextDocumentSyncKind the server asked for (1 = full text, 2 = incremental)."""
+        sync = self.lsp_server_capabilities.get("textDocumentSync", 1)
+        if isinstance(sync, dict):
+            return sync.get("change", 1)
+        return sync
+
+    def request_lsp_diagnostics(self, uri):
+        """Pull diagnostics from servers that offer textDocument/diagnostic."""
+        if not self.lsp_server_capabilities.get("diagnosticProvider"):
+            return
+        if self.diagnostics_token is not None:
+            self.diagnostics_token.cancel()
+        self.diagnostics_token = CancellationToken()
+        params = {"textDocument": {"uri": uri}}
+        if self.diagnostics_result_id:
+            params["previousResultId"] = self.diagnostics_result_id
+        future = self.lsp_client.request("textDocument/diagnostic", params, token=self.diagnostics_token)
+        future.add_done_callback(self.on_diagnostics_result)
+
+    def on_diagnostics_result(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            lsp_log.debug("Diagnostic pull failed: %s", future.exception())
+            return
+        report = future.result() or {}
+        self.diagnostics_result_id = report.get("resultId")
+        if report.get("kind") == "full":
+            self.display_error(report.get("items", []))
 
     def send_lsp_completion_request(self):
-        if not self.lsp_initialized or not self.lsp_process:
+        if not self.lsp_initialized or not self.lsp_client:
             return
         line, col = self.getCursorPosition()
         # Get file path from parent tab
@@ -674,99 +4296,38 @@ class Editor(QsciScintilla):
         if not file_path or not os.path.isfile(file_path):
             return
 
+        # Only the newest completion matters; cancel the one still in flight
+        if self.completion_token is not None:
+            self.completion_token.cancel()
+        self.completion_token = CancellationToken()
         uri = "file://" + file_path
-        self.lsp_request_id += 1
-        req_id = self.lsp_request_id
-        completion_request = {
-            "jsonrpc": "2.0",
-            "id": req_id,
-            "method": "textDocument/completion",
-            "params": {
-                "textDocument": {"uri": uri},
-                "position": {"line": line, "character": col}
-            }
-        }
-        self.send_lsp_message(completion_request)
-        self.pending_requests[req_id] = ("completion", None)
-
-    def send_lsp_message(self, msg):
-        if not self.lsp_process:
-            return
-        data = json.dumps(msg, ensure_ascii=False)
-        message = "Content-Length: {}\r\n\r\n{}".format(len(data.encode('utf-8')), data)
-        self.lsp_process.write(message.encode('utf-8'))
-
-    def on_lsp_output(self):
-        print("on_lsp_output called")
-        if not self.lsp_process:
-            return
-        while self.lsp_process.canReadLine():
-            line = self.lsp_process.readLine().data().decode('utf-8', errors='replace').rstrip('\r\n')
-            print("Content-Length:" in line)
-            if "Content-Length:" in line:
-                print(line)
-                parts = line.split("Content-Length:")
-                if len(parts) > 1:
-                    length_str = parts[1].strip()
-                    try:
-                        content_length = int(length_str) + 3
-                    except ValueError:
-                        # If parsing fails, ignore this line and continue
-                        continue
-
-                    # Read the blank line
-                    blank_line = self.lsp_process.readLine()
-
-                    # Now read the actual content
-                    response_data = self.lsp_process.read(content_length).decode('utf-8', errors='replace')
-                    self.handle_lsp_response(response_data)
-            elif "Content-Type:" in line:
-                # Just ignore type for now
-                continue
-            elif line == "":
-                continue
-            else:
-                # Some other header line we don't care about
-                continue
+        future = self.lsp_client.request("textDocument/completion", {
+            "textDocument": {"uri": uri},
+            "position": {"line": line, "character": col}
+        }, token=self.completion_token)
+        future.add_done_callback(self.on_completion_result)
+
+    def on_completion_result(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            completion_log.debug("Completion request failed: %s", future.exception())
+            return
+        self.populate_completions(future.result())
 
-    def handle_lsp_response(self, data):
-        try:
-            response = json.loads(data)
-            print(data)
-        except json.JSONDecodeError:
-            print("JSON parse error in handle_lsp_response. Data received:", data)
-            return
-
-        # Check if this is a response to a request we made
-        if "id" in response and response["id"] in self.pending_requests:
-            req_type, file_path = self.pending_requests.pop(response["id"])
-            print(req_type)
-            if req_type == "initialize":
-                self.lsp_initialized = True
-                initialized = {
-                    "jsonrpc": "2.0",
-                    "method": "initialized",
-                    "params": {}
-                }
-                self.send_lsp_message(initialized)
-                if file_path:
-                    self.send_lsp_did_open(file_path)
-            elif req_type == "completion":
-                items = response.get('result', [])
-                print("populating completions")
-                self.populate_completions(items)
-        else:
-            # This might be a notification, such as publishDiagnostics
-            try:
-                diagnostics = response["params"].get("diagnostics", [])
-                if diagnostics:
-                    self.display_error(diagnostics)
-            except Exception as e:
-                print("Error handling response:", e)
-                print(response)
+    def on_lsp_notification(self, method, params):
+        if method == "textDocument/publishDiagnostics":
+            version = params.get("version")
+            if version is not None and version < self.lsp_version:
+                lsp_log.debug("Dropping diagnostics for version %s (document is at %s)", version, self.lsp_version)
+                return
+            diagnostics = params.get("diagnostics", [])
+            if diagnostics:
+                self.display_error(diagnostics)
 
+    @traced("lsp")
     def display_error(self, diagnostics):
-        print("display_error called")
+        lsp_log.debug("Showing %d diagnostics", len(diagnostics))
         
         # Clear previous error indicators and messages if desired
         # If you want to preserve them until next update, omit these lines:
@@ -850,17 +4411,26 @@ class Editor(QsciScintilla):
         return self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINT, x, y)
 
 
+    @traced("completion")
     def populate_completions(self, items):
         # If result is a dict with 'items' key, extract them
-        print("populate_completions called")
         if isinstance(items, dict):
-            print("items in the dict yo")
             items = items.get('items', [])
         if items is None:
             return
+        completion_log.debug("Showing %d completions", len(items))
+        if self.resolve_token is not None:
+            self.resolve_token.cancel()
+            self.resolve_token = None
         self.completion_popup.clear()
+        self.completion_items = list(items)
         for c in items:
             label = c.get('label', '')
+            details = c.get('labelDetails')
+            if details:
+                label += details.get('detail', '')
+                if details.get('description'):
+                    label += '  ' + details['description']
             self.completion_popup.addItem(label)
 
         if items:
@@ -885,24 +4455,22 @@ class Editor(QsciScintilla):
         if not cmd:
             return  # No LSP for this extension
 
-        self.lsp_process = QProcess(self)
-        self.lsp_process.setProgram(cmd[0])
-        self.lsp_process.setArguments(cmd[1:])
-        self.lsp_process.setProcessChannelMode(QProcess.MergedChannels)
-        self.lsp_process.start()
-
-        if not self.lsp_process.waitForStarted(7500):
-            print("Failed to start LSP server")
-            self.lsp_process = None
+        self.lsp_client = LspClient(cmd, self)
+        if not self.lsp_client.start():
+            self.lsp_client = None
             return
 
-        self.lsp_process.readyReadStandardOutput.connect(self.on_lsp_output)
-        self.lsp_process.finished.connect(lambda: print("LSP server closed"))
+        self.lsp_client.notification.connect(self.on_lsp_notification)
+        self.lsp_client.exited.connect(self.on_lsp_finished)
         self.send_lsp_initialize(file_path)
 
         # Set the lexer after determining the extension
         self.set_lexer_for_extension(extension)
 
+    def on_lsp_finished(self, exit_code):
+        lsp_log.info("LSP server %s exited with code %s", self.lsp_client.name, exit_code)
+        self.lsp_initialized = False
+
     def indicatorDefined(self, indicator):
         """Check if an indicator is already defined."""
         return True
@@ -960,13 +4528,13 @@ class Tab(QWidget):
 
         self.process = QProcess(self)
         self.process.setProcessChannelMode(QProcess.MergedChannels)
+        self.stdout_decoder = StreamDecoder()
+        self.stderr_decoder = StreamDecoder()
+        self.stats_path = new_stats_path()
 
-        if sys.platform.startswith('win'):
-            self.process.setProgram("cmd.exe")
-            self.process.setArguments(["/c", cmd])
-        else:
-            self.process.setProgram("bash")
-            self.process.setArguments(["-c", cmd])
+        program, args = shell_program(cmd, self.stats_path)
+        self.process.setProgram(program)
+        self.process.setArguments(args)
 
         self.process.readyReadStandardOutput.connect(lambda: self.handle_stdout(terminal))
         self.process.readyReadStandardError.connect(lambda: self.handle_stderr(terminal))
@@ -980,15 +4548,20 @@ class Tab(QWidget):
         terminal.append_output(f"$ {cmd}")
 
     def handle_stdout(self, terminal):
-        data = self.process.readAllStandardOutput().data().decode()
-        terminal.append_output(data)
+        data = self.process.readAllStandardOutput().data()
+        terminal.write_segments(self.stdout_decoder.feed(data))
 
     def handle_stderr(self, terminal):
-        data = self.process.readAllStandardError().data().decode()
-        terminal.append_output(data)
+        data = self.process.readAllStandardError().data()
+        terminal.write_segments(self.stderr_decoder.feed(data))
 
     def process_finished(self, exitCode, exitStatus, terminal):
+        terminal.write_segments(self.stdout_decoder.finish())
+        terminal.write_segments(self.stderr_decoder.finish())
         terminal.append_output(f"\nProcess finished with exit code {exitCode}.")
+        stats = read_run_stats(self.stats_path)
+        if stats:
+            terminal.append_output(format_run_stats(stats))
         self.process = None
 
     def upd_ext(self, file_path):
@@ -1007,6 +4580,21 @@ class MainWindow(QMainWindow):
 
         self.run_ways = load_run_ways()
         self.current_bindings = load_keybindings()
+        self.settings = load_settings()
+        configure_logging(self.settings)
+
+        self.workspace_index = WorkspaceIndex(self)
+        self.workspace_index.set_root(QDir.currentPath())
+        self.shell_session = None
+        self.build_cache = BuildCache(
+            self.settings["build_cache_dir"],
+            self.settings["build_cache_max_mb"] * 1024 * 1024
+        )
+        self.benchmark_run = None
+        self.benchmark_pending = False
+        self.test_run = None
+        self.python_kernels = {}
+        self.run_history = RunHistory(self.settings["run_history_file"], self.settings["run_history_per_file"])
 
         self.tabs = QTabWidget()
         self.tabs.setTabBar(CustomTabBar())
@@ -1026,6 +4614,7 @@ class MainWindow(QMainWindow):
 
         # Create Terminal Dock
         self.create_terminal_dock()
+        self.create_jobs_dock()
 
     def create_actions(self):
         self.new_action = QAction("New", self)
@@ -1037,12 +4626,42 @@ class MainWindow(QMainWindow):
         self.open_folder_action = QAction("Open Folder", self)
         self.open_folder_action.triggered.connect(self.open_folder)
 
+        self.quick_open_action = QAction("Quick Open", self)
+        self.quick_open_action.triggered.connect(self.quick_open)
+
         self.save_action = QAction("Save", self)
         self.save_action.triggered.connect(self.save_file)
 
+        self.export_trace_action = QAction("Export Trace", self)
+        self.export_trace_action.triggered.connect(self.export_trace)
+
         self.run_action = QAction("Run", self)
         self.run_action.triggered.connect(self.run_code)
 
+        self.kill_jobs_action = QAction("Kill All Jobs", self)
+        self.kill_jobs_action.triggered.connect(lambda: self.job_manager.kill_all())
+
+        self.benchmark_action = QAction("Benchmark", self)
+        self.benchmark_action.triggered.connect(self.benchmark_code)
+
+        self.run_tests_action = QAction("Run Tests", self)
+        self.run_tests_action.triggered.connect(self.run_tests)
+
+        self.kernel_run_action = QAction("Run in Python Kernel", self)
+        self.kernel_run_action.triggered.connect(lambda: self.run_in_kernel(cell=False))
+
+        self.kernel_cell_action = QAction("Run Cell in Python Kernel", self)
+        self.kernel_cell_action.triggered.connect(lambda: self.run_in_kernel(cell=True))
+
+        self.kernel_interrupt_action = QAction("Interrupt Python Kernel", self)
+        self.kernel_interrupt_action.triggered.connect(self.interrupt_kernel)
+
+        self.kernel_restart_action = QAction("Restart Python Kernel", self)
+        self.kernel_restart_action.triggered.connect(self.restart_kernel)
+
+        self.run_history_action = QAction("Run History", self)
+        self.run_history_action.triggered.connect(self.show_run_history)
+
         self.configure_run_action = QAction("Configure Run Ways", self)
         self.configure_run_action.triggered.connect(self.configure_run_ways)
 
@@ -1062,7 +4681,8 @@ class MainWindow(QMainWindow):
         for action in [self.new_action, self.open_action, self.open_folder_action,
                        self.save_action, self.run_action, self.configure_run_action,
                        self.goto_line_action, self.find_action, self.replace_action,
-                       self.edit_keybinds_action]:
+                       self.edit_keybinds_action, self.quick_open_action, self.benchmark_action,
+                       self.kernel_run_action, self.kernel_cell_action, self.kernel_restart_action]:
             name = action.text()
             shortcut = self.current_bindings.get(name)
             if shortcut:
@@ -1076,10 +4696,23 @@ class MainWindow(QMainWindow):
         file_menu.addAction(self.new_action)
         file_menu.addAction(self.open_action)
         file_menu.addAction(self.open_folder_action)
+        file_menu.addAction(self.quick_open_action)
         file_menu.addAction(self.save_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.export_trace_action)
 
         run_menu = menubar.addMenu("Run")
         run_menu.addAction(self.run_action)
+        run_menu.addAction(self.benchmark_action)
+        run_menu.addAction(self.run_tests_action)
+        run_menu.addSeparator()
+        run_menu.addAction(self.kernel_run_action)
+        run_menu.addAction(self.kernel_cell_action)
+        run_menu.addAction(self.kernel_interrupt_action)
+        run_menu.addAction(self.kernel_restart_action)
+        run_menu.addSeparator()
+        run_menu.addAction(self.kill_jobs_action)
+        run_menu.addAction(self.run_history_action)
         run_menu.addAction(self.configure_run_action)
 
         edit_menu = menubar.addMenu("Edit")
@@ -1110,11 +4743,97 @@ class MainWindow(QMainWindow):
         self.addDockWidget(Qt.LeftDockWidgetArea, self.dock)
 
     def create_terminal_dock(self):
-        self.terminal_dock = TerminalDock(self)
+        self.terminal_dock = TerminalDock(
+            self,
+            scrollback=self.settings["terminal_scrollback_lines"],
+            flush_interval=self.settings["terminal_flush_interval_ms"],
+            spill_to_file=self.settings["terminal_spill_to_file"]
+        )
         self.terminal_dock.send_command.connect(self.handle_terminal_command)
+        self.terminal_dock.send_control.connect(self.handle_terminal_control)
+        self.terminal_dock.shell_mode = SHELL_SESSION_SUPPORTED
         self.addDockWidget(Qt.BottomDockWidgetArea, self.terminal_dock)
 
+    def create_jobs_dock(self):
+        self.job_manager = JobManager(self.settings, self)
+        self.jobs_dock = JobsDock(self.job_manager, self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.jobs_dock)
+        self.tabifyDockWidget(self.terminal_dock, self.jobs_dock)
+        self.tests_dock = TestsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.tests_dock)
+        self.tabifyDockWidget(self.jobs_dock, self.tests_dock)
+        self.lsp_metrics_dock = LspMetricsDock(lsp_metrics, self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.lsp_metrics_dock)
+        self.tabifyDockWidget(self.tests_dock, self.lsp_metrics_dock)
+        self.terminal_dock.raise_()
+        self.job_manager.job_changed.connect(self.record_run)
+
+    def record_run(self, job):
+        if not job.source_path or not job.stats or job.status not in ("finished", "failed"):
+            return
+        previous = self.run_history.record(job.source_path, job.command, job.exit_code, job.stats)
+        if previous and job.status == "finished":
+            comparison = compare_run_stats(job.stats, previous)
+            if comparison:
+                job.output.append_output(comparison)
+
+    def show_run_history(self):
+        idx = self.tabs.currentIndex()
+        path = self.tabs.tabToolTip(idx)
+        if not path:
+            QMessageBox.information(self, "Run History", "The current tab has no file.")
+            return
+        entries = self.run_history.entries(path)
+        if not entries:
+            QMessageBox.information(self, "Run History", f"No recorded runs for {os.path.basename(path)}.")
+            return
+        RunHistoryDialog(path, entries, self).exec_()
+
+    def export_trace(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Export Trace", "eide-trace.json", "Trace files (*.json)")
+        if not fname:
+            return
+        try:
+            count = tracer.export(fname)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write trace:\n{e}")
+            return
+        QMessageBox.information(self, "Export Trace",
+                                f"Exported {count} trace events to {fname}.\nOpen it in ui.perfetto.dev or chrome://tracing.")
+
+    def ensure_shell_session(self):
+        if self.shell_session is not None and self.shell_session.is_running():
+            return self.shell_session
+        session = ShellSession(cwd=self.workspace_index.root, parent=self)
+        session.output.connect(self.terminal_dock.write_segments)
+        session.exited.connect(self.on_shell_exited)
+        output = self.terminal_dock.output
+        columns = max(20, output.viewport().width() // max(1, output.fontMetrics().averageCharWidth()))
+        rows = max(5, output.viewport().height() // max(1, output.fontMetrics().height()))
+        try:
+            session.start(columns, rows)
+        except OSError as e:
+            self.terminal_dock.append_output(f"Could not start shell: {e}")
+            return None
+        self.shell_session = session
+        return session
+
+    def on_shell_exited(self, code):
+        self.terminal_dock.append_output(f"Shell exited with code {code}. The next command starts a new shell.")
+        if self.sender() is self.shell_session:
+            self.shell_session = None
+
+    def handle_terminal_control(self, char):
+        if self.shell_session is not None:
+            self.shell_session.write(char)
+
     def handle_terminal_command(self, cmd):
+        if self.terminal_dock.shell_mode:
+            session = self.ensure_shell_session()
+            if session is not None:
+                session.write(cmd + "\n")
+                return
+            self.terminal_dock.shell_mode = False
         current_tab = self.current_editor_tab()
         if current_tab is None:
             self.terminal_dock.append_output("No active tab to run commands.")
@@ -1143,6 +4862,15 @@ class MainWindow(QMainWindow):
         if folder:
             self.fs_model.setRootPath(folder)
             self.tree_view.setRootIndex(self.fs_model.index(folder))
+            self.workspace_index.set_root(folder)
+
+    def quick_open(self):
+        dialog = QuickOpenDialog(self.workspace_index, self)
+        if dialog.exec_() == QDialog.Accepted:
+            path = dialog.selected_path()
+            if path and os.path.isfile(path):
+                self.open_specific_file(path)
+
     def create_new_tab(self):
         tab = Tab()
         plus_index = self.find_plus_tab()
@@ -1177,8 +4905,9 @@ class MainWindow(QMainWindow):
 
     def open_specific_file(self, fname):
         try:
-            with open(fname, 'r', encoding='utf-8') as f:
-                text = f.read()
+            with tracer.span("read " + os.path.basename(fname), "file", {"path": fname}):
+                with open(fname, 'r', encoding='utf-8') as f:
+                    text = f.read()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
             return
@@ -1219,8 +4948,9 @@ class MainWindow(QMainWindow):
             fname = tooltip
 
         try:
-            with open(fname, 'w', encoding='utf-8') as f:
-                f.write(editor_tab.editor.text())
+            with tracer.span("save " + os.path.basename(fname), "file", {"path": fname}):
+                with open(fname, 'w', encoding='utf-8') as f:
+                    f.write(editor_tab.editor.text())
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not save file:\n{e}")
             return
@@ -1249,9 +4979,11 @@ class MainWindow(QMainWindow):
         return None
 
     def configure_run_ways(self):
-        dialog = RunWaysDialog(self.run_ways, self)
+        dialog = RunWaysDialog(self.run_ways, self, limits=self.settings["run_way_limits"])
         if dialog.exec_() == QDialog.Accepted:
             self.run_ways = load_run_ways()
+            self.settings["run_way_limits"] = dialog.limits
+            save_settings(self.settings)
 
     def run_code(self):
         ways = list(self.run_ways.keys())
@@ -1270,33 +5002,324 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "No Commands", "The selected run way has no commands.")
             return
 
+        tooltip = self.file_to_run()
+        if not tooltip:
+            return
+        steps = [substitute_file(step, tooltip) for step in commands]
+        self.run_steps(f"{way}: {os.path.basename(tooltip)}", steps, tooltip,
+                       limits=self.settings["run_way_limits"].get(way))
+        self.jobs_dock.raise_()
+
+    def file_to_run(self):
+        """Path of the current tab's file, asking to save it first if it has none."""
         current_tab = self.current_editor_tab()
         if current_tab is None:
             QMessageBox.warning(self, "No file", "No file open to run.")
-            return
+            return None
         idx = self.tabs.currentIndex()
         tooltip = self.tabs.tabToolTip(idx)
         if not tooltip or not os.path.isfile(tooltip):
             fname, _ = QFileDialog.getSaveFileName(self, "Save before run", "Untitled.py")
             if not fname:
-                return
+                return None
             try:
                 with open(fname, 'w', encoding='utf-8') as f:
                     f.write(current_tab.editor.text())
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Could not save file:\n{e}")
-                return
+                return None
             self.tabs.setTabText(idx, os.path.basename(fname))
             self.tabs.setTabToolTip(idx, fname)
             tooltip = fname
             current_tab.mark_saved()
-        processed_commands = [cmd.replace("{{file}}", f'{tooltip}') for cmd in commands]
+        return tooltip
+
+    def benchmark_code(self):
+        if self.benchmark_run is not None or self.benchmark_pending:
+            QMessageBox.information(self, "Benchmark", "A benchmark is already running.")
+            return
+        ways = list(self.run_ways.keys())
+        if not ways:
+            QMessageBox.warning(self, "No ways configured", "No run ways configured. Configure them first.")
+            return
+        dialog = BenchmarkDialog(ways, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        way = dialog.selected_way()
+        if split_final_step(self.run_ways.get(way, []))[1] is None:
+            QMessageBox.information(self, "Benchmark", "The last step of the run way must be a command.")
+            return
+        path = self.file_to_run()
+        if not path:
+            return
+        steps, command = split_final_step([substitute_file(step, path) for step in self.run_ways[way]])
+        limits = self.settings["run_way_limits"].get(way)
+        start = lambda: self.start_benchmark(path, command, dialog.runs_spin.value(),
+                                             dialog.warmup_spin.value(), dialog.selected_cpu(),
+                                             dialog.baseline_check.isChecked(), limits)
+        self.terminal_dock.raise_()
+        # Setup steps can take a while; a second Benchmark must not start meanwhile
+        self.benchmark_pending = True
+        if steps:
+            self.run_steps(f"{way}: {os.path.basename(path)} (benchmark setup)", steps, path, on_done=start,
+                           on_failed=self.benchmark_setup_failed)
+        else:
+            start()
+
+    def benchmark_setup_failed(self):
+        self.benchmark_pending = False
+        self.terminal_dock.append_output("Benchmark setup failed; nothing was measured.")
+
+    def run_tests(self):
+        if self.test_run is not None:
+            self.test_run.cancel()
+            return
+        ways = list(self.run_ways.keys())
+        if not ways:
+            QMessageBox.warning(self, "No ways configured", "No run ways configured. Configure them first.")
+            return
+        path = self.file_to_run()
+        if not path:
+            return
+        default_folder = os.path.join(os.path.dirname(path), "tests")
+        dialog = TestRunDialog(ways, default_folder if os.path.isdir(default_folder) else "", self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        folder = dialog.folder_edit.text()
+        way = dialog.selected_way()
+        steps, command = split_final_step([substitute_file(step, path) for step in self.run_ways.get(way, [])])
+        if command is None:
+            QMessageBox.information(self, "Run Tests", "The last step of the run way must be a command.")
+            return
+        try:
+            cases = find_test_cases(folder)
+        except OSError as e:
+            QMessageBox.warning(self, "Run Tests", f"Could not read test folder:\n{e}")
+            return
+        if not cases:
+            QMessageBox.information(self, "Run Tests", "No *.in files with matching *.out files in that folder.")
+            return
+        start = lambda: self.start_tests(command, cases, dialog.time_spin.value(),
+                                         dialog.memory_spin.value(), dialog.workers_spin.value())
+        if steps:
+            self.run_steps(f"{way}: {os.path.basename(path)} (test setup)", steps, path, on_done=start)
+        else:
+            start()
+
+    def start_tests(self, command, cases, time_limit, memory_limit_mb, workers):
+        run = TestSuiteRun(command, cases, time_limit, memory_limit_mb, workers, parent=self)
+        self.tests_dock.reset(cases, command)
+        run.result.connect(self.tests_dock.update_case)
+        run.finished.connect(lambda summary: self.tests_finished(run, summary))
+        self.test_run = run
+        self.run_tests_action.setText("Stop Tests")
+        self.tests_dock.raise_()
+        run.start()
+
+    def tests_finished(self, run, summary):
+        self.test_run = None
+        self.run_tests_action.setText("Run Tests")
+        run.deleteLater()
+        self.tests_dock.show_summary(summary)
+
+    def python_kernel(self, start=True):
+        """The warm Python kernel of the current workspace, started on first use."""
+        root = self.workspace_index.root
+        kernel = self.python_kernels.get(root)
+        if kernel is not None and kernel.is_running():
+            return kernel
+        if not start:
+            return None
+        kernel = PythonKernel(self.settings["python_kernel_interpreter"], cwd=root, parent=self)
+        kernel.output.connect(self.terminal_dock.write_segments)
+        kernel.message.connect(lambda text: self.terminal_dock.append_output(f"[kernel] {text}"))
+        kernel.started.connect(lambda version: self.terminal_dock.append_output(
+            f"[kernel] Python {version} started in {root}"))
+        kernel.finished_request.connect(self.on_kernel_request_finished)
+        kernel.exited.connect(lambda code: self.terminal_dock.append_output(
+            f"[kernel] Exited with code {code}; the next run starts a new kernel."))
+        kernel.start()
+        self.python_kernels[root] = kernel
+        return kernel
+
+    def run_in_kernel(self, cell=False):
+        tab = self.current_editor_tab()
+        if tab is None:
+            QMessageBox.warning(self, "No file", "No file open to run.")
+            return
+        idx = self.tabs.currentIndex()
+        filename = self.tabs.tabToolTip(idx) or os.path.join(self.workspace_index.root or "", "untitled.py")
+        source = tab.editor.text()
+        first_line, last_line = 0, None
+        label = os.path.basename(filename)
+        if cell:
+            cells = python_cells(source)
+            if tab.editor.hasSelectedText():
+                line_from, _, line_to, _ = tab.editor.getSelection()
+            else:
+                line_from = line_to = tab.editor.getCursorPosition()[0]
+            chosen = [(start, end) for start, end in cells if start <= line_to and end > line_from]
+            first_line, last_line = chosen[0][0], chosen[-1][1]
+            label = f"{label} lines {first_line + 1}-{last_line}"
+        kernel = self.python_kernel()
+        if not kernel.is_running():
+            return  # failed to start; the reason is already in the terminal
+        if kernel.is_busy():
+            self.terminal_dock.append_output(f"[kernel] Queued {label}")
+        else:
+            self.terminal_dock.append_output(f"[kernel] Running {label}")
+        kernel.execute(source, filename, first_line, last_line, label)
+        self.terminal_dock.raise_()
+
+    def on_kernel_request_finished(self, request_id, ok, elapsed):
+        status = "done" if ok else "failed"
+        self.terminal_dock.append_output(f"[kernel] {status} in {elapsed:.3f}s")
+
+    def interrupt_kernel(self):
+        kernel = self.python_kernel(start=False)
+        if kernel is not None:
+            kernel.interrupt()
+
+    def restart_kernel(self):
+        kernel = self.python_kernels.pop(self.workspace_index.root, None)
+        if kernel is not None:
+            kernel.shutdown()
+            kernel.deleteLater()
+            self.terminal_dock.append_output("[kernel] Restarting...")
+        self.python_kernel()
+
+    def start_benchmark(self, path, command, runs, warmups, cpu, save_baseline, limits=None):
+        pinned = f" pinned to CPU {cpu}" if cpu is not None else ""
+        self.terminal_dock.append_output(f"Benchmarking {command}: {warmups} warmup + {runs} runs{pinned}")
+        run = BenchmarkRun(command, runs, warmups, cpu, limits, parent=self)
+        run.progress.connect(self.terminal_dock.append_output)
+        run.finished.connect(lambda summary: self.benchmark_finished(run, path, command, summary, save_baseline))
+        self.benchmark_run = run
+        self.benchmark_pending = False
+        run.start()
+
+    def benchmark_finished(self, run, path, command, summary, save_baseline):
+        self.benchmark_run = None
+        run.deleteLater()
+        if summary is None:
+            return
+        self.terminal_dock.append_output(format_timing_summary(summary))
+        if run.cpu_samples:
+            self.terminal_dock.append_output(
+                f"cpu mean {statistics.mean(run.cpu_samples):.4f}s  max RSS {run.max_rss_kb / 1024:.1f} MB")
+        baselines = self.load_benchmark_baselines()
+        per_file = baselines.setdefault(os.path.abspath(path), {})
+        baseline = per_file.get(command)
+        if baseline:
+            self.terminal_dock.append_output(compare_to_baseline(summary, baseline))
+        if save_baseline or baseline is None:
+            per_file[command] = dict(summary, time=time.time())
+            self.save_benchmark_baselines(baselines)
+            self.terminal_dock.append_output("Saved as baseline.")
+
+    def load_benchmark_baselines(self):
+        try:
+            with open(self.settings["benchmark_baseline_file"], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_benchmark_baselines(self, data):
+        path = self.settings["benchmark_baseline_file"]
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+        except OSError as e:
+            run_log.warning("Could not save benchmark baseline: %s", e)
+
+    def run_steps(self, name, steps, source_path, notes=None, on_done=None, limits=None, on_failed=None):
+        """Run run-way steps in order as jobs; cached build steps are skipped on a hit.
+
+        `on_done` is called once every step has succeeded, `on_failed` once a
+        step fails or is stopped. `limits` apply to command steps only; build
+        steps run unrestricted.
+        """
+        if is_step_graph(steps):
+            self.run_step_graph(name, steps, source_path, on_done, limits, on_failed)
+            return
+        notes = list(notes or [])
+        while steps and isinstance(steps[0], dict):
+            step = steps[0]
+            if "build" not in step or "output" not in step:
+                notes.append(f"Skipping unsupported run-way step: {describe_step(step)}")
+                steps = steps[1:]
+                continue
+            key = self.build_cache.key(step["build"], step.get("source", source_path))
+            if not self.build_cache.restore(key, step["output"]):
+                job = self.job_manager.start_job(f"{name} (build)", step["build"], source_path=source_path)
+                for note in notes:
+                    job.output.append_output(note)
+                job.finished.connect(
+                    lambda job, key=key, step=step, rest=steps[1:]:
+                        self.on_build_finished(job, name, key, step, rest, source_path, on_done, limits,
+                                               on_failed)
+                )
+                return
+            notes.append(f"[build cache hit] {os.path.basename(step['output'])} is up to date, skipped: {step['build']}")
+            steps = steps[1:]
+
+        if not steps:
+            for note in notes:
+                self.terminal_dock.append_output(note)
+            if on_done:
+                on_done()
+            return
+        count = 0
+        while count < len(steps) and isinstance(steps[count], str):
+            count += 1
         if sys.platform.startswith('win'):
             separator = ' && '
         else:
             separator = ' ; '
-        combined_cmd = separator.join(processed_commands)
-        current_tab.run_command(combined_cmd, self.terminal_dock)
+        combined_cmd = separator.join(steps[:count])
+        job = self.job_manager.start_job(name, combined_cmd, source_path=source_path, limits=limits)
+        for note in notes:
+            job.output.append_output(note)
+        rest = steps[count:]
+        if rest or on_done or on_failed:
+            job.finished.connect(lambda job: self.continue_steps(job, name, rest, source_path, on_done, limits,
+                                                                 on_failed))
+
+    def run_step_graph(self, name, steps, source_path, on_done=None, limits=None, on_failed=None):
+        try:
+            run = StepGraphRun(name, steps, source_path, self.job_manager, self.build_cache, limits=limits,
+                               parent=self)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Run Way", str(e))
+            if on_failed:
+                on_failed()
+            return
+        run.finished.connect(self.terminal_dock.append_output)
+        if on_done or on_failed:
+            run.finished.connect(lambda _: self.step_graph_done(run, on_done, on_failed))
+        run.finished.connect(lambda _: run.deleteLater())
+        run.start()
+
+    def step_graph_done(self, run, on_done, on_failed):
+        callback = on_done if run.succeeded() else on_failed
+        if callback:
+            callback()
+
+    def continue_steps(self, job, name, rest, source_path, on_done=None, limits=None, on_failed=None):
+        if job.status == "finished":
+            self.run_steps(name, rest, source_path, on_done=on_done, limits=limits, on_failed=on_failed)
+        elif on_failed:
+            on_failed()
+
+    def on_build_finished(self, job, name, key, step, rest, source_path, on_done=None, limits=None,
+                          on_failed=None):
+        if job.status != "finished" or not os.path.isfile(step["output"]):
+            if on_failed:
+                on_failed()
+            return
+        self.build_cache.store(key, step["output"])
+        self.run_steps(name, rest, source_path, on_done=on_done, limits=limits, on_failed=on_failed)
 
     def close_tab(self, index):
         if self.tabs.tabText(index) == "+":
@@ -1326,6 +5349,15 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.No:
                 event.ignore()
                 return
+        if self.shell_session is not None:
+            self.shell_session.terminate()
+        self.job_manager.kill_all()
+        if self.benchmark_run is not None:
+            self.benchmark_run.cancel()
+        if self.test_run is not None:
+            self.test_run.cancel()
+        for kernel in self.python_kernels.values():
+            kernel.shutdown()
         event.accept()
 
     def goto_line(self):
@@ -1384,12 +5416,382 @@ class CustomTabBar(QTabBar):
         return btn
 
 
+def event_type_names():
+    """Map QEvent type numbers to their enum names for log output."""
+    names = {}
+    for name in dir(QEvent):
+        value = getattr(QEvent, name)
+        if isinstance(value, QEvent.Type):
+            names.setdefault(int(value), name)
+    return names
+
+
+class EventWatchdog:
+    """Times events dispatched through the application and logs slow ones.
+
+    A sampler thread grabs the GUI thread's Python stack while a handler is
+    still over budget, so the log shows where the time went, not just which
+    event was slow. Only events owned by one of `watched_types` (the object
+    itself or an ancestor) are reported.
+    """
+
+    def __init__(self, budget_ms, watched_types, stream=None):
+        self.budget = budget_ms / 1000.0
+        self.watched_types = tuple(watched_types)
+        self.stream = stream or sys.stderr
+        self.type_names = event_type_names()
+        self.active = []  # [start, stack or None] per nested dispatch
+        self.slow = collections.Counter()
+        self.worst = {}
+        self.main_thread = threading.get_ident()
+        self.running = True
+        self.sampler = threading.Thread(target=self.sample, name="eide-watchdog", daemon=True)
+        self.sampler.start()
+
+    def sample(self):
+        interval = max(self.budget / 4, 0.001)
+        while self.running:
+            time.sleep(interval)
+            now = time.perf_counter()
+            pending = [entry for entry in list(self.active) if entry[1] is None and now - entry[0] > self.budget]
+            if not pending:
+                continue
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            for entry in pending:
+                entry[1] = stack
+
+    def owner(self, receiver):
+        obj = receiver
+        while obj is not None:
+            if isinstance(obj, self.watched_types):
+                return obj
+            obj = obj.parent()
+        return None
+
+    def dispatch(self, dispatch, receiver, event):
+        entry = [time.perf_counter(), None]
+        event_type = int(event.type())
+        self.active.append(entry)
+        try:
+            return dispatch(receiver, event)
+        finally:
+            self.active.pop()
+            elapsed = time.perf_counter() - entry[0]
+            if elapsed > self.budget:
+                self.report_slow(receiver, event_type, elapsed, entry[1])
+
+    def report_slow(self, receiver, event_type, elapsed, stack):
+        try:
+            owner = self.owner(receiver)
+        except RuntimeError:  # receiver deleted by its own handler
+            return
+        if owner is None:
+            return
+        name = self.type_names.get(event_type, str(event_type))
+        key = (type(owner).__name__, name)
+        self.slow[key] += 1
+        self.worst[key] = max(self.worst.get(key, 0.0), elapsed)
+        target = type(receiver).__name__
+        if receiver is not owner:
+            target += " in " + type(owner).__name__
+        tracer.complete(name, "qt-event", time.perf_counter() - elapsed, {"receiver": target})
+        self.stream.write(f"[watchdog] {elapsed * 1000:.1f} ms handling {name} on {target} "
+                          f"(depth {len(self.active)})\n")
+        if stack is None:
+            # Finished before the sampler saw it; fall back to the dispatch site
+            stack = traceback.extract_stack()[:-2]
+        self.stream.write(self.format_stack(stack))
+        self.stream.flush()
+
+    def format_stack(self, stack):
+        """Format a stack without the watchdog's own dispatch frames."""
+        frames = [f for f in stack if not (f.filename == __file__ and f.name in ("notify", "dispatch"))]
+        inside_qt = bool(stack) and stack[-1].filename == __file__ and stack[-1].name in ("notify", "dispatch")
+        text = "".join(traceback.StackSummary.from_list(frames[-12:]).format())
+        if inside_qt:
+            text += "  (no Python frames below this point: the time was spent inside Qt)\n"
+        return text
+
+    def stop(self):
+        self.running = False
+        if not self.slow:
+            return
+        self.stream.write(f"[watchdog] slow events over {self.budget * 1000:.0f} ms:\n")
+        for (owner, name), count in self.slow.most_common():
+            self.stream.write(f"  {count:>5}x  {name:<24} {owner:<20} "
+                              f"worst {self.worst[(owner, name)] * 1000:.1f} ms\n")
+        self.stream.flush()
+
+
+class InstrumentedApplication(QApplication):
+    """QApplication that routes every event through an EventWatchdog."""
+
+    def __init__(self, argv, watchdog):
+        super().__init__(argv)
+        self.watchdog = watchdog
+
+    def notify(self, receiver, event):
+        return self.watchdog.dispatch(super().notify, receiver, event)
+
+
+def parse_instrumentation_args(argv):
+    """Pull --watchdog[=MS] and --profile[=PATH] out of argv.
+
+    EIDE_WATCHDOG and EIDE_PROFILE set the same options from the environment.
+    Returns (budget_ms or None, profile path or None, remaining argv).
+    """
+    budget = os.environ.get("EIDE_WATCHDOG") or None
+    profile = os.environ.get("EIDE_PROFILE") or None
+    rest = []
+    for arg in argv:
+        if arg == "--watchdog":
+            budget = "16"
+        elif arg.startswith("--watchdog="):
+            budget = arg.split("=", 1)[1]
+        elif arg == "--profile":
+            profile = "eide-profile.prof"
+        elif arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+    if budget is not None:
+        try:
+            budget = float(budget)
+        except ValueError:
+            budget = 16.0
+    return budget, profile, rest
+
+
+def write_profile(profiler, path):
+    """Save raw cProfile stats to `path` and a readable summary next to it."""
+    profiler.dump_stats(path)
+    with open(path + ".txt", "w", encoding="utf-8") as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats("cumulative").print_stats(60)
+        stats.sort_stats("tottime").print_stats(30)
+    sys.stderr.write(f"Profile written to {path} ({path}.txt)\n")
+
+
+def collect_check_files(paths):
+    """Files under `paths` that a server in LSP_SERVER_COMMANDS handles, without duplicates.
+
+    Directories are walked recursively, skipping hidden ones and
+    INDEX_IGNORED_DIRS; files named explicitly are kept whatever their extension
+    so that unsupported ones get reported.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in INDEX_IGNORED_DIRS)
+                files += [os.path.join(root, name) for name in sorted(names)
+                          if os.path.splitext(name)[1].lower() in LSP_SERVER_COMMANDS]
+        else:
+            files.append(path)
+    return list(dict.fromkeys(os.path.abspath(f) for f in files))
+
+
+class BatchDiagnostics:
+    """Opens many files in one language server and keeps what it publishes for each.
+
+    At most `jobs` documents are open at once. A file is done once the
+    server has published for it and then stayed quiet for `settle` seconds
+    (servers often send an early empty list before the real one); files that
+    get nothing within `timeout` seconds are reported as failures.
+    """
+
+    def __init__(self, cmd, files, jobs=16, timeout=30.0, settle=0.3):
+        self.cmd = cmd
+        self.files = files
+        self.jobs = jobs
+        self.timeout = timeout
+        self.settle = settle
+        self.client = AsyncLspClient(cmd)
+        self.client.on_notification = self.on_notification
+        self.client.on_exit = self.on_exit
+        self.waiting = {}  # uri -> (path, asyncio.Event)
+        self.results = {}
+        self.failures = {}
+
+    def on_notification(self, method, params):
+        if method != "textDocument/publishDiagnostics":
+            return
+        entry = self.waiting.get(urllib.parse.unquote(params.get("uri", "")))
+        if entry is not None:
+            path, event = entry
+            self.results[path] = params.get("diagnostics") or []
+            event.set()
+
+    def on_exit(self, exit_code):
+        for path, event in self.waiting.values():
+            event.set()
+
+    async def run(self):
+        try:
+            await self.client.start()
+        except OSError as e:
+            for path in self.files:
+                self.failures[path] = f"could not start {' '.join(self.cmd)}: {e}"
+            return self
+        try:
+            await self.client.initialize(os.getcwd(), {
+                "textDocument": {"publishDiagnostics": {"relatedInformation": True, "versionSupport": True}},
+            })
+            slots = asyncio.Semaphore(self.jobs)
+            await asyncio.gather(*(self.check(path, slots) for path in self.files))
+        except (LspError, LspRequestTimeout, ConnectionError) as e:
+            for path in self.files:
+                if path not in self.results:
+                    self.failures.setdefault(path, f"{self.client.name} failed: {e}")
+        finally:
+            await self.client.shutdown()
+        return self
+
+    async def check(self, path, slots):
+        async with slots:
+            if not self.client.is_running():
+                self.failures[path] = f"{self.client.name} exited"
+                return
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError as e:
+                self.failures[path] = str(e)
+                return
+            uri = "file://" + path
+            event = asyncio.Event()
+            self.waiting[uri] = (path, event)
+            extension = os.path.splitext(path)[1].lower()
+            self.client.notify("textDocument/didOpen", {"textDocument": {
+                "uri": uri,
+                "languageId": LSP_LANGUAGE_IDS.get(extension, extension.lstrip('.')),
+                "version": 1,
+                "text": text,
+            }})
+            try:
+                await asyncio.wait_for(event.wait(), self.timeout)
+                while self.settle and self.client.is_running():
+                    event.clear()
+                    await asyncio.wait_for(event.wait(), self.settle)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                del self.waiting[uri]
+            if self.client.is_running():
+                self.client.notify("textDocument/didClose", {"textDocument": {"uri": uri}})
+            if path not in self.results:
+                self.failures[path] = (f"no diagnostics within {self.timeout:g}s" if self.client.is_running()
+                                       else f"{self.client.name} exited")
+
+
+async def check_files(files, jobs, timeout, settle):
+    """Run one BatchDiagnostics per distinct server command, all at once."""
+    groups = {}
+    unsupported = {}
+    for path in files:
+        cmd = LSP_SERVER_COMMANDS.get(os.path.splitext(path)[1].lower())
+        if cmd:
+            groups.setdefault(tuple(cmd), []).append(path)
+        else:
+            unsupported[path] = "no language server for this file type"
+    checks = await asyncio.gather(*(BatchDiagnostics(list(cmd), paths, jobs, timeout, settle).run()
+                                    for cmd, paths in groups.items()))
+    results = {}
+    failures = dict(unsupported)
+    for check in checks:
+        results.update(check.results)
+        failures.update(check.failures)
+    return results, failures
+
+
+def format_diagnostic(path, diagnostic):
+    start = diagnostic.get("range", {}).get("start", {})
+    severity = DIAGNOSTIC_SEVERITIES.get(diagnostic.get("severity"), "error")
+    source = f" [{diagnostic['source']}]" if diagnostic.get("source") else ""
+    message = str(diagnostic.get("message", "")).replace("\n", " ")
+    line, column = start.get("line", 0) + 1, start.get("character", 0) + 1
+    return f"{os.path.relpath(path)}:{line}:{column}: {severity}: {message}{source}"
+
+
+def run_check(argv):
+    """`eide+lspv2.py --check PATH...`: print the servers' diagnostics without opening a window.
+
+    Exit status is 1 if any error was reported, 2 if some files could not be
+    checked, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog=os.path.basename(__file__) + " --check",
+                                     description="Collect LSP diagnostics for files without opening the editor.")
+    parser.add_argument("paths", nargs="+", help="files or directories to check")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON to PATH ('-' for stdout)")
+    parser.add_argument("--jobs", type=int, default=16, help="documents open at once per server (default 16)")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds to wait for a file's first diagnostics (default 30)")
+    parser.add_argument("--settle", type=float, default=300,
+                        help="ms without further updates before a file is done (default 300)")
+    args = parser.parse_args(argv)
+    configure_logging(load_settings() if os.path.exists(SETTINGS_FILE) else DEFAULT_SETTINGS)
+
+    files = collect_check_files(args.paths)
+    started = time.perf_counter()
+    results, failures = asyncio.run(check_files(files, max(1, args.jobs), args.timeout, args.settle / 1000.0))
+    elapsed = time.perf_counter() - started
+
+    counts = collections.Counter(DIAGNOSTIC_SEVERITIES.get(d.get("severity"), "error")
+                                 for diagnostics in results.values() for d in diagnostics)
+    if args.json:
+        report = {
+            "files": {path: results[path] for path in sorted(results)},
+            "failures": dict(sorted(failures.items())),
+            "summary": dict(counts, files=len(results), failed=len(failures), seconds=elapsed),
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    if args.json != '-':
+        for path in sorted(results):
+            diagnostics = sorted(results[path], key=lambda d: (d.get("range", {}).get("start", {}).get("line", 0),
+                                                               d.get("range", {}).get("start", {}).get("character", 0)))
+            for diagnostic in diagnostics:
+                print(format_diagnostic(path, diagnostic))
+        for path, reason in sorted(failures.items()):
+            print(f"{os.path.relpath(path)}: not checked: {reason}")
+    sys.stderr.write(f"Checked {len(results)} file(s) in {elapsed:.1f}s: {counts['error']} error(s), "
+                     f"{counts['warning']} warning(s), {len(failures)} not checked\n")
+    if counts["error"]:
+        return 1
+    return 2 if failures else 0
+
+
 def main():
-    app = QApplication(sys.argv)
+    if len(sys.argv) > 1 and sys.argv[1] == "--check":
+        sys.exit(run_check(sys.argv[2:]))
+    budget, profile_path, argv = parse_instrumentation_args(sys.argv)
+    watchdog = None
+    if budget is not None:
+        watchdog = EventWatchdog(budget, (Editor, Tab, MainWindow))
+        app = InstrumentedApplication(argv, watchdog)
+    else:
+        app = QApplication(argv)
+    profiler = None
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
     window = MainWindow()
     window.resize(1000, 600)
     window.show()
-    sys.exit(app.exec_())
+    code = app.exec_()
+    if profiler is not None:
+        profiler.disable()
+        write_profile(profiler, profile_path)
+    if watchdog is not None:
+        watchdog.stop()
+    sys.exit(code)
 
 
 if __name__ == '__main__':
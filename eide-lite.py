@@ -1,9 +1,17 @@
 import os
 import sys
+import re
 import json
-import jedi
 import copy  # Added for deep copying
-import concurrent.futures
+import time
+import collections
+import threading
+import traceback
+import cProfile
+import pstats
+import logging
+import contextlib
+import functools
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QFileDialog, QTabWidget, QDialog,
     QDialogButtonBox, QFormLayout, QLineEdit, QHBoxLayout, QPushButton,
@@ -12,7 +20,7 @@ from PyQt5.QtWidgets import (
     QSpacerItem, QSizePolicy, QPlainTextEdit, QCheckBox, QTextEdit, QSplitter
 )
 from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import Qt, QDir, QModelIndex, QProcess, pyqtSignal, QPoint, QEvent
+from PyQt5.QtCore import Qt, QDir, QModelIndex, QProcess, pyqtSignal, QPoint, QObject, QEvent, QTimer
 from PyQt5.Qsci import (
     QsciScintillaBase,
     QsciScintilla,
@@ -39,6 +47,12 @@ from PyQt5.QtWidgets import QFileSystemModel
 CONFIG_FILE = "run_ways.json"
 KEYBINDINGS_FILE = "keybindings.json"
 
+# Per-subsystem loggers, quiet below WARNING unless enabled through EIDE_LOG
+# (e.g. EIDE_LOG=completion=debug,run=debug)
+log = logging.getLogger("eide")
+completion_log = logging.getLogger("eide.completion")
+run_log = logging.getLogger("eide.run")
+
 DEFAULT_KEYBINDINGS = {
     "New": "Ctrl+N",
     "Open File": "Ctrl+O",
@@ -52,8 +66,124 @@ DEFAULT_KEYBINDINGS = {
     "Edit Keybinds": None
 }
 
-# Create a custom event type
-COMPLETIONS_EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
+# Top-level modules named in import statements, preloaded into jedi when a file opens
+IMPORT_RE = re.compile(r'^[ \t]*(?:from[ \t]+([A-Za-z_]\w*)|import[ \t]+([A-Za-z_]\w*))', re.MULTILINE)
+
+# Spans kept for Export Trace (oldest dropped first)
+TRACE_BUFFER_EVENTS = 200000
+
+# jedi runs in its own process so inference never competes with the GUI for the GIL
+JEDI_WORKER_MEMORY_CAP_MB = 1024
+# Hard address-space limit set inside the worker, in case one request runs away
+JEDI_WORKER_ADDRESS_SPACE_MB = 4 * JEDI_WORKER_MEMORY_CAP_MB
+JEDI_WORKER_MAX_FAILED_STARTS = 3
+# A request that gets no reply in this long restarts the worker
+JEDI_REQUEST_TIMEOUT_MS = 15000
+JEDI_WORKER = r'''
+import json, os, sys
+import jedi
+try:
+    import resource
+except ImportError:
+    resource = None
+
+if resource is not None and len(sys.argv) > 1:
+    # A runaway inference raises MemoryError here instead of swapping the machine
+    limit = int(sys.argv[1]) * 1024 * 1024
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+# Anything jedi prints must not end up in the reply stream
+out = sys.stdout
+sys.stdout = sys.stderr
+root = None
+projects = {}
+documents = {}
+script_key = None
+script = None
+
+
+def project_for(path):
+    if path and root and os.path.abspath(path).startswith(root + os.sep):
+        folder = root
+    elif path:
+        folder = os.path.dirname(os.path.abspath(path))
+    else:
+        folder = root or os.getcwd()
+    if folder not in projects:
+        projects[folder] = jedi.Project(folder)
+    return projects[folder]
+
+
+def reply(message):
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        message["rss_kb"] = rss // 1024 if sys.platform == "darwin" else rss
+    out.write(json.dumps(message) + "\n")
+    out.flush()
+
+
+for line in sys.stdin:
+    request = json.loads(line)
+    op = request["op"]
+    if op == "root":
+        root = request["path"]
+        continue
+    if op == "close":
+        documents.pop(request["doc"], None)
+        continue
+    try:
+        if op == "complete":
+            doc = request["doc"]
+            if "text" in request:
+                text = request["text"]
+            else:
+                start, end, new = request["edit"]
+                old = documents.get(doc)
+                text = None if old is None else old[:start] + new + old[end:]
+            if text is None or len(text) != request["length"]:
+                documents.pop(doc, None)
+                reply({"id": request["id"], "resync": True})
+                continue
+            documents[doc] = text
+            key = (doc, request["path"], text)
+            if script_key != key:
+                script = jedi.Script(code=text, path=request["path"], project=project_for(request["path"]))
+                script_key = key
+            completions = script.complete(line=request["line"] + 1, column=request["col"])
+            reply({"id": request["id"], "completions": [c.name for c in completions]})
+        elif op == "preload":
+            name = request["name"]
+            jedi.Script(f"import {name}\n{name}.", project=project_for(request["path"])).complete(2, len(name) + 1)
+            reply({"id": request["id"]})
+    except Exception as e:
+        reply({"id": request["id"], "error": f"{type(e).__name__}: {e}"})
+'''
+
+
+def text_edit(old, new):
+    """Smallest single replacement (start, end, text) turning `old` into `new`."""
+    limit = min(len(old), len(new))
+    start = 0
+    # Compare in blocks first; slice comparisons run at C speed
+    while start + 4096 <= limit and old[start:start + 4096] == new[start:start + 4096]:
+        start += 4096
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old - 4096 >= start and end_new - 4096 >= start and \
+            old[end_old - 4096:end_old] == new[end_new - 4096:end_new]:
+        end_old -= 4096
+        end_new -= 4096
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    return [start, end_old, new[start:end_new]]
 
 def load_run_ways():
     if os.path.exists(CONFIG_FILE):
@@ -83,6 +213,125 @@ def save_keybindings(data):
         json.dump(data, f, indent=4)
 
 
+def configure_logging():
+    """Apply subsystem log levels from EIDE_LOG ("completion=debug,run"); a bare name means debug."""
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s: %(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(logging.WARNING)
+    for part in os.environ.get("EIDE_LOG", "").split(","):
+        name, _, level = part.partition("=")
+        if name.strip():
+            logger = log if name.strip() == "eide" else logging.getLogger("eide." + name.strip())
+            logger.setLevel(getattr(logging, (level.strip() or "debug").upper(), logging.DEBUG))
+
+
+class TraceRecorder:
+    """Ring buffer of timed spans, exported as Chrome trace_event JSON.
+
+    Recording appends one tuple to a bounded deque, so it stays on all the
+    time; events are only formatted on export. The file opens in Perfetto
+    (ui.perfetto.dev) or chrome://tracing.
+    """
+
+    def __init__(self, capacity=TRACE_BUFFER_EVENTS):
+        self.events = collections.deque(maxlen=capacity)
+        self.open_spans = {}
+        self.origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name, category, args=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append(("X", name, category, start, time.perf_counter() - start, None, args))
+
+    def complete(self, name, category, start, args=None):
+        """Record a span that started at `start` (a perf_counter value) and ends now."""
+        self.events.append(("X", name, category, start, time.perf_counter() - start, None, args))
+
+    def begin(self, name, category, key, args=None):
+        """Start a span that may overlap others, e.g. an LSP request; end() closes it."""
+        self.open_spans[(category, key)] = name
+        self.events.append(("b", name, category, time.perf_counter(), None, key, args))
+
+    def end(self, category, key, args=None):
+        name = self.open_spans.pop((category, key), None)
+        if name is not None:
+            self.events.append(("e", name, category, time.perf_counter(), None, key, args))
+
+    def instant(self, name, category, args=None):
+        self.events.append(("i", name, category, time.perf_counter(), None, None, args))
+
+    def export(self, path):
+        """Write the buffer to `path`; returns the number of events written."""
+        pid = os.getpid()
+        trace = [
+            {"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "eide"}},
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": 0, "args": {"name": "GUI"}},
+        ]
+        for phase, name, category, start, duration, key, args in list(self.events):
+            event = {"ph": phase, "name": name, "cat": category, "pid": pid, "tid": 0,
+                     "ts": round((start - self.origin) * 1e6, 3)}
+            if duration is not None:
+                event["dur"] = round(duration * 1e6, 3)
+            if key is not None:
+                event["id"] = str(key)
+            if phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace.append(event)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(trace) - 2
+
+
+tracer = TraceRecorder()
+
+
+def traced(category):
+    """Decorator recording each call of a method as a trace span."""
+    def decorate(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.complete(name, category, start)
+        return wrapper
+    return decorate
+
+
+def describe_step(step):
+    """One-line label for a run-way step; build and graph steps are dicts shared with eide+lspv2."""
+    if not isinstance(step, dict):
+        return step
+    prefix = f"{step['name']}: " if "name" in step else ""
+    if "build" in step:
+        return f"{prefix}[build -> {step.get('output', '?')}] {step['build']}"
+    if "command" in step:
+        return f"{prefix}{step['command']}"
+    return json.dumps(step)
+
+
+def step_command(step):
+    """Shell command for a run-way step.
+
+    eide-lite has no build cache or graph scheduler: build steps always run and
+    named steps run one after another in the order they are listed.
+    """
+    if isinstance(step, dict):
+        return step.get("build") or step.get("command")
+    return step
+
+
 class RunWaysDialog(QDialog):
     """Dialog to manage run ways configuration."""
     def __init__(self, ways, parent=None):
@@ -185,7 +434,7 @@ class RunWaysDialog(QDialog):
         way_name = item.text()
         self.commands_list.clear()
         for cmd in self.ways.get(way_name, []):
-            self.commands_list.addItem(cmd)
+            self.commands_list.addItem(describe_step(cmd))
 
     def add_command(self):
         current_item = self.list_ways.currentItem()
@@ -212,10 +461,10 @@ class RunWaysDialog(QDialog):
             QMessageBox.information(self, "No Selection", "Please select a command to remove.")
             return
         way_name = current_item.text()
-        for item in selected_commands:
-            cmd = item.text()
-            self.ways[way_name].remove(cmd)
-            self.commands_list.takeItem(self.commands_list.row(item))
+        rows = sorted((self.commands_list.row(item) for item in selected_commands), reverse=True)
+        for row in rows:
+            del self.ways[way_name][row]
+            self.commands_list.takeItem(row)
 
     def accept(self):
         save_run_ways(self.ways)
@@ -434,6 +683,285 @@ class TerminalDock(QDockWidget):
         self.output.append(text)
 
 
+class CompletionRequest:
+    def __init__(self, editor, text, path, line, col, key):
+        self.editor = editor
+        self.text = text
+        self.path = path
+        self.line = line
+        self.col = col
+        self.key = key
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.request_id = None
+
+
+class JediBackend(QObject):
+    """Completion engine shared by every editor, backed by a jedi worker process.
+
+    jedi runs in JEDI_WORKER so inference never holds the GUI's GIL. Each
+    request only carries the edit since the text last sent for that editor.
+    The worker is restarted if it crashes, leaves a request unanswered for
+    JEDI_REQUEST_TIMEOUT_MS or its peak RSS passes JEDI_WORKER_MEMORY_CAP_MB;
+    the next request then resends the full text.
+
+    Scheduling is latest-only: at most one request runs and one waits, and a
+    new request replaces the waiting one. Preloading only runs when idle.
+    """
+    COMMON_MODULES = ['os', 'sys', 're', 'json', 'math', 'collections', 'itertools',
+                      'functools', 'typing', 'pathlib']
+    stats_changed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.root = None
+        self.process = None
+        self.buffer = b""
+        self.next_id = 1
+        self.next_document = 1
+        # Text the current worker holds for each document
+        self.sent_texts = {}
+        self.preloaded = set()
+        self.failed_starts = 0
+        self.answered = False
+        self.worker_rss_kb = 0
+
+        self.running = None
+        self.pending = None
+        self.background = collections.deque()
+        self.counts = {"submitted": 0, "collapsed": 0, "stale": 0, "shown": 0, "restarts": 0}
+        # (queue wait, jedi run time) of recent requests, in seconds
+        self.latencies = collections.deque(maxlen=200)
+        self.deadline = QTimer(self)
+        self.deadline.setSingleShot(True)
+        self.deadline.setInterval(JEDI_REQUEST_TIMEOUT_MS)
+        self.deadline.timeout.connect(self.on_deadline)
+
+    def ensure_worker(self):
+        if self.process is not None:
+            return True
+        if self.failed_starts >= JEDI_WORKER_MAX_FAILED_STARTS:
+            return False
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.on_stdout)
+        self.process.readyReadStandardError.connect(self.on_stderr)
+        self.process.finished.connect(self.on_worker_finished)
+        self.process.errorOccurred.connect(self.on_worker_error)
+        self.process.setProgram(sys.executable)
+        self.process.setArguments(["-c", JEDI_WORKER, str(JEDI_WORKER_ADDRESS_SPACE_MB)])
+        self.buffer = b""
+        self.sent_texts.clear()
+        self.answered = False
+        self.process.start()
+        if self.process is None:
+            return False  # failed to start and was already cleaned up
+        if self.root:
+            self.send({"op": "root", "path": self.root})
+        return True
+
+    def send(self, message):
+        if self.process is not None:
+            self.process.write((json.dumps(message) + "\n").encode('utf-8'))
+
+    def stop_worker(self):
+        if self.process is not None:
+            self.process.finished.disconnect(self.on_worker_finished)
+            self.process.errorOccurred.disconnect(self.on_worker_error)
+            self.process.kill()
+            self.process.waitForFinished(1000)
+            self.process.deleteLater()
+            self.process = None
+        self.sent_texts.clear()
+
+    def set_root(self, folder):
+        self.root = os.path.abspath(folder) if folder else None
+        if self.process is not None and self.root:
+            self.send({"op": "root", "path": self.root})
+
+    def new_document(self):
+        document = self.next_document
+        self.next_document += 1
+        return document
+
+    def close_document(self, document):
+        if self.sent_texts.pop(document, None) is not None and self.process is not None:
+            self.send({"op": "close", "doc": document})
+
+    def request_completions(self, editor, text, path, line, col, key):
+        """Queue a completion request; editor.handle_completions gets the result."""
+        request = CompletionRequest(editor, text, path, line, col, key)
+        self.counts["submitted"] += 1
+        if self.running is None:
+            self.start(request)
+        else:
+            if self.pending is not None:
+                self.counts["collapsed"] += 1
+            self.pending = request
+        self.stats_changed.emit()
+
+    def start(self, request):
+        if not self.ensure_worker():
+            self.finish(request, None)
+            return
+        request.started = time.perf_counter()
+        request.request_id = self.next_id
+        self.next_id += 1
+        document = request.editor.document_id
+        message = {"op": "complete", "id": request.request_id, "doc": document, "path": request.path,
+                   "line": request.line, "col": request.col, "length": len(request.text)}
+        previous = self.sent_texts.get(document)
+        if previous is None:
+            message["text"] = request.text
+        else:
+            message["edit"] = text_edit(previous, request.text)
+        self.sent_texts[document] = request.text
+        self.running = request
+        self.deadline.start()
+        self.send(message)
+
+    def start_background(self):
+        name, path = self.background.popleft()
+        if not self.ensure_worker():
+            self.background.clear()
+            return
+        self.running = ("preload", self.next_id)
+        self.deadline.start()
+        self.send({"op": "preload", "id": self.next_id, "name": name, "path": path})
+        self.next_id += 1
+
+    def running_id(self):
+        if isinstance(self.running, CompletionRequest):
+            return self.running.request_id
+        return self.running[1] if self.running else None
+
+    def on_stdout(self):
+        self.buffer += self.process.readAllStandardOutput().data()
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                reply = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                completion_log.warning("Ignoring non-JSON output from the jedi worker: %.200r", line)
+                continue
+            self.on_reply(reply)
+
+    def on_stderr(self):
+        sys.stderr.write(self.process.readAllStandardError().data().decode('utf-8', 'replace'))
+
+    def on_reply(self, reply):
+        self.answered = True
+        self.failed_starts = 0
+        self.worker_rss_kb = reply.get("rss_kb", self.worker_rss_kb)
+        if reply.get("id") != self.running_id():
+            return
+        request, self.running = self.running, None
+        self.deadline.stop()
+        if "error" in reply:
+            completion_log.warning("Completion failed: %s", reply["error"])
+        if isinstance(request, CompletionRequest):
+            if reply.get("resync"):
+                # The worker's copy of the text went out of step; send it whole
+                self.sent_texts.pop(request.editor.document_id, None)
+                self.start(request)
+                return
+            self.finish(request, reply.get("completions"))
+        if self.worker_rss_kb > JEDI_WORKER_MEMORY_CAP_MB * 1024:
+            completion_log.info("jedi worker reached %d MB, restarting it", self.worker_rss_kb // 1024)
+            self.stop_worker()
+            self.worker_rss_kb = 0
+            self.counts["restarts"] += 1
+        self.start_next()
+
+    def on_worker_finished(self, exitCode, exitStatus):
+        completion_log.info("jedi worker exited with code %s", exitCode)
+        self.worker_gone()
+
+    def on_worker_error(self, error):
+        # A worker that never started emits no finished signal
+        if error == QProcess.FailedToStart:
+            completion_log.warning("jedi worker failed to start: %s", self.process.errorString())
+            self.worker_gone()
+
+    def on_deadline(self):
+        completion_log.warning("jedi worker gave no reply in %d ms, restarting it", JEDI_REQUEST_TIMEOUT_MS)
+        self.stop_worker()
+        self.worker_gone()
+
+    def worker_gone(self):
+        if not self.answered:
+            self.failed_starts += 1
+        if self.process is not None:
+            self.process.deleteLater()
+            self.process = None
+        self.sent_texts.clear()
+        self.counts["restarts"] += 1
+        request, self.running = self.running, None
+        self.deadline.stop()
+        if isinstance(request, CompletionRequest):
+            self.finish(request, None)
+        self.start_next()
+
+    def start_next(self):
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            self.start(pending)
+        elif self.background:
+            self.start_background()
+        self.stats_changed.emit()
+
+    def finish(self, request, completions):
+        now = time.perf_counter()
+        started = request.started or now
+        self.latencies.append((started - request.submitted, now - started))
+        tracer.complete("jedi complete", "completion", request.submitted,
+                        {"queued_ms": (started - request.submitted) * 1000, "items": len(completions or [])})
+        try:
+            shown = request.editor.handle_completions(request, completions or [])
+        except RuntimeError:
+            # The editor was closed while jedi was working
+            shown = False
+        self.counts["shown" if shown else "stale"] += 1
+
+    def queue_depth(self):
+        return (self.running is not None) + (self.pending is not None)
+
+    def stats(self):
+        """Queue depth, request counters and latency percentiles in milliseconds."""
+        result = dict(self.counts, queue_depth=self.queue_depth(), background=len(self.background),
+                      worker_rss_mb=self.worker_rss_kb / 1024)
+        if self.latencies:
+            totals = sorted(wait + run for wait, run in self.latencies)
+            runs = sorted(run for _, run in self.latencies)
+            for name, values in (("latency", totals), ("jedi", runs)):
+                result[f"{name}_p50_ms"] = values[len(values) // 2] * 1000
+                result[f"{name}_p95_ms"] = values[min(len(values) - 1, int(len(values) * 0.95))] * 1000
+        return result
+
+    def preload(self, text, path):
+        """Warm the worker's jedi caches for the modules a file imports."""
+        names = []
+        for match in IMPORT_RE.finditer(text):
+            name = match.group(1) or match.group(2)
+            if name not in names:
+                names.append(name)
+        names += [name for name in self.COMMON_MODULES if name not in names]
+        names = [name for name in names if name not in self.preloaded]
+        if names:
+            self.preloaded.update(names)
+            # One module per request so a completion never waits for more than one
+            self.background.extend((name, path) for name in names)
+            if self.running is None:
+                self.start_background()
+
+    def shutdown(self):
+        self.stop_worker()
+
+
+jedi_backend = JediBackend()
+
+
 class Editor(QsciScintilla):
     """Code editor widget with syntax highlighting."""
     def __init__(self, parent=None):
@@ -464,12 +992,20 @@ class Editor(QsciScintilla):
         self.completion_popup.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint)
         self.completion_popup.hide()
 
-        self.completion_future = None
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.backend = jedi_backend
+        self.document_id = jedi_backend.new_document()
+        self.file_path = None
+        # Bumped on every edit so stale completion results can be recognised
+        self.text_revision = 0
+        self.textChanged.connect(self.bump_text_revision)
         self.last_completion_request = None
         self.completions_active = False
 
+    def bump_text_revision(self):
+        self.text_revision += 1
+
 
+    @traced("lexer")
     def set_lexer_for_extension(self, extension):
         extension = extension.lower()
 
@@ -510,9 +1046,9 @@ class Editor(QsciScintilla):
         # Apply the lexer to the editor
         self.setLexer(self.lexer)
 
+    @traced("editor")
     def keyPressEvent(self, event):
         # If the popup is visible, handle navigation keys
-        print("keypress")
         if not self.completion_popup.isHidden():
             if event.key() in (Qt.Key_Down, Qt.Key_Up):
                 # Navigate completions
@@ -571,52 +1107,31 @@ class Editor(QsciScintilla):
         self.replaceSelectedText(completion)
 
     def request_completions_async(self):
-        if self.completion_future and not self.completion_future.done():
-            # Cancel or just let it run and ignore its result:
-            # We cannot truly cancel jedi easily, but we can ignore old results.
-            pass
-
-        text = self.text()
         line, col = self.getCursorPosition()
-        self.last_completion_request = (text, line, col)
-        
-        def get_completions():
-            print("getting completions")
-            try:
-                script = jedi.Script(code=text, path=None)
-                return script.complete(column=col, line=line+1)
-            except Exception as e:
-                print(e)
-                return []
-            
-        self.completion_future = self.executor.submit(get_completions)
-        self.completion_future.add_done_callback(self.on_completions_ready)
-
-    def on_completions_ready(self, future):
-        # This callback is called in a thread, so we cannot directly update the GUI.
-        # Instead, post a custom event to the editor widget.
-        QApplication.instance().postEvent(self, CompletionsEvent(future))
-
-    def customEvent(self, event):
-        if event.type() == COMPLETIONS_EVENT_TYPE:
-            # Handle the completions here
-            self.handle_completions(event.future)
-        else:
-            super().customEvent(event)
+        self.last_completion_request = (self.text_revision, line, col)
+        self.backend.request_completions(self, self.text(), self.file_path, line, col,
+                                         self.last_completion_request)
+
+    def handle_completions(self, request, completions):
+        """Show a finished request's completion names unless the text or cursor moved on.
 
-    def handle_completions(self, future):
-        # This is now the main thread context
-        completions = future.result()
+        Called by the backend; returns whether they were shown.
+        """
+        line, col = self.getCursorPosition()
+        if request.key != self.last_completion_request or request.key != (self.text_revision, line, col):
+            return False
         if not completions:
             self.hide_completions()
-            return
+            return True
 
         self.populate_completions(completions)
+        return True
 
+    @traced("completion")
     def populate_completions(self, completions):
         self.completion_popup.clear()
-        for c in completions:
-            self.completion_popup.addItem(c.name)
+        for name in completions:
+            self.completion_popup.addItem(name)
         self.completion_popup.setCurrentRow(0)
 
         line, _ = self.getCursorPosition()
@@ -636,11 +1151,6 @@ class Editor(QsciScintilla):
             self.hide_completions()
 
 
-class CompletionsEvent(QEvent):
-    def __init__(self, future):
-        super().__init__(COMPLETIONS_EVENT_TYPE)
-        self.future = future
-
 class Tab(QWidget):
     """A single tab containing a code editor and associated functionalities."""
     def __init__(self, parent=None):
@@ -698,9 +1208,11 @@ class Tab(QWidget):
         self.process.readyReadStandardError.connect(lambda: self.handle_stderr(terminal))
         self.process.finished.connect(lambda exitCode, exitStatus: self.process_finished(exitCode, exitStatus, terminal))
 
+        tracer.begin(cmd, "run", f"{id(self.process):x}")
         self.process.start()
 
         if not self.process.waitForStarted():
+            tracer.end("run", f"{id(self.process):x}", {"error": "failed to start"})
             terminal.append_output("Failed to start the process.")
 
         terminal.append_output(f"$ {cmd}")
@@ -714,6 +1226,7 @@ class Tab(QWidget):
         terminal.append_output(data)
 
     def process_finished(self, exitCode, exitStatus, terminal):
+        tracer.end("run", f"{id(self.process):x}", {"exit_code": exitCode})
         terminal.append_output(f"\nProcess finished with exit code {exitCode}.")
         self.process = None
 
@@ -726,6 +1239,7 @@ class MainWindow(QMainWindow):
 
         self.run_ways = load_run_ways()
         self.current_bindings = load_keybindings()
+        configure_logging()
 
         self.tabs = QTabWidget()
         self.tabs.setTabBar(CustomTabBar())
@@ -742,10 +1256,22 @@ class MainWindow(QMainWindow):
 
         self.create_new_tab()
         self.add_plus_tab()
+        jedi_backend.set_root(QDir.currentPath())
 
         # Create Terminal Dock
         self.create_terminal_dock()
 
+        jedi_backend.stats_changed.connect(self.show_completion_stats)
+
+    def show_completion_stats(self):
+        stats = jedi_backend.stats()
+        message = f"Completions: queue {stats['queue_depth']}"
+        if "latency_p50_ms" in stats:
+            message += (f", latency p50 {stats['latency_p50_ms']:.0f} ms / p95 {stats['latency_p95_ms']:.0f} ms"
+                        f", jedi p50 {stats['jedi_p50_ms']:.0f} ms")
+        message += f", {stats['collapsed']} collapsed, {stats['stale']} stale"
+        self.statusBar().showMessage(message)
+
     def create_actions(self):
         self.new_action = QAction("New", self)
         self.new_action.triggered.connect(self.create_new_tab)
@@ -759,6 +1285,9 @@ class MainWindow(QMainWindow):
         self.save_action = QAction("Save", self)
         self.save_action.triggered.connect(self.save_file)
 
+        self.export_trace_action = QAction("Export Trace", self)
+        self.export_trace_action.triggered.connect(self.export_trace)
+
         self.run_action = QAction("Run", self)
         self.run_action.triggered.connect(self.run_code)
 
@@ -797,6 +1326,8 @@ class MainWindow(QMainWindow):
         file_menu.addAction(self.open_action)
         file_menu.addAction(self.open_folder_action)
         file_menu.addAction(self.save_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.export_trace_action)
 
         run_menu = menubar.addMenu("Run")
         run_menu.addAction(self.run_action)
@@ -868,6 +1399,7 @@ class MainWindow(QMainWindow):
         if folder:
             self.fs_model.setRootPath(folder)
             self.tree_view.setRootIndex(self.fs_model.index(folder))
+            jedi_backend.set_root(folder)
 
     def create_new_tab(self):
         tab = Tab()
@@ -903,15 +1435,19 @@ class MainWindow(QMainWindow):
 
     def open_specific_file(self, fname):
         try:
-            with open(fname, 'r', encoding='utf-8') as f:
-                text = f.read()
+            with tracer.span("read " + os.path.basename(fname), "file", {"path": fname}):
+                with open(fname, 'r', encoding='utf-8') as f:
+                    text = f.read()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not open file:\n{e}")
             return
         tab = Tab()
         tab.editor.setText(text)
+        tab.editor.file_path = os.path.abspath(fname)
         extension = os.path.splitext(fname)[1]
         tab.editor.set_lexer_for_extension(extension)
+        if extension.lower() == '.py':
+            jedi_backend.preload(text, tab.editor.file_path)
         plus_index = self.find_plus_tab()
         if plus_index >= 0:
             self.tabs.insertTab(plus_index, tab, os.path.basename(fname))
@@ -940,16 +1476,30 @@ class MainWindow(QMainWindow):
             fname = tooltip
 
         try:
-            with open(fname, 'w', encoding='utf-8') as f:
-                f.write(editor_tab.editor.text())
+            with tracer.span("save " + os.path.basename(fname), "file", {"path": fname}):
+                with open(fname, 'w', encoding='utf-8') as f:
+                    f.write(editor_tab.editor.text())
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not save file:\n{e}")
             return
         self.tabs.setTabText(idx, os.path.basename(fname))
         self.tabs.setTabToolTip(idx, fname)
+        editor_tab.editor.file_path = os.path.abspath(fname)
         editor_tab.mark_saved()
         QMessageBox.information(self, "Saved", f"File saved successfully to {fname}")
 
+    def export_trace(self):
+        fname, _ = QFileDialog.getSaveFileName(self, "Export Trace", "eide-trace.json", "Trace files (*.json)")
+        if not fname:
+            return
+        try:
+            count = tracer.export(fname)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write trace:\n{e}")
+            return
+        QMessageBox.information(self, "Export Trace",
+                                f"Exported {count} trace events to {fname}.\nOpen it in ui.perfetto.dev or chrome://tracing.")
+
     def current_editor_tab(self):
         widget = self.tabs.currentWidget()
         if isinstance(widget, Tab):
@@ -996,11 +1546,12 @@ class MainWindow(QMainWindow):
                 return
             self.tabs.setTabText(idx, os.path.basename(fname))
             self.tabs.setTabToolTip(idx, fname)
+            current_tab.editor.file_path = os.path.abspath(fname)
             tooltip = fname
             current_tab.mark_saved()
-        print(tooltip)
-        processed_commands = [cmd.replace("{{file}}", f'{tooltip}') for cmd in commands]
-        print(processed_commands)
+        processed_commands = [step_command(cmd).replace("{{file}}", f'{tooltip}').replace("{{dir}}", os.path.dirname(tooltip))
+                              for cmd in commands if step_command(cmd)]
+        run_log.debug("Running %s: %s", tooltip, processed_commands)
         if sys.platform.startswith('win'):
             separator = ' && '
         else:
@@ -1016,6 +1567,8 @@ class MainWindow(QMainWindow):
         if widget:
             if widget.process and widget.process.state() == QProcess.Running:
                 widget.process.kill()
+            if isinstance(widget, Tab):
+                jedi_backend.close_document(widget.editor.document_id)
             self.tabs.removeTab(index)
             widget.deleteLater()
 
@@ -1036,6 +1589,7 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.No:
                 event.ignore()
                 return
+        jedi_backend.shutdown()
         event.accept()
 
     def goto_line(self):
@@ -1094,12 +1648,187 @@ class CustomTabBar(QTabBar):
         return btn
 
 
+def event_type_names():
+    """Map QEvent type numbers to their enum names for log output."""
+    names = {}
+    for name in dir(QEvent):
+        value = getattr(QEvent, name)
+        if isinstance(value, QEvent.Type):
+            names.setdefault(int(value), name)
+    return names
+
+
+class EventWatchdog:
+    """Times events dispatched through the application and logs slow ones.
+
+    A sampler thread grabs the GUI thread's Python stack while a handler is
+    still over budget, so the log shows where the time went, not just which
+    event was slow. Only events owned by one of `watched_types` (the object
+    itself or an ancestor) are reported.
+    """
+
+    def __init__(self, budget_ms, watched_types, stream=None):
+        self.budget = budget_ms / 1000.0
+        self.watched_types = tuple(watched_types)
+        self.stream = stream or sys.stderr
+        self.type_names = event_type_names()
+        self.active = []  # [start, stack or None] per nested dispatch
+        self.slow = collections.Counter()
+        self.worst = {}
+        self.main_thread = threading.get_ident()
+        self.running = True
+        self.sampler = threading.Thread(target=self.sample, name="eide-watchdog", daemon=True)
+        self.sampler.start()
+
+    def sample(self):
+        interval = max(self.budget / 4, 0.001)
+        while self.running:
+            time.sleep(interval)
+            now = time.perf_counter()
+            pending = [entry for entry in list(self.active) if entry[1] is None and now - entry[0] > self.budget]
+            if not pending:
+                continue
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            for entry in pending:
+                entry[1] = stack
+
+    def owner(self, receiver):
+        obj = receiver
+        while obj is not None:
+            if isinstance(obj, self.watched_types):
+                return obj
+            obj = obj.parent()
+        return None
+
+    def dispatch(self, dispatch, receiver, event):
+        entry = [time.perf_counter(), None]
+        event_type = int(event.type())
+        self.active.append(entry)
+        try:
+            return dispatch(receiver, event)
+        finally:
+            self.active.pop()
+            elapsed = time.perf_counter() - entry[0]
+            if elapsed > self.budget:
+                self.report_slow(receiver, event_type, elapsed, entry[1])
+
+    def report_slow(self, receiver, event_type, elapsed, stack):
+        try:
+            owner = self.owner(receiver)
+        except RuntimeError:  # receiver deleted by its own handler
+            return
+        if owner is None:
+            return
+        name = self.type_names.get(event_type, str(event_type))
+        key = (type(owner).__name__, name)
+        self.slow[key] += 1
+        self.worst[key] = max(self.worst.get(key, 0.0), elapsed)
+        target = type(receiver).__name__
+        if receiver is not owner:
+            target += " in " + type(owner).__name__
+        tracer.complete(name, "qt-event", time.perf_counter() - elapsed, {"receiver": target})
+        self.stream.write(f"[watchdog] {elapsed * 1000:.1f} ms handling {name} on {target} "
+                          f"(depth {len(self.active)})\n")
+        if stack is None:
+            # Finished before the sampler saw it; fall back to the dispatch site
+            stack = traceback.extract_stack()[:-2]
+        self.stream.write(self.format_stack(stack))
+        self.stream.flush()
+
+    def format_stack(self, stack):
+        """Format a stack without the watchdog's own dispatch frames."""
+        frames = [f for f in stack if not (f.filename == __file__ and f.name in ("notify", "dispatch"))]
+        inside_qt = bool(stack) and stack[-1].filename == __file__ and stack[-1].name in ("notify", "dispatch")
+        text = "".join(traceback.StackSummary.from_list(frames[-12:]).format())
+        if inside_qt:
+            text += "  (no Python frames below this point: the time was spent inside Qt)\n"
+        return text
+
+    def stop(self):
+        self.running = False
+        if not self.slow:
+            return
+        self.stream.write(f"[watchdog] slow events over {self.budget * 1000:.0f} ms:\n")
+        for (owner, name), count in self.slow.most_common():
+            self.stream.write(f"  {count:>5}x  {name:<24} {owner:<20} "
+                              f"worst {self.worst[(owner, name)] * 1000:.1f} ms\n")
+        self.stream.flush()
+
+
+class InstrumentedApplication(QApplication):
+    """QApplication that routes every event through an EventWatchdog."""
+
+    def __init__(self, argv, watchdog):
+        super().__init__(argv)
+        self.watchdog = watchdog
+
+    def notify(self, receiver, event):
+        return self.watchdog.dispatch(super().notify, receiver, event)
+
+
+def parse_instrumentation_args(argv):
+    """Pull --watchdog[=MS] and --profile[=PATH] out of argv.
+
+    EIDE_WATCHDOG and EIDE_PROFILE set the same options from the environment.
+    Returns (budget_ms or None, profile path or None, remaining argv).
+    """
+    budget = os.environ.get("EIDE_WATCHDOG") or None
+    profile = os.environ.get("EIDE_PROFILE") or None
+    rest = []
+    for arg in argv:
+        if arg == "--watchdog":
+            budget = "16"
+        elif arg.startswith("--watchdog="):
+            budget = arg.split("=", 1)[1]
+        elif arg == "--profile":
+            profile = "eide-profile.prof"
+        elif arg.startswith("--profile="):
+            profile = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+    if budget is not None:
+        try:
+            budget = float(budget)
+        except ValueError:
+            budget = 16.0
+    return budget, profile, rest
+
+
+def write_profile(profiler, path):
+    """Save raw cProfile stats to `path` and a readable summary next to it."""
+    profiler.dump_stats(path)
+    with open(path + ".txt", "w", encoding="utf-8") as f:
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats("cumulative").print_stats(60)
+        stats.sort_stats("tottime").print_stats(30)
+    sys.stderr.write(f"Profile written to {path} ({path}.txt)\n")
+
+
 def main():
-    app = QApplication(sys.argv)
+    budget, profile_path, argv = parse_instrumentation_args(sys.argv)
+    watchdog = None
+    if budget is not None:
+        watchdog = EventWatchdog(budget, (Editor, Tab, MainWindow))
+        app = InstrumentedApplication(argv, watchdog)
+    else:
+        app = QApplication(argv)
+    profiler = None
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
     window = MainWindow()
     window.resize(1000, 600)
     window.show()
-    sys.exit(app.exec_())
+    code = app.exec_()
+    if profiler is not None:
+        profiler.disable()
+        write_profile(profiler, profile_path)
+    if watchdog is not None:
+        watchdog.stop()
+    sys.exit(code)
 
 
 if __name__ == '__main__':